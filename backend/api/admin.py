@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Dataset, Equipment
+from .models import Dataset, Equipment, IngestJob
 
 
 @admin.register(Dataset)
@@ -15,3 +15,10 @@ class EquipmentAdmin(admin.ModelAdmin):
     list_display = ['equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature', 'dataset']
     list_filter = ['equipment_type', 'dataset']
     search_fields = ['equipment_name', 'equipment_type']
+
+
+@admin.register(IngestJob)
+class IngestJobAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'status', 'rows_processed', 'created_at', 'finished_at', 'dataset']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'started_at', 'finished_at']
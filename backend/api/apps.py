@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .caching import invalidate_dataset
+        from .models import Dataset
+
+        post_save.connect(invalidate_dataset, sender=Dataset)
+        post_delete.connect(invalidate_dataset, sender=Dataset)
+
+        if settings.INGEST_JOB_RUNNER == 'inprocess':
+            from django.core.signals import request_started
+            from .jobs import recover_jobs
+
+            request_started.connect(recover_jobs)
@@ -0,0 +1,112 @@
+"""
+Async variants of the dataset read endpoints.
+
+They take the same parameters and return the same bodies, ETags and
+Last-Modified dates as their DRF counterparts in ``views``, and are
+mounted under ``/api/async/``. Every query goes through Django's async ORM, so under an
+ASGI server a request that is waiting on the database or on a slow
+client does not hold a worker thread.
+"""
+from functools import wraps
+
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from .caching import aconditional_cached, adataset_state, alist_state
+from .filters import FilterError
+from .models import Dataset
+from .pagination import PaginationError, akeyset_page
+from .stats import StatsError, agrouped_stats, parse_percentiles
+from .views import (
+    DATASET_FIELDS,
+    dataset_detail_payload,
+    dataset_list_query,
+    equipment_query,
+    next_page_headers,
+    project_rows,
+    type_counts_query
+)
+
+
+def json_response(data, status=200, headers=None):
+    """Render ``data`` byte for byte as the DRF views do"""
+    return HttpResponse(
+        JSONRenderer().render(data),
+        content_type='application/json',
+        status=status,
+        headers=headers
+    )
+
+
+def require_get(view):
+    """``require_GET`` for async views (Django's decorator only wraps sync ones)"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response(
+                {'error': f'Method "{request.method}" not allowed.'},
+                status=405,
+                headers={'Allow': 'GET, HEAD'}
+            )
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@require_get
+@aconditional_cached('dataset_list', alist_state)
+async def aget_datasets(request):
+    try:
+        fields, page = dataset_list_query(request)
+        rows, next_cursor = await akeyset_page(**page)
+    except (PaginationError, FilterError) as e:
+        return json_response({'error': str(e)}, status=400)
+
+    headers = next_page_headers(request, next_cursor) if next_cursor else None
+    return json_response(project_rows(rows, fields, DATASET_FIELDS), headers=headers)
+
+
+@require_get
+@aconditional_cached('dataset_detail', adataset_state)
+async def aget_dataset_detail(request, dataset_id):
+    try:
+        dataset = await Dataset.objects.aget(id=dataset_id, is_ready=True)
+    except Dataset.DoesNotExist:
+        return json_response({'error': 'Dataset not found'}, status=404)
+
+    try:
+        fields, filters, page = equipment_query(request, dataset.id)
+        rows, next_cursor = await akeyset_page(**page)
+    except (PaginationError, FilterError) as e:
+        return json_response({'error': str(e)}, status=400)
+
+    matching_types = None
+    if not page['cursor']:
+        if filters:
+            matching_types = {
+                eq_type: count async for eq_type, count in type_counts_query(page['queryset'])
+            }
+        else:
+            matching_types = dataset.equipment_types or {}
+
+    return json_response(
+        dataset_detail_payload(dataset, fields, rows, next_cursor, matching_types)
+    )
+
+
+@require_get
+@aconditional_cached('dataset_stats', adataset_state)
+async def aget_dataset_stats(request, dataset_id):
+    """Per equipment type statistics, aggregated in the database"""
+    if not await Dataset.objects.filter(id=dataset_id, is_ready=True).aexists():
+        return json_response({'error': 'Dataset not found'}, status=404)
+
+    try:
+        percentiles = parse_percentiles(request.GET.get('percentiles'))
+    except StatsError as e:
+        return json_response({'error': str(e)}, status=400)
+
+    return json_response({
+        'dataset_id': dataset_id,
+        'percentiles': percentiles,
+        'groups': await agrouped_stats(dataset_id, percentiles)
+    })
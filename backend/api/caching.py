@@ -0,0 +1,215 @@
+"""
+Response caching and conditional GET for dataset reads.
+
+Read views are wrapped with ``conditional_cached``. A cheap validator
+query gives the state of the data behind the response (for a dataset:
+its ``updated_at``). From that we derive a strong ETag and a
+Last-Modified date:
+
+* a matching ``If-None-Match`` / ``If-Modified-Since`` gets a 304
+  without running the view;
+* otherwise the response data is served from Django's cache, keyed by
+  the ETag, and only computed on a miss.
+
+Because the cache key contains the validator, a stale entry can never
+be served, even by a process that missed an invalidation. Entries are
+still dropped eagerly when a dataset is saved or deleted so they do not
+sit in memory until they expire.
+
+Async views use ``aconditional_cached`` with the ``a``-prefixed state
+functions, which query through Django's async ORM and cache the rendered
+response body.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import Dataset
+
+
+LIST_SCOPE = 'list'
+
+
+def make_etag(name, state, request, media_type=None):
+    """Strong ETag for one representation of a view's data.
+
+    Built from the URL kwargs and query string rather than the path, so
+    the sync and async variants of a view give the same ETag for the same
+    body.
+    """
+    match = request.resolver_match
+    source = '|'.join([
+        name,
+        repr(state),
+        repr(sorted(match.kwargs.items())) if match else '',
+        request.META.get('QUERY_STRING', ''),
+        media_type or getattr(request, 'accepted_media_type', '') or '',
+    ])
+    return '"%s"' % hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def _index_key(scope):
+    return f'api:keys:{scope}'
+
+
+def remember_key(scope, key):
+    """Track cache keys per dataset so they can be dropped together"""
+    keys = cache.get(_index_key(scope)) or set()
+    keys.add(key)
+    cache.set(_index_key(scope), keys, None)
+
+
+def invalidate(scope):
+    keys = cache.get(_index_key(scope))
+    if keys:
+        cache.delete_many(list(keys))
+    cache.delete(_index_key(scope))
+
+
+def invalidate_dataset(sender, instance, **kwargs):
+    """Signal handler: drop cached reads of a dataset and of the list"""
+    invalidate(instance.pk)
+    invalidate(LIST_SCOPE)
+
+
+def list_state(**kwargs):
+    state = Dataset.objects.filter(is_ready=True).aggregate(
+        latest=Max('updated_at'),
+        count=Count('id')
+    )
+    return LIST_SCOPE, (state['latest'], state['count']), state['latest']
+
+
+def dataset_state(dataset_id, **kwargs):
+    updated_at = Dataset.objects.filter(id=dataset_id, is_ready=True).values_list(
+        'updated_at', flat=True
+    ).first()
+    if updated_at is None:
+        return None
+    return dataset_id, updated_at, updated_at
+
+
+async def alist_state(**kwargs):
+    state = await Dataset.objects.filter(is_ready=True).aaggregate(
+        latest=Max('updated_at'),
+        count=Count('id')
+    )
+    return LIST_SCOPE, (state['latest'], state['count']), state['latest']
+
+
+async def adataset_state(dataset_id, **kwargs):
+    updated_at = await Dataset.objects.filter(id=dataset_id, is_ready=True).values_list(
+        'updated_at', flat=True
+    ).afirst()
+    if updated_at is None:
+        return None
+    return dataset_id, updated_at, updated_at
+
+
+def _set_validators(response, etag, timestamp):
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # Clients may keep a copy but must revalidate it every time
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def conditional_cached(name, state_func):
+    """Decorate a DRF read view with ETag handling and response caching.
+
+    ``state_func`` receives the view's URL kwargs and returns
+    ``(scope, state, last_modified)``, or None to let the view handle
+    the request uncached (e.g. to produce its 404).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            result = state_func(**kwargs)
+            if result is None:
+                return view(request, *args, **kwargs)
+            scope, state, last_modified = result
+
+            etag = make_etag(name, state, request)
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            not_modified = get_conditional_response(
+                request._request, etag=etag, last_modified=timestamp
+            )
+            if not_modified is not None and not_modified.status_code == 304:
+                response = Response(status=304)
+            else:
+                key = f'api:{name}:{etag.strip(chr(34))}'
+                cached = cache.get(key)
+                if cached is not None:
+                    data, headers = cached
+                    response = Response(data)
+                    for header, value in headers.items():
+                        response[header] = value
+                else:
+                    response = view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    cache.set(
+                        key,
+                        (response.data, dict(response.items())),
+                        settings.API_CACHE_TIMEOUT
+                    )
+                    remember_key(scope, key)
+
+            return _set_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
+
+
+def aconditional_cached(name, state_func):
+    """``conditional_cached`` for plain Django async views.
+
+    ``state_func`` is a coroutine function and ``name`` is the sync
+    variant's, so both share ETags. The rendered body and headers of a
+    200 response are cached rather than its data.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            result = await state_func(**kwargs)
+            if result is None:
+                return await view(request, *args, **kwargs)
+            scope, state, last_modified = result
+
+            # The JSON that DRF would render for the sync variant
+            etag = make_etag(name, state, request, media_type='application/json')
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None or response.status_code != 304:
+                # Not the sync variant's key: that entry holds DRF data
+                key = f'api:async:{name}:{etag.strip(chr(34))}'
+                cached = await cache.aget(key)
+                if cached is not None:
+                    content, headers = cached
+                    response = HttpResponse(content)
+                    for header, value in headers.items():
+                        response[header] = value
+                else:
+                    response = await view(request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    await cache.aset(
+                        key,
+                        (response.content, dict(response.items())),
+                        settings.API_CACHE_TIMEOUT
+                    )
+                    await sync_to_async(remember_key)(scope, key)
+
+            return _set_validators(response, etag, timestamp)
+        return wrapper
+    return decorator
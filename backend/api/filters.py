@@ -0,0 +1,75 @@
+"""
+Query-parameter filtering and ordering helpers.
+
+Filters and sort keys are whitelisted per endpoint and applied to the
+queryset so the database does the work, backed by indexes.
+"""
+from django.core.exceptions import ValidationError
+
+from .pagination import query_params
+
+
+RANGE_LOOKUPS = ('gt', 'gte', 'lt', 'lte')
+
+
+class FilterError(ValueError):
+    """Raised for unknown or malformed filter and ordering parameters"""
+
+
+def parse_range_filters(request, model, fields):
+    """Collect ``<field>__<lookup>=<value>`` parameters for ``fields``.
+
+    Values are converted with the model field so that bad input is a
+    client error rather than a database error.
+    """
+    filters = {}
+    for field in fields:
+        model_field = model._meta.get_field(field)
+        for lookup in RANGE_LOOKUPS:
+            param = f'{field}__{lookup}'
+            raw = query_params(request).get(param)
+            if raw in (None, ''):
+                continue
+            try:
+                filters[param] = model_field.to_python(raw)
+            except ValidationError:
+                raise FilterError(f'Invalid value for {param}: {raw}')
+    return filters
+
+
+def parse_in_filter(request, param):
+    """Values of a comma separated ``param`` (None when absent)"""
+    raw = query_params(request).get(param)
+    if not raw:
+        return None
+    values = [value.strip() for value in raw.split(',') if value.strip()]
+    if not values:
+        raise FilterError(f'{param} needs at least one value')
+    return values
+
+
+def parse_ordering(request, allowed, default):
+    """Return a keyset-friendly ordering from the ``ordering`` parameter.
+
+    Accepts a comma separated list of ``allowed`` fields, each optionally
+    prefixed with ``-``; unless ``id`` is among them it is appended in the
+    direction of the last key as a unique tie-breaker.
+    """
+    raw = query_params(request).get('ordering')
+    if not raw:
+        return list(default)
+    ordering = [key.strip() for key in raw.split(',') if key.strip()]
+    if not ordering:
+        return list(default)
+    fields = [key.lstrip('-') for key in ordering]
+    for field in fields:
+        if field not in allowed:
+            raise FilterError(
+                f"Cannot order by {field}. Allowed: {', '.join(allowed)}"
+            )
+    if len(set(fields)) != len(fields):
+        raise FilterError('Each field can appear in ordering only once')
+    if 'id' in fields:
+        # Later keys could never break a tie
+        return ordering[:fields.index('id') + 1]
+    return ordering + ['-id' if ordering[-1].startswith('-') else 'id']
@@ -0,0 +1,220 @@
+"""
+Precomputed histograms of the numeric columns, for charts.
+
+For every column, over all rows and per equipment type, a dataset stores
+
+* ``fixed_counts`` - counts in ``FINE_BINS`` equal-width bins spanning the
+  column's overall range (shared by the types, so they stack)
+* ``quantiles``    - the ``FINE_BINS + 1`` quantiles ``q(i / FINE_BINS)``,
+  the edges of equal-frequency bins
+
+Coarser histograms are served by merging neighbouring fine bins, so any
+bin count that divides ``FINE_BINS`` is available without reading rows.
+
+The histograms are built once a dataset's rows are stored, with one
+query per column that streams ``(type, value)`` in value order. Each
+chunk is binned with NumPy and the values at the quantile ranks are
+picked out, for all rows and for every type at once, so memory does not
+depend on the dataset size. Quantiles are exact (linear interpolation,
+as ``numpy.quantile``).
+"""
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min
+
+from .models import DatasetHistogram, Equipment
+from .stats import STAT_COLUMNS
+
+
+# Stored bins per histogram; its many divisors give the selectable bin counts
+FINE_BINS = 240
+
+DEFAULT_BINS = 24
+
+ALL_TYPES = ''
+
+
+class HistogramError(ValueError):
+    """Raised for malformed histogram parameters"""
+
+
+def allowed_bins():
+    return [bins for bins in range(1, FINE_BINS + 1) if FINE_BINS % bins == 0]
+
+
+def parse_bins(raw):
+    if not raw:
+        return DEFAULT_BINS
+    try:
+        bins = int(raw)
+    except ValueError:
+        bins = None
+    if bins not in allowed_bins():
+        raise HistogramError(
+            f'bins must divide {FINE_BINS}: {", ".join(map(str, allowed_bins()))}'
+        )
+    return bins
+
+
+def parse_columns(raw):
+    if not raw:
+        return list(STAT_COLUMNS)
+    columns = [part.strip() for part in raw.split(',') if part.strip()]
+    unknown = [column for column in columns if column not in STAT_COLUMNS]
+    if unknown:
+        raise HistogramError(
+            f"Unknown columns: {', '.join(unknown)}. Allowed: {', '.join(STAT_COLUMNS)}"
+        )
+    return columns
+
+
+def fixed_edges(low, high):
+    if low == high:
+        # Same convention as numpy.histogram for a single distinct value
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, FINE_BINS + 1)
+
+
+class _SortedAccumulator:
+    """Fixed-bin counts and quantiles of values that arrive in ascending order"""
+
+    def __init__(self, count, edges):
+        self.count = count
+        self.edges = edges
+        self.fixed_counts = np.zeros(FINE_BINS, dtype=np.int64)
+        positions = (count - 1) * np.arange(FINE_BINS + 1) / FINE_BINS
+        self.lower = np.floor(positions).astype(np.int64)
+        self.upper = np.ceil(positions).astype(np.int64)
+        self.fraction = positions - self.lower
+        self.ranks = np.union1d(self.lower, self.upper)
+        self.picked = np.empty(len(self.ranks))
+        self.seen = 0
+
+    def feed(self, values):
+        self.fixed_counts += np.histogram(values, bins=self.edges)[0]
+        start = np.searchsorted(self.ranks, self.seen)
+        stop = np.searchsorted(self.ranks, self.seen + len(values))
+        self.picked[start:stop] = values[self.ranks[start:stop] - self.seen]
+        self.seen += len(values)
+
+    def quantiles(self):
+        lower = self.picked[np.searchsorted(self.ranks, self.lower)]
+        upper = self.picked[np.searchsorted(self.ranks, self.upper)]
+        return lower + (upper - lower) * self.fraction
+
+
+def column_histograms(dataset_id, column, low, high, type_counts, chunk_size=None):
+    """``{equipment_type or ALL_TYPES: _SortedAccumulator}`` for one column"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    edges = fixed_edges(low, high)
+    types = list(type_counts)
+    accumulators = {eq_type: _SortedAccumulator(type_counts[eq_type], edges) for eq_type in types}
+    accumulators[ALL_TYPES] = _SortedAccumulator(sum(type_counts.values()), edges)
+
+    rows = Equipment.objects.filter(dataset_id=dataset_id).order_by(column, 'id').values_list(
+        'equipment_type', column
+    ).iterator(chunk_size=chunk_size)
+    codes_for = {eq_type: code for code, eq_type in enumerate(types)}
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _feed(accumulators, types, codes_for, chunk)
+    return accumulators
+
+
+def _feed(accumulators, types, codes_for, chunk):
+    chunk_types, chunk_values = zip(*chunk)
+    values = np.fromiter(chunk_values, dtype=np.float64, count=len(chunk))
+    codes = np.fromiter((codes_for[t] for t in chunk_types), dtype=np.int32, count=len(chunk))
+    accumulators[ALL_TYPES].feed(values)
+    # Each type's values are a subsequence of the sorted stream, so also sorted
+    for code in np.unique(codes):
+        accumulators[types[code]].feed(values[codes == code])
+
+
+def build_histograms(dataset_id, ranges=None):
+    """(Re)build the stored histograms of a dataset.
+
+    ``ranges`` maps each column to its ``(min, max)``; they are queried
+    when not given.
+    """
+    queryset = Equipment.objects.filter(dataset_id=dataset_id)
+    if ranges is None:
+        aggregates = {}
+        for column in STAT_COLUMNS:
+            aggregates[f'{column}_min'] = Min(column)
+            aggregates[f'{column}_max'] = Max(column)
+        values = queryset.aggregate(**aggregates)
+        ranges = {
+            column: (values[f'{column}_min'], values[f'{column}_max'])
+            for column in STAT_COLUMNS
+        }
+    type_counts = dict(
+        queryset.values_list('equipment_type').annotate(count=Count('id')).order_by()
+    )
+
+    histograms = []
+    if type_counts:
+        for column in STAT_COLUMNS:
+            low, high = ranges[column]
+            accumulators = column_histograms(dataset_id, column, low, high, type_counts)
+            for eq_type, accumulator in accumulators.items():
+                histograms.append(DatasetHistogram(
+                    dataset_id=dataset_id,
+                    column=column,
+                    equipment_type=eq_type,
+                    count=accumulator.count,
+                    low=float(accumulator.edges[0]),
+                    high=float(accumulator.edges[-1]),
+                    fixed_counts=accumulator.fixed_counts.tolist(),
+                    quantiles=accumulator.quantiles().tolist(),
+                ))
+
+    with transaction.atomic():
+        DatasetHistogram.objects.filter(dataset_id=dataset_id).delete()
+        DatasetHistogram.objects.bulk_create(histograms)
+
+
+def rebin(histogram, bins):
+    """Serializable fixed and quantile histograms with ``bins`` bins"""
+    step = FINE_BINS // bins
+    edges = np.linspace(histogram.low, histogram.high, FINE_BINS + 1)
+    counts = np.asarray(histogram.fixed_counts).reshape(bins, step).sum(axis=1)
+
+    # Equal-frequency bins: bin j holds the ranks between quantile positions
+    # j and j + 1 (the maximum goes into the last bin)
+    positions = (histogram.count - 1) * np.arange(bins + 1) / bins
+    rank_edges = np.ceil(positions).astype(np.int64)
+    quantile_counts = np.diff(rank_edges)
+    quantile_counts[-1] += 1
+
+    return {
+        'count': histogram.count,
+        'fixed': {'edges': edges[::step].tolist(), 'counts': counts.tolist()},
+        'quantile': {
+            'edges': histogram.quantiles[::step],
+            'counts': quantile_counts.tolist(),
+        },
+    }
+
+
+def dataset_histograms(dataset_id, bins, columns, by_type=True):
+    """``{column: {'all': ..., 'by_type': {type: ...}}}`` re-binned to ``bins``"""
+    queryset = DatasetHistogram.objects.filter(dataset_id=dataset_id, column__in=columns)
+    if not by_type:
+        queryset = queryset.filter(equipment_type=ALL_TYPES)
+
+    result = {}
+    for histogram in queryset.order_by('column', 'equipment_type'):
+        entry = result.setdefault(histogram.column, {'all': None})
+        if by_type:
+            entry.setdefault('by_type', {})
+        if histogram.equipment_type == ALL_TYPES:
+            entry['all'] = rebin(histogram, bins)
+        else:
+            entry['by_type'][histogram.equipment_type] = rebin(histogram, bins)
+    return result
@@ -0,0 +1,473 @@
+"""
+CSV ingestion pipeline.
+
+Uploaded files are parsed in fixed-size chunks straight from the upload
+handle, so peak memory depends on the chunk size rather than on the size
+of the file. Every chunk is validated (see api/validation.py), folded into the
+running summary and written to the database before the next one is
+read. Once a chunk fails validation nothing more is written, but the
+rest of the file is still checked so the error report covers all of it.
+Outlier flags and chart histograms are set once all rows are stored
+(see api/outliers.py and api/histograms.py). After an append they are
+rebuilt in the background, outside the append's lock.
+
+Rows are written column-wise: on PostgreSQL each chunk is streamed in
+with ``COPY``, on other backends it goes through ``bulk_create`` in
+batches of ``INGEST_BATCH_SIZE``.
+
+Uploads are identified by the SHA-256 of their bytes, stored in the
+unique ``Dataset.content_hash`` column, so a file that was already
+ingested can be answered with the existing dataset instead of a copy.
+"""
+import hashlib
+import io
+import logging
+import warnings
+from contextlib import nullcontext
+
+import pandas as pd
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import Dataset, Equipment
+from .histograms import build_histograms
+from .outliers import flag_outliers
+from .validation import ChunkValidator
+
+logger = logging.getLogger(__name__)
+
+
+REQUIRED_COLUMNS = [
+    'Equipment Name',
+    'Type',
+    'Flowrate',
+    'Pressure',
+    'Temperature'
+]
+
+NUMERIC_COLUMNS = {
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+
+class IngestError(Exception):
+    """Raised when an uploaded file cannot be ingested.
+
+    ``payload`` is returned to the client as the body of a 400 response.
+    """
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.payload = {'error': message, **details}
+
+
+class DuplicateUpload(Exception):
+    """Raised when a file with the same content hash was already ingested"""
+
+    def __init__(self, dataset):
+        super().__init__(f'Already uploaded as dataset {dataset.pk}')
+        self.dataset = dataset
+
+
+class RunningMoments:
+    """Count, mean, min, max and sum of squared deviations of one column.
+
+    Moments of two batches of rows merge exactly (Chan et al.'s parallel
+    form of Welford's update), so statistics can be built one chunk at a
+    time and extended later without revisiting rows already stored.
+    """
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, min=None, max=None):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.min = min
+        self.max = max
+
+    @classmethod
+    def from_values(cls, values):
+        values = values.dropna()
+        if not len(values):
+            return cls()
+        mean = float(values.mean())
+        return cls(
+            n=len(values),
+            mean=mean,
+            m2=float(((values - mean) ** 2).sum()),
+            min=float(values.min()),
+            max=float(values.max())
+        )
+
+    @classmethod
+    def from_dict(cls, state):
+        return cls(**state)
+
+    def merge(self, other):
+        if not other.n:
+            return
+        if not self.n:
+            self.n, self.mean, self.m2 = other.n, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def variance(self):
+        """Population variance"""
+        return self.m2 / self.n if self.n else 0.0
+
+    def as_dict(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2, 'min': self.min, 'max': self.max}
+
+
+class SummaryAccumulator:
+    """Running summary statistics that can be fed one chunk at a time"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.moments = {field: RunningMoments() for field in NUMERIC_COLUMNS.values()}
+        self.type_counts = {}
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """Resume from a dataset's stored aggregates, without reading its rows"""
+        summary = cls()
+        summary.total_rows = dataset.total_rows
+        for field, state in (dataset.running_stats or {}).items():
+            summary.moments[field] = RunningMoments.from_dict(state)
+        summary.type_counts = dict(dataset.equipment_types or {})
+        return summary
+
+    def update(self, chunk):
+        self.total_rows += len(chunk)
+        for column, field in NUMERIC_COLUMNS.items():
+            self.moments[field].merge(RunningMoments.from_values(chunk[column]))
+        for eq_type, count in chunk['Type'].value_counts().items():
+            self.type_counts[eq_type] = self.type_counts.get(eq_type, 0) + int(count)
+
+    def mean(self, field):
+        moments = self.moments[field]
+        return moments.mean if moments.n else 0.0
+
+    def ranges(self):
+        """``{field: (min, max)}`` of the rows seen so far"""
+        return {field: (moments.min, moments.max) for field, moments in self.moments.items()}
+
+    def running_stats(self):
+        return {field: moments.as_dict() for field, moments in self.moments.items()}
+
+    def as_dict(self):
+        type_counts = sorted(self.type_counts.items(), key=lambda item: -item[1])
+        return {
+            'avg_flowrate': self.mean('flowrate'),
+            'avg_pressure': self.mean('pressure'),
+            'avg_temperature': self.mean('temperature'),
+            'equipment_types': dict(type_counts)
+        }
+
+    def save_to(self, dataset, **fields):
+        """Store the totals and summary on ``dataset`` (bumps ``updated_at``)"""
+        dataset.total_rows = self.total_rows
+        dataset.set_summary(self.as_dict())
+        dataset.running_stats = self.running_stats()
+        for name, value in fields.items():
+            setattr(dataset, name, value)
+        dataset.save(update_fields=[
+            'total_rows', 'running_stats', 'updated_at', *Dataset.SUMMARY_FIELDS, *fields
+        ])
+
+
+def content_hash(fileobj, block_size=1024 * 1024):
+    """SHA-256 hex digest of a file, read in one streaming pass"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(block_size), b''):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def find_duplicate(digest):
+    """The dataset already ingested from a file with this hash, if any"""
+    return Dataset.objects.filter(content_hash=digest, is_ready=True).first()
+
+
+def validate_columns(columns):
+    """Make sure every required column is present in the CSV header"""
+    if not all(col in columns for col in REQUIRED_COLUMNS):
+        raise IngestError(
+            'Missing required columns',
+            required=REQUIRED_COLUMNS,
+            found=list(columns)
+        )
+
+
+def raise_for_validation(validator):
+    """Raise an IngestError carrying the validator's report if it failed"""
+    if validator.failed:
+        raise IngestError(
+            f'Validation failed for {validator.invalid_rows} rows',
+            validation=validator.report()
+        )
+
+
+# Raised while reading a file that is not a UTF-8 CSV
+PARSE_ERRORS = (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError)
+
+
+def read_chunks(fileobj, chunksize=None):
+    """Yield DataFrame chunks parsed directly from a binary file handle"""
+    chunksize = chunksize or settings.INGEST_CHUNK_SIZE
+    if hasattr(fileobj, 'seek'):
+        fileobj.seek(0)
+    # index_col=False: a first row with an extra field must not turn the
+    # first column into the index and shift every other column by one.
+    # Short rows come out as empty cells, which the validator reports.
+    reader = pd.read_csv(fileobj, encoding='utf-8', chunksize=chunksize, index_col=False)
+    with reader:
+        while True:
+            # pandas only warns when it drops the extra fields of the first row
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', pd.errors.ParserWarning)
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    return
+                except pd.errors.ParserWarning:
+                    raise pd.errors.ParserError('A row has more fields than the header')
+            yield chunk
+
+
+EQUIPMENT_COLUMNS = {
+    'equipment_name': 'Equipment Name',
+    'equipment_type': 'Type',
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+}
+
+
+def equipment_frame(dataset, chunk):
+    """Project a parsed chunk onto the Equipment table columns"""
+    frame = pd.DataFrame({
+        field: chunk[column] for field, column in EQUIPMENT_COLUMNS.items()
+    })
+    frame.insert(0, 'dataset_id', dataset.pk)
+    # Set explicitly: COPY does not know Django's field defaults
+    frame['outlier_flags'] = 0
+    return frame
+
+
+def copy_rows(frame):
+    """PostgreSQL fast path: stream the frame into the table with COPY"""
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(Equipment._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(name) for name in frame.columns)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+
+def batch_insert_rows(frame):
+    """Portable path: build model instances column-wise and insert in batches"""
+    columns = [frame[name].tolist() for name in frame.columns]
+    equipment_objects = [
+        Equipment(**dict(zip(frame.columns, values)))
+        for values in zip(*columns)
+    ]
+    Equipment.objects.bulk_create(
+        equipment_objects,
+        batch_size=settings.INGEST_BATCH_SIZE
+    )
+
+
+def insert_chunk(dataset, chunk):
+    """Write one parsed chunk of rows for ``dataset``"""
+    frame = equipment_frame(dataset, chunk)
+    if connection.vendor == 'postgresql' and settings.INGEST_USE_COPY:
+        copy_rows(frame)
+    else:
+        batch_insert_rows(frame)
+
+
+def create_dataset(filename, uploaded_by=None, digest=None):
+    """Create the (not yet ready) dataset row, claiming ``digest``.
+
+    Raises DuplicateUpload if another upload of the same file got there
+    first; the savepoint keeps a surrounding transaction usable.
+    """
+    try:
+        with transaction.atomic():
+            return Dataset.objects.create(
+                filename=filename,
+                total_rows=0,
+                uploaded_by=uploaded_by,
+                is_ready=False,
+                content_hash=digest
+            )
+    except IntegrityError:
+        # The holder may still be ingesting, so not only ready datasets
+        existing = Dataset.objects.filter(content_hash=digest).first() if digest else None
+        if existing is None:
+            raise
+        raise DuplicateUpload(existing)
+
+
+def ingest_csv(fileobj, filename, uploaded_by=None, chunksize=None,
+               progress=None, atomic=True, digest=None):
+    """Parse, summarize and store an uploaded CSV file.
+
+    With ``atomic=True`` the whole ingest runs in a single transaction, so
+    a file that fails half way through leaves no partial dataset behind.
+    Background jobs pass ``atomic=False`` instead: every chunk is committed
+    on its own so progress is visible to other connections, the dataset
+    stays hidden from listings until it is complete, and it is deleted
+    again if ingestion fails.
+
+    ``progress`` is called with the dataset and the number of rows stored
+    so far after every chunk. ``digest`` is the file's content hash (None for a forced
+    copy); DuplicateUpload is raised if it is already taken.
+
+    Returns a ``(dataset, summary)`` tuple.
+    """
+    summary = SummaryAccumulator()
+    validator = ChunkValidator()
+    dataset = None
+
+    with transaction.atomic() if atomic else nullcontext():
+        try:
+            for chunk in read_chunks(fileobj, chunksize):
+                validate_columns(chunk.columns)
+                chunk = validator.check(chunk)
+                # A header-only file still yields one empty chunk
+                if validator.failed or chunk.empty:
+                    continue
+                with transaction.atomic(savepoint=False):
+                    if dataset is None:
+                        dataset = create_dataset(filename, uploaded_by, digest)
+                    summary.update(chunk)
+                    insert_chunk(dataset, chunk)
+                if progress:
+                    progress(dataset, summary.total_rows)
+
+            raise_for_validation(validator)
+            if summary.total_rows == 0:
+                raise IngestError('CSV file contains no data rows')
+
+            flag_outliers(dataset.id)
+            build_histograms(dataset.id, summary.ranges())
+            summary.save_to(dataset, is_ready=True)
+
+        except PARSE_ERRORS as e:
+            if not atomic and dataset is not None:
+                dataset.delete()
+            raise IngestError(f'Could not parse CSV: {e}')
+
+        except Exception:
+            if not atomic and dataset is not None:
+                dataset.delete()
+            raise
+
+    return dataset, summary.as_dict()
+
+
+def append_csv(dataset, fileobj, chunksize=None):
+    """Add the rows of a CSV file to an existing dataset.
+
+    The summary is carried forward from the dataset's stored running
+    aggregates and updated with the new rows only. Runs in one
+    transaction with the dataset row locked, so concurrent appends apply
+    one after the other. The dataset's content hash is cleared since it no
+    longer matches a single uploaded file, and its outlier flags and
+    histograms are marked stale until ``refresh_derived`` has run.
+
+    Returns ``(dataset, rows_appended)``.
+    """
+    with transaction.atomic():
+        dataset = Dataset.objects.select_for_update().get(pk=dataset.pk)
+        summary = SummaryAccumulator.from_dataset(dataset)
+        rows_before = summary.total_rows
+        validator = ChunkValidator()
+        try:
+            for chunk in read_chunks(fileobj, chunksize):
+                validate_columns(chunk.columns)
+                chunk = validator.check(chunk)
+                if validator.failed:
+                    continue
+                summary.update(chunk)
+                insert_chunk(dataset, chunk)
+        except PARSE_ERRORS as e:
+            raise IngestError(f'Could not parse CSV: {e}')
+
+        raise_for_validation(validator)
+
+        if summary.total_rows == rows_before:
+            raise IngestError('CSV file contains no data rows')
+
+        # New rows shift the per-type statistics, so every row has to be
+        # re-flagged and the histograms rebuilt. Both read the whole
+        # dataset, so they run after the commit rather than under the lock
+        summary.save_to(dataset, content_hash=None, derived_stale=True)
+        schedule_refresh(dataset)
+
+    return dataset, summary.total_rows - rows_before
+
+
+def refresh_derived(dataset_id):
+    """Background task: rebuild a dataset's outlier flags and histograms.
+
+    Appends that commit meanwhile queue their own rebuild, and one that
+    started earlier may finish later, so this goes round again until the
+    row count it started from is still current. ``derived_stale`` is
+    cleared and ``updated_at`` bumped at the end, which replaces cached
+    responses.
+    """
+    try:
+        while True:
+            total_rows = Dataset.objects.filter(pk=dataset_id).values_list(
+                'total_rows', flat=True
+            ).first()
+            if total_rows is None:
+                return
+            # One transaction, so readers never see half of the new flags
+            with transaction.atomic():
+                flag_outliers(dataset_id)
+            build_histograms(dataset_id)
+
+            with transaction.atomic():
+                dataset = Dataset.objects.select_for_update().filter(pk=dataset_id).first()
+                if dataset is None:
+                    return
+                if dataset.total_rows == total_rows:
+                    dataset.derived_stale = False
+                    dataset.save(update_fields=['derived_stale', 'updated_at'])
+                    break
+    except Exception:
+        logger.exception('Refreshing outliers and histograms of dataset %s failed', dataset_id)
+        return
+    finally:
+        connection.close()
+
+    if settings.REPORT_PRERENDER:
+        from .reports import prerender_report
+
+        prerender_report(dataset_id)
+
+
+def schedule_refresh(dataset):
+    """Queue ``refresh_derived`` for ``dataset`` once the transaction commits"""
+    from .jobs import get_executor
+
+    transaction.on_commit(lambda: get_executor().submit(refresh_derived, dataset.id))
@@ -0,0 +1,227 @@
+"""
+Background ingestion jobs.
+
+Uploads submitted in job mode are saved to ``INGEST_JOB_DIR`` and
+processed by a local thread pool, either inside the web process
+(``INGEST_JOB_RUNNER = 'inprocess'``) or by ``manage.py run_ingest_jobs``
+(``INGEST_JOB_RUNNER = 'command'``). No external broker is involved: the
+``IngestJob`` table is the queue.
+
+Workers record a heartbeat with every chunk. A running job whose heartbeat
+is older than ``INGEST_JOB_STALE_SECONDS`` lost its worker and is failed by
+``fail_stale_jobs``; in-process runners also pick the waiting jobs up again
+when a restarted web process serves its first request.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.signals import request_started
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .ingest import DuplicateUpload, IngestError, ingest_csv
+from .models import Dataset, IngestJob
+from .reports import schedule_prerender
+
+logger = logging.getLogger(__name__)
+
+STALE_JOB_ERROR = 'The worker stopped before the file was ingested; upload it again'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Lazily create the process-wide worker pool"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.INGEST_JOB_WORKERS,
+                thread_name_prefix='ingest'
+            )
+        return _executor
+
+
+def create_job(file, uploaded_by=None, digest=None):
+    """Save an uploaded file to disk and queue a job for it.
+
+    ``digest`` is the upload's content hash, or None to force a new copy.
+    """
+    storage = FileSystemStorage(location=settings.INGEST_JOB_DIR)
+    name = storage.save(os.path.basename(file.name), file)
+    job = IngestJob.objects.create(
+        filename=file.name,
+        file_path=storage.path(name),
+        uploaded_by=uploaded_by,
+        content_hash=digest or ''
+    )
+    if settings.INGEST_JOB_RUNNER == 'inprocess':
+        transaction.on_commit(lambda: get_executor().submit(run_job, job.pk))
+    return job
+
+
+def find_pending_job(digest):
+    """The queued or running job for a file with this hash, if any"""
+    return IngestJob.objects.filter(
+        content_hash=digest,
+        status__in=[IngestJob.STATUS_PENDING, IngestJob.STATUS_RUNNING]
+    ).order_by('created_at').first()
+
+
+def claim_job(job_id):
+    """Atomically move a pending job to running; False if someone else got it"""
+    return IngestJob.objects.filter(
+        pk=job_id,
+        status=IngestJob.STATUS_PENDING
+    ).update(
+        status=IngestJob.STATUS_RUNNING,
+        started_at=timezone.now(),
+        heartbeat_at=timezone.now()
+    ) == 1
+
+
+def run_job(job_id):
+    """Ingest the saved upload of a job, recording progress as it goes"""
+    close_old_connections()
+    try:
+        if not claim_job(job_id):
+            return
+
+        job = IngestJob.objects.get(pk=job_id)
+
+        def report_progress(dataset, rows):
+            IngestJob.objects.filter(pk=job_id).update(
+                rows_processed=rows, dataset=dataset, heartbeat_at=timezone.now()
+            )
+
+        try:
+            with open(job.file_path, 'rb') as fh:
+                dataset, _ = ingest_csv(
+                    fh,
+                    job.filename,
+                    uploaded_by=job.uploaded_by,
+                    progress=report_progress,
+                    atomic=False,
+                    digest=job.content_hash or None
+                )
+        except DuplicateUpload as e:
+            if not e.dataset.is_ready:
+                finish_job(job_id, IngestJob.STATUS_FAILED, error=str(e) + ', still being ingested')
+                return
+            # The same file finished ingesting while this job was queued
+            finish_job(
+                job_id,
+                IngestJob.STATUS_COMPLETED,
+                dataset=e.dataset,
+                rows_processed=e.dataset.total_rows
+            )
+        except IngestError as e:
+            finish_job(job_id, IngestJob.STATUS_FAILED, error=str(e), error_details=e.payload)
+        except Exception as e:
+            logger.exception('Ingest job %s failed', job_id)
+            finish_job(job_id, IngestJob.STATUS_FAILED, error=str(e))
+        else:
+            finish_job(
+                job_id,
+                IngestJob.STATUS_COMPLETED,
+                dataset=dataset,
+                rows_processed=dataset.total_rows
+            )
+            schedule_prerender(dataset)
+        finally:
+            try:
+                os.remove(job.file_path)
+            except OSError:
+                pass
+    finally:
+        connection.close()
+
+
+def finish_job(job_id, status, **fields):
+    IngestJob.objects.filter(pk=job_id).update(
+        status=status,
+        finished_at=timezone.now(),
+        **fields
+    )
+
+
+def pending_job_ids(limit=None):
+    """Oldest-first ids of jobs waiting for a worker"""
+    queryset = IngestJob.objects.filter(
+        status=IngestJob.STATUS_PENDING
+    ).order_by('created_at').values_list('id', flat=True)
+    return list(queryset[:limit] if limit else queryset)
+
+
+def fail_stale_jobs(content_hash=None):
+    """Fail the running jobs whose worker has stopped reporting progress.
+
+    Their partial datasets are deleted, which also frees the file's hash
+    for the next upload. ``content_hash`` limits the check to the jobs of
+    one file. Returns the number of jobs failed.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.INGEST_JOB_STALE_SECONDS)
+    stale = IngestJob.objects.filter(status=IngestJob.STATUS_RUNNING, heartbeat_at__lt=cutoff)
+    if content_hash:
+        stale = stale.filter(content_hash=content_hash)
+    failed = 0
+    for job in stale:
+        with transaction.atomic():
+            # Skip the job if its worker reported in after all
+            if not IngestJob.objects.filter(
+                pk=job.pk,
+                status=IngestJob.STATUS_RUNNING,
+                heartbeat_at=job.heartbeat_at
+            ).update(
+                status=IngestJob.STATUS_FAILED,
+                finished_at=timezone.now(),
+                error=STALE_JOB_ERROR
+            ):
+                continue
+            partial = Dataset.objects.filter(pk=job.dataset_id)
+            if job.content_hash:
+                partial |= Dataset.objects.filter(content_hash=job.content_hash)
+            partial.filter(is_ready=False).delete()
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            pass
+        logger.warning('Ingest job %s went stale and was failed', job.pk)
+        failed += 1
+    return failed
+
+
+def release_hash(digest):
+    """Delete the partial dataset holding ``digest`` unless a job is still ingesting it.
+
+    Such a dataset was left by a job that failed or went stale without
+    cleaning up, and would otherwise turn every later upload of the file
+    away as a duplicate. Returns True if one was deleted.
+    """
+    fail_stale_jobs(content_hash=digest)
+    if find_pending_job(digest) is not None:
+        return False
+    deleted, _ = Dataset.objects.filter(content_hash=digest, is_ready=False).delete()
+    return deleted > 0
+
+
+def recover_jobs(**kwargs):
+    """Fail stale jobs and queue the waiting ones on this process's pool.
+
+    Connected to ``request_started`` for the in-process runner, since the
+    thread pool of a crashed or restarted web process is gone; runs for
+    the first request only.
+    """
+    request_started.disconnect(recover_jobs)
+    try:
+        fail_stale_jobs()
+        for job_id in pending_job_ids():
+            get_executor().submit(run_job, job_id)
+    except Exception:
+        logger.exception('Could not recover ingest jobs')
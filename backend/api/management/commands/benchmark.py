@@ -0,0 +1,206 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from api.synthetic import write_csv
+
+OPERATIONS = ['upload', 'list', 'detail', 'pdf']
+MAX_ROWS = 10_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Time upload, list, detail and PDF requests for synthetic datasets '
+        'through the Django test client, against a throwaway test database. '
+        'Results are written as JSON with a threshold per result; pass '
+        '--baseline to fail when a run exceeds an earlier run\'s thresholds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[1000, 100000],
+            help=f'Dataset sizes to benchmark, 1 to {MAX_ROWS}'
+        )
+        parser.add_argument(
+            '--types', type=int, default=12,
+            help='Number of distinct equipment types in the generated data'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=3, help='Samples per measurement')
+        parser.add_argument(
+            '--operations', nargs='+', choices=OPERATIONS, default=OPERATIONS,
+            help='Requests to time (a dataset is always uploaded once)'
+        )
+        parser.add_argument('--output', default='benchmark_results.json')
+        parser.add_argument(
+            '--baseline',
+            help='Results file from an earlier run whose thresholds this run must stay under'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Slowdown allowed before a result counts as a regression (0.25 = 25%%)'
+        )
+
+    def handle(self, *args, **options):
+        for rows in options['rows']:
+            if not 1 <= rows <= MAX_ROWS:
+                raise CommandError(f'--rows must be between 1 and {MAX_ROWS}')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as fh:
+                baseline = json.load(fh)
+
+        workdir = tempfile.mkdtemp(prefix='benchmark_')
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                REPORT_CACHE_DIR=os.path.join(workdir, 'reports'),
+                REPORT_PRERENDER=False
+            ):
+                results = {}
+                for rows in options['rows']:
+                    results.update(self.run_size(rows, options, workdir))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'database': connection.vendor,
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'rows': options['rows'],
+                'types': options['types'],
+                'seed': options['seed'],
+                'repeat': options['repeat'],
+                'tolerance': options['tolerance'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        for name, result in results.items():
+            line = f'{name:<24} median {result["median_s"] * 1000:10.1f} ms   min {result["min_s"] * 1000:10.1f} ms'
+            if 'rows_per_s' in result:
+                line += f'   {result["rows_per_s"]:,.0f} rows/s'
+            self.stdout.write(line)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+        if baseline:
+            self.check_regressions(results, baseline)
+
+    def run_size(self, rows, options, workdir):
+        path = os.path.join(workdir, f'synthetic_{rows}.csv')
+        write_csv(path, rows, options['types'], options['seed'])
+        client = Client()
+        repeat = options['repeat']
+        operations = options['operations']
+        tolerance = options['tolerance']
+        results = {}
+        uploaded = []
+
+        def upload():
+            with open(path, 'rb') as fh:
+                # force: every sample must ingest, not hit the duplicate check
+                response = client.post(reverse('upload_dataset') + '?force=true', {'file': fh})
+            self.expect(response, 201)
+            uploaded.append(response.json()['dataset_id'])
+
+        if 'upload' in operations:
+            samples = self.measure(upload, repeat)
+            results[f'upload[{rows}]'] = self.result(samples, tolerance, rows=rows)
+        else:
+            upload()
+        dataset_id = uploaded[-1]
+
+        def clear_reports():
+            shutil.rmtree(os.path.join(workdir, 'reports'), ignore_errors=True)
+
+        requests = {
+            'list': lambda: self.fetch(client, reverse('get_datasets')),
+            'detail': lambda: self.fetch(client, reverse('dataset_detail', args=[dataset_id])),
+            'pdf': lambda: self.fetch(client, reverse('generate_pdf', args=[dataset_id])),
+        }
+        for operation, request in requests.items():
+            if operation not in operations:
+                continue
+            # Cold: nothing cached; warm: served from the response or report cache
+            cold = clear_reports if operation == 'pdf' else cache.clear
+            results[f'{operation}_cold[{rows}]'] = self.result(
+                self.measure(request, repeat, before=cold), tolerance
+            )
+            request()
+            results[f'{operation}_warm[{rows}]'] = self.result(
+                self.measure(request, repeat), tolerance
+            )
+        return results
+
+    def fetch(self, client, url):
+        response = client.get(url)
+        self.expect(response, 200)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        response.close()
+
+    def expect(self, response, status):
+        if response.status_code != status:
+            raise CommandError(
+                f'{response.request["PATH_INFO"]} returned {response.status_code}, expected {status}'
+            )
+
+    def measure(self, func, repeat, before=None):
+        samples = []
+        for _ in range(repeat):
+            if before:
+                before()
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+        return samples
+
+    def result(self, samples, tolerance, rows=None):
+        median = statistics.median(samples)
+        result = {
+            'median_s': median,
+            'min_s': min(samples),
+            'samples_s': samples,
+            'threshold_s': median * (1 + tolerance),
+        }
+        if rows:
+            result['rows_per_s'] = rows / median
+        return result
+
+    def check_regressions(self, results, baseline):
+        regressions = []
+        for name, previous in baseline.get('results', {}).items():
+            current = results.get(name)
+            if current and current['median_s'] > previous['threshold_s']:
+                regressions.append(
+                    f'{name}: {current["median_s"] * 1000:.1f} ms > '
+                    f'threshold {previous["threshold_s"] * 1000:.1f} ms'
+                )
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write('No regressions against the baseline')
@@ -0,0 +1,72 @@
+import io
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from api.ingest import insert_chunk
+from api.models import Dataset
+from api.reports import render_report
+from api.synthetic import synthetic_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the PDF report for a synthetic dataset, stored in a throwaway '
+        'test database, and report pages per second and peak Python memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--types', type=int, default=12)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--trace-memory', action='store_true',
+            help='Also measure peak Python allocations with tracemalloc, in a second render'
+        )
+        parser.add_argument(
+            '--max-table-rows', type=int, default=None,
+            help='Cap the report table at this many rows (default: REPORT_MAX_TABLE_ROWS)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        overrides = {}
+        if options['max_table_rows'] is not None:
+            overrides['REPORT_MAX_TABLE_ROWS'] = options['max_table_rows']
+
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**overrides):
+                dataset = Dataset.objects.create(filename='benchmark.csv', total_rows=rows)
+                for chunk in synthetic_chunks(rows, options['types'], options['seed']):
+                    insert_chunk(dataset, chunk)
+
+                started = time.perf_counter()
+                buffer = io.BytesIO()
+                pages = render_report(dataset, buffer)
+                elapsed = time.perf_counter() - started
+
+                # A second render: tracing slows rendering several times over,
+                # so it must not be the one that is timed
+                if options['trace_memory']:
+                    tracemalloc.start()
+                    render_report(dataset, io.BytesIO())
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        message = (
+            f'{rows} rows -> {pages} pages, {buffer.tell() / 1e6:.1f} MB '
+            f'in {elapsed:.2f}s ({pages / elapsed:.1f} pages/s)'
+        )
+        if options['trace_memory']:
+            message += f', peak Python memory {peak / 1e6:.1f} MB'
+        self.stdout.write(message)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.histograms import build_histograms
+from api.models import Dataset
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stored chart histograms, e.g. for datasets stored before they existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dataset_ids', nargs='*', type=int,
+            help='Datasets to rebuild (default: all ready datasets)'
+        )
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.filter(is_ready=True).order_by('id')
+        if options['dataset_ids']:
+            datasets = datasets.filter(id__in=options['dataset_ids'])
+            missing = set(options['dataset_ids']) - set(datasets.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'Unknown datasets: {", ".join(map(str, sorted(missing)))}')
+
+        for dataset in datasets:
+            build_histograms(dataset.id)
+            # Bump updated_at so cached responses for the dataset are replaced
+            dataset.save(update_fields=['updated_at'])
+            self.stdout.write(f'Dataset {dataset.id}: histograms rebuilt')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Dataset
+from api.outliers import flag_outliers
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute per-type outlier flags, e.g. for datasets stored before '
+        'flags existed or after changing OUTLIER_ZSCORE / OUTLIER_IQR_FACTOR'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'dataset_ids', nargs='*', type=int,
+            help='Datasets to re-flag (default: all ready datasets)'
+        )
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.filter(is_ready=True).order_by('id')
+        if options['dataset_ids']:
+            datasets = datasets.filter(id__in=options['dataset_ids'])
+            missing = set(options['dataset_ids']) - set(datasets.values_list('id', flat=True))
+            if missing:
+                raise CommandError(f'Unknown datasets: {", ".join(map(str, sorted(missing)))}')
+
+        for dataset in datasets:
+            flagged = flag_outliers(dataset.id)
+            # Bump updated_at so cached responses for the dataset are replaced
+            dataset.save(update_fields=['updated_at'])
+            self.stdout.write(f'Dataset {dataset.id}: {flagged} of {dataset.total_rows} rows flagged')
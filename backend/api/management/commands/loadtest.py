@@ -0,0 +1,175 @@
+import asyncio
+import json
+import platform
+import ssl
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+# Bytes read at a time
+READ_SIZE = 65536
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test running servers: GET each target URL from a growing number '
+        'of concurrent clients and report throughput, latency percentiles and '
+        'errors per concurrency level. Pass the same endpoint on a WSGI and an '
+        'ASGI deployment (as label=url) to compare how far each one scales. '
+        '--bandwidth makes every client download slowly, as on a poor mobile '
+        'connection; a sync worker stays busy until the part of the response '
+        'that does not fit in the socket buffers has been read.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets', nargs='+',
+            help='URLs to load, optionally labelled: wsgi=http://localhost:8000/api/datasets/'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[1, 10, 50, 200],
+            help='Numbers of concurrent clients to run, one level after the other'
+        )
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per level')
+        parser.add_argument(
+            '--bandwidth', type=float, default=0.0,
+            help='Download speed of each client in KB/s (0 for as fast as possible)'
+        )
+        parser.add_argument('--timeout', type=float, default=30.0, help='Seconds per request')
+        parser.add_argument('--output', default='loadtest_results.json')
+
+    def handle(self, *args, **options):
+        if any(level < 1 for level in options['concurrency']):
+            raise CommandError('--concurrency levels must be at least 1')
+        if options['duration'] <= 0:
+            raise CommandError('--duration must be positive')
+        if options['bandwidth'] < 0:
+            raise CommandError('--bandwidth cannot be negative')
+
+        targets = {}
+        for target in options['targets']:
+            label, url = '', target
+            if not target.startswith(('http://', 'https://')):
+                label, _, url = target.partition('=')
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.hostname:
+                raise CommandError(f'Not an http(s) URL: {url}')
+            targets[label or url] = url
+
+        results = {}
+        for label, url in targets.items():
+            results[label] = {}
+            for level in options['concurrency']:
+                result = asyncio.run(self.run_level(url, level, options))
+                results[label][str(level)] = result
+                latency = (
+                    f'p50 {result["p50_ms"]:8.1f} ms   p99 {result["p99_ms"]:8.1f} ms'
+                    if result['p50_ms'] is not None else 'no successful requests'
+                )
+                self.stdout.write(
+                    f'{label:<12} c={level:<5} {result["requests_per_s"]:9.1f} req/s   '
+                    f'{latency}   errors {result["errors"]}/{result["requests"]}'
+                )
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'targets': targets,
+                'concurrency': options['concurrency'],
+                'duration_s': options['duration'],
+                'bandwidth_kb_s': options['bandwidth'],
+                'timeout_s': options['timeout'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(f'Results written to {options["output"]}')
+
+    async def run_level(self, url, concurrency, options):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        context = ssl.create_default_context() if parts.scheme == 'https' else None
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        request = (
+            f'GET {path} HTTP/1.1\r\n'
+            f'Host: {parts.netloc}\r\n'
+            'Accept: application/json\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('ascii')
+
+        latencies = []
+        statuses = {}
+        failures = {}
+        deadline = time.perf_counter() + options['duration']
+
+        async def client():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    status = await asyncio.wait_for(
+                        self.fetch(parts.hostname, port, context, request, options['bandwidth']),
+                        options['timeout']
+                    )
+                except (OSError, asyncio.TimeoutError, ValueError) as e:
+                    kind = type(e).__name__
+                    failures[kind] = failures.get(kind, 0) + 1
+                    continue
+                statuses[status] = statuses.get(status, 0) + 1
+                if status < 400:
+                    latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        requests = sum(statuses.values()) + sum(failures.values())
+        errors = requests - len(latencies)
+        if latencies:
+            p50, p90, p99 = (float(ms) for ms in np.percentile(latencies, [50, 90, 99]) * 1000)
+            slowest = max(latencies) * 1000
+        else:
+            p50 = p90 = p99 = slowest = None
+        return {
+            'concurrency': concurrency,
+            'requests': requests,
+            'errors': errors,
+            'error_rate': errors / requests if requests else 0.0,
+            'requests_per_s': len(latencies) / elapsed,
+            'p50_ms': p50,
+            'p90_ms': p90,
+            'p99_ms': p99,
+            'max_ms': slowest,
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'failures': failures,
+        }
+
+    @staticmethod
+    async def fetch(host, port, context, request, bandwidth):
+        """Send one request on a new connection and return its status code"""
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        try:
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            # Connection: close, so the body ends with the connection
+            started = time.perf_counter()
+            received = 0
+            while True:
+                chunk = await reader.read(READ_SIZE)
+                if not chunk:
+                    break
+                if bandwidth:
+                    received += len(chunk)
+                    due = started + received / (bandwidth * 1024)
+                    await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        finally:
+            writer.close()
+        try:
+            return int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ValueError(f'Bad status line: {status_line[:80]!r}')
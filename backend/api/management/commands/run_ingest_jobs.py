@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.jobs import fail_stale_jobs, pending_job_ids, run_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued background CSV ingestion jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.INGEST_JOB_WORKERS,
+            help='Number of jobs processed in parallel'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait between checks for new jobs'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Process the jobs that are currently queued and exit'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        self.stdout.write(f'Processing ingest jobs with {workers} worker(s)')
+
+        # Future -> job id of the jobs on the pool; a new job is submitted
+        # as soon as any of them finishes
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as pool:
+            while True:
+                free = workers - len(running)
+                if free:
+                    # Jobs left running by a worker that died, e.g. in an
+                    # earlier run of this command
+                    failed = fail_stale_jobs()
+                    if failed:
+                        self.stdout.write(f'Failed {failed} stale job(s)')
+                    # Submitted jobs may not have been claimed yet
+                    job_ids = [
+                        job_id for job_id in pending_job_ids(limit=workers)
+                        if job_id not in running.values()
+                    ]
+                    for job_id in job_ids[:free]:
+                        running[pool.submit(run_job, job_id)] = job_id
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                # With free workers, look for new jobs again after the poll interval
+                done, _ = wait(
+                    running,
+                    timeout=None if len(running) == workers else options['poll_interval'],
+                    return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    running.pop(future)
+                if done:
+                    self.stdout.write(f'Finished {len(done)} job(s)')
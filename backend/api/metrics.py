@@ -0,0 +1,126 @@
+"""
+Per-request performance metrics in Prometheus text format.
+
+``MetricsMiddleware`` (api/middleware.py) records every request against
+the URL name it resolved to; ``/api/metrics/`` renders what has been
+collected. Metrics live in process memory, so with several worker
+processes each one reports its own share and Prometheus should scrape
+them individually (or sum them).
+"""
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f'{self.name}{_labels(self.labels, label_values)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> [per-bucket counts, sum, count]
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted(
+                (label_values, (list(counts), total, count))
+                for label_values, (counts, total, count) in self._series.items()
+            )
+        for label_values, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.labels, label_values, f'le="{bound:g}"')
+                lines.append(f'{self.name}_bucket{le} {cumulative}')
+            le = _labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{le} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, label_values)} {total:g}')
+            lines.append(f'{self.name}_count{_labels(self.labels, label_values)} {count}')
+        return lines
+
+
+REQUESTS = Counter(
+    'api_requests_total', 'Requests handled, by URL name, method and status',
+    ['view', 'method', 'status']
+)
+REQUEST_DURATION = Histogram(
+    'api_request_duration_seconds', 'Wall time until the response was returned',
+    ['view'], DURATION_BUCKETS
+)
+SQL_QUERIES = Histogram(
+    'api_request_sql_queries', 'SQL queries executed per request',
+    ['view'], QUERY_BUCKETS
+)
+SQL_DURATION = Histogram(
+    'api_request_sql_duration_seconds', 'Time spent in SQL queries per request',
+    ['view'], DURATION_BUCKETS
+)
+RESPONSE_SIZE = Histogram(
+    'api_response_size_bytes', 'Response body size',
+    ['view'], SIZE_BUCKETS
+)
+PEAK_MEMORY = Histogram(
+    'api_request_peak_python_bytes',
+    'Peak traced Python allocations during the request (METRICS_TRACE_MEMORY only)',
+    ['view'], SIZE_BUCKETS
+)
+
+REGISTRY = [REQUESTS, REQUEST_DURATION, SQL_QUERIES, SQL_DURATION, RESPONSE_SIZE, PEAK_MEMORY]
+
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
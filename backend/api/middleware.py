@@ -0,0 +1,174 @@
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+
+class QueryTimer:
+    """``execute_wrapper`` that counts and times the SQL queries it sees"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    """Record wall time, SQL count and time, response size and (optionally)
+    peak Python allocations per request, and report them in a
+    ``Server-Timing`` header.
+
+    Requests that did not resolve to a URL (static files, 404s) get the
+    header but are not recorded. For streaming responses the timings cover
+    the time to the first byte; the size is recorded once the body has
+    been sent.
+
+    Memory tracing (``METRICS_TRACE_MEMORY``) slows every request down and
+    its peaks mix concurrent requests together, so keep it for profiling.
+
+    Under ASGI the middleware runs async. Django's database connections
+    belong to a thread and the async ORM runs its queries on one thread
+    per request, so the query timer is installed on that thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _start_tracing():
+        trace_memory = settings.METRICS_TRACE_MEMORY
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        return trace_memory
+
+    @staticmethod
+    def _wrap_connections(stack, timer):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        trace_memory = self._start_tracing()
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            self._wrap_connections(stack, timer)
+            response = self.get_response(request)
+        return self._record(request, response, timer, started, trace_memory)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        trace_memory = self._start_tracing()
+
+        started = time.perf_counter()
+        stack = ExitStack()
+        await sync_to_async(self._wrap_connections)(stack, timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._record(request, response, timer, started, trace_memory)
+
+    def _record(self, request, response, timer, started, trace_memory):
+        elapsed = time.perf_counter() - started
+
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+
+        timing = [
+            f'app;dur={elapsed * 1000:.1f}',
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+        ]
+        if peak is not None:
+            timing.append(f'mem;desc="peak {peak / 1e6:.1f} MB"')
+        response['Server-Timing'] = ', '.join(timing)
+
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        view = match.view_name
+
+        metrics.REQUESTS.inc(view, request.method, str(response.status_code))
+        metrics.REQUEST_DURATION.observe(elapsed, view)
+        metrics.SQL_QUERIES.observe(timer.count, view)
+        metrics.SQL_DURATION.observe(timer.duration, view)
+        if peak is not None:
+            metrics.PEAK_MEMORY.observe(peak, view)
+
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), view)
+        elif response.has_header('Content-Length'):
+            # e.g. FileResponse; leave its body alone so sendfile still works
+            metrics.RESPONSE_SIZE.observe(int(response['Content-Length']), view)
+        else:
+            measure = self._ameasure_stream if response.is_async else self._measure_stream
+            response.streaming_content = measure(response.streaming_content, view)
+        return response
+
+    @staticmethod
+    def _measure_stream(content, view):
+        size = 0
+        for chunk in content:
+            size += len(chunk)
+            yield chunk
+        metrics.RESPONSE_SIZE.observe(size, view)
+
+    @staticmethod
+    async def _ameasure_stream(content, view):
+        size = 0
+        async for chunk in content:
+            size += len(chunk)
+            yield chunk
+        metrics.RESPONSE_SIZE.observe(size, view)
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that can also run in an async middleware chain.
+
+    WhiteNoise's own middleware is sync only, which would make Django run
+    every ASGI request through a thread just to pass it along.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:17
+
+import json
+
+from django.db import migrations, models
+
+
+def backfill_summary_columns(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.only('id', 'summary_data').iterator():
+        summary = json.loads(dataset.summary_data) if dataset.summary_data else {}
+        dataset.avg_flowrate = summary.get('avg_flowrate') or 0.0
+        dataset.avg_pressure = summary.get('avg_pressure') or 0.0
+        dataset.avg_temperature = summary.get('avg_temperature') or 0.0
+        dataset.equipment_types = summary.get('equipment_types') or {}
+        dataset.save(update_fields=[
+            'avg_flowrate', 'avg_pressure', 'avg_temperature', 'equipment_types'
+        ])
+
+
+def restore_summary_data(apps, schema_editor):
+    Dataset = apps.get_model('api', 'Dataset')
+    for dataset in Dataset.objects.iterator():
+        dataset.summary_data = json.dumps({
+            'avg_flowrate': dataset.avg_flowrate,
+            'avg_pressure': dataset.avg_pressure,
+            'avg_temperature': dataset.avg_temperature,
+            'equipment_types': dataset.equipment_types,
+        })
+        dataset.save(update_fields=['summary_data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_flowrate',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_pressure',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='avg_temperature',
+            field=models.FloatField(db_index=True, default=0.0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='equipment_types',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(backfill_summary_columns, restore_summary_data),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='summary_data',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:38
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Min, Variance
+
+
+COLUMNS = ['flowrate', 'pressure', 'temperature']
+
+
+def backfill_running_stats(apps, schema_editor):
+    # One aggregate pass over existing rows; from here on appends merge
+    # into the stored values instead
+    Dataset = apps.get_model('api', 'Dataset')
+    Equipment = apps.get_model('api', 'Equipment')
+    for dataset in Dataset.objects.only('id').iterator():
+        aggregates = {}
+        for column in COLUMNS:
+            aggregates.update({
+                f'{column}_n': Count(column),
+                f'{column}_mean': Avg(column),
+                f'{column}_var': Variance(column, sample=False),
+                f'{column}_min': Min(column),
+                f'{column}_max': Max(column),
+            })
+        values = Equipment.objects.filter(dataset_id=dataset.id).aggregate(**aggregates)
+
+        running_stats = {}
+        for column in COLUMNS:
+            n = values[f'{column}_n']
+            running_stats[column] = {
+                'n': n,
+                'mean': values[f'{column}_mean'] or 0.0,
+                'm2': (values[f'{column}_var'] or 0.0) * n,
+                'min': values[f'{column}_min'],
+                'max': values[f'{column}_max'],
+            }
+        dataset.running_stats = running_stats
+        dataset.save(update_fields=['running_stats'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='running_stats',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.RunPython(backfill_running_stats, migrations.RunPython.noop),
+    ]
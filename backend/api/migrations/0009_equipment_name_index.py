@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_running_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['equipment_name', 'dataset'], name='equipment_name_dataset_idx'),
+        ),
+    ]
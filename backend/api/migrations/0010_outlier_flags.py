@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_equipment_name_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='outlier_flags',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(condition=models.Q(('outlier_flags__gt', 0)), fields=['dataset', 'id'], name='equipment_outlier_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_outlier_flags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetHistogram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column', models.CharField(max_length=20)),
+                ('equipment_type', models.CharField(blank=True, max_length=100)),
+                ('count', models.IntegerField()),
+                ('low', models.FloatField()),
+                ('high', models.FloatField()),
+                ('fixed_counts', models.JSONField(default=list)),
+                ('quantiles', models.JSONField(default=list)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='histograms', to='api.dataset')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='datasethistogram',
+            constraint=models.UniqueConstraint(fields=('dataset', 'column', 'equipment_type'), name='dataset_histogram_unique'),
+        ),
+    ]
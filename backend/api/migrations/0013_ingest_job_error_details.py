@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_equipment_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestjob',
+            name='error_details',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
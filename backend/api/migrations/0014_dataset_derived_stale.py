@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_ingest_job_error_details'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='derived_stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,26 +1,57 @@
 from django.db import models
 from django.contrib.auth.models import User
-import json
+from django.utils import timezone
 
 
 class Dataset(models.Model):
     """Store uploaded datasets with metadata"""
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # Drives ETag / Last-Modified
     filename = models.CharField(max_length=255)
     total_rows = models.IntegerField()
-    summary_data = models.TextField()  # JSON string of summary statistics
+    # Summary statistics, stored as columns so they can be filtered and sorted in SQL
+    avg_flowrate = models.FloatField(default=0.0, db_index=True)
+    avg_pressure = models.FloatField(default=0.0, db_index=True)
+    avg_temperature = models.FloatField(default=0.0, db_index=True)
+    equipment_types = models.JSONField(default=dict)  # {type: row count}
+    # Mergeable per column aggregates {column: {n, mean, m2, min, max}}, so
+    # appends can update the summary without rescanning stored rows
+    running_stats = models.JSONField(default=dict)
+    is_ready = models.BooleanField(default=True)  # False while a background ingest is running
+    # True from an append until its outlier flags and histograms are rebuilt
+    derived_stale = models.BooleanField(default=False)
+    # SHA-256 of the uploaded file, for de-duplicating re-uploads; NULL for forced copies
+    content_hash = models.CharField(max_length=64, null=True, blank=True, unique=True)
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Keyset pagination of the dataset list
+            models.Index(fields=['-uploaded_at', '-id'], name='dataset_uploaded_idx'),
+        ]
+    
+    SUMMARY_FIELDS = ['avg_flowrate', 'avg_pressure', 'avg_temperature', 'equipment_types']
+    
+    @staticmethod
+    def build_summary(avg_flowrate, avg_pressure, avg_temperature, equipment_types):
+        """Assemble the summary dict from the stored column values"""
+        return {
+            'avg_flowrate': avg_flowrate,
+            'avg_pressure': avg_pressure,
+            'avg_temperature': avg_temperature,
+            'equipment_types': equipment_types or {}
+        }
     
     def set_summary(self, summary_dict):
-        """Store summary as JSON"""
-        self.summary_data = json.dumps(summary_dict)
+        """Store summary statistics in their columns"""
+        for field in self.SUMMARY_FIELDS:
+            if field in summary_dict:
+                setattr(self, field, summary_dict[field])
     
     def get_summary(self):
         """Retrieve summary as dict"""
-        return json.loads(self.summary_data) if self.summary_data else {}
+        return self.build_summary(*(getattr(self, field) for field in self.SUMMARY_FIELDS))
     
     def __str__(self):
         return f"{self.filename} - {self.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
@@ -34,9 +65,93 @@ class Equipment(models.Model):
     flowrate = models.FloatField()
     pressure = models.FloatField()
     temperature = models.FloatField()
+    # Bitmask of per-type z-score / IQR outlier tests the row fails (see api/outliers.py)
+    outlier_flags = models.PositiveSmallIntegerField(default=0)
     
     def __str__(self):
         return f"{self.equipment_name} ({self.equipment_type})"
     
     class Meta:
         verbose_name_plural = "Equipment"
+        indexes = [
+            # Keyset pagination of a dataset's rows
+            models.Index(fields=['dataset', 'id'], name='equipment_dataset_id_idx'),
+            # Per-type aggregation for the stats endpoint, and type-filtered
+            # rows in id order
+            models.Index(fields=['dataset', 'equipment_type', 'id'], name='equipment_type_id_idx'),
+            # Name prefix search and the sort keys of the detail endpoint
+            models.Index(fields=['dataset', 'equipment_name', 'id'], name='equipment_name_id_idx'),
+            models.Index(fields=['dataset', 'flowrate', 'id'], name='equipment_flowrate_idx'),
+            models.Index(fields=['dataset', 'pressure', 'id'], name='equipment_pressure_idx'),
+            models.Index(fields=['dataset', 'temperature', 'id'], name='equipment_temperature_idx'),
+            # One piece of equipment across datasets, for its history
+            models.Index(fields=['equipment_name', 'dataset'], name='equipment_name_dataset_idx'),
+            # A dataset's flagged rows only, for the outliers endpoint
+            models.Index(
+                fields=['dataset', 'id'], name='equipment_outlier_idx',
+                condition=models.Q(outlier_flags__gt=0)
+            ),
+        ]
+
+
+class DatasetHistogram(models.Model):
+    """Fine histograms of one numeric column, for all rows or one type (see api/histograms.py)"""
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='histograms')
+    column = models.CharField(max_length=20)
+    equipment_type = models.CharField(max_length=100, blank=True)  # '' for all rows
+    count = models.IntegerField()
+    # Range of the equal-width bins (the column's overall range, for every type)
+    low = models.FloatField()
+    high = models.FloatField()
+    fixed_counts = models.JSONField(default=list)  # FINE_BINS counts
+    quantiles = models.JSONField(default=list)  # FINE_BINS + 1 equal-frequency bin edges
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dataset', 'column', 'equipment_type'], name='dataset_histogram_unique'
+            ),
+        ]
+
+
+class IngestJob(models.Model):
+    """Track a CSV upload that is being ingested in the background"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)  # Saved upload waiting to be processed
+    content_hash = models.CharField(max_length=64, blank=True)  # Passed on to the dataset
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True)
+    rows_processed = models.BigIntegerField(default=0)
+    dataset = models.ForeignKey(Dataset, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    error = models.TextField(blank=True)
+    # Body of the 400 an upload would have got, e.g. the validation report
+    error_details = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # Last progress report of the worker
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def rows_per_second(self):
+        """Average ingest throughput so far"""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or timezone.now()
+        elapsed = (end - self.started_at).total_seconds()
+        return self.rows_processed / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self):
+        return f"Job {self.pk}: {self.filename} ({self.status})"
@@ -0,0 +1,132 @@
+"""
+Per equipment type outlier flags.
+
+Each Equipment row carries ``outlier_flags``, a bitmask with one bit per
+(method, column) pair:
+
+* ``zscore`` - further than ``OUTLIER_ZSCORE`` standard deviations from
+  its type's mean
+* ``iqr``    - outside ``[Q1 - k * IQR, Q3 + k * IQR]`` of its type, with
+  ``k = OUTLIER_IQR_FACTOR``
+
+The flags depend on every row of a type, so they are set once a
+dataset's rows are all stored (and again after an append): the per-type
+means, standard deviations and quartiles come from grouped queries, and
+the flags are written with one ``UPDATE`` per type that touches only the
+failing rows, without loading rows into Python.
+"""
+from functools import reduce
+from operator import add, or_
+
+from django.conf import settings
+from django.db.models import Avg, Case, F, IntegerField, Q, StdDev, Value, When
+
+from .models import Equipment
+from .stats import STAT_COLUMNS, group_percentiles
+
+
+OUTLIER_METHODS = ['zscore', 'iqr']
+
+
+class OutlierError(ValueError):
+    """Raised for malformed outlier query parameters"""
+
+
+def flag_bit(method, column):
+    return 1 << (OUTLIER_METHODS.index(method) * len(STAT_COLUMNS) + STAT_COLUMNS.index(column))
+
+
+def describe_flags(flags):
+    """Names (``<column>_<method>``) of the bits set in ``flags``"""
+    return [
+        f'{column}_{method}'
+        for method in OUTLIER_METHODS
+        for column in STAT_COLUMNS
+        if flags & flag_bit(method, column)
+    ]
+
+
+def parse_flag_mask(methods=None, columns=None):
+    """Bitmask for comma separated ``methods`` and ``columns`` (default: all)"""
+    def parse(raw, allowed, name):
+        if not raw:
+            return list(allowed)
+        values = [part.strip() for part in raw.split(',') if part.strip()]
+        unknown = [value for value in values if value not in allowed]
+        if unknown:
+            raise OutlierError(
+                f"Unknown {name}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}"
+            )
+        return values
+
+    mask = 0
+    for method in parse(methods, OUTLIER_METHODS, 'methods'):
+        for column in parse(columns, STAT_COLUMNS, 'columns'):
+            mask |= flag_bit(method, column)
+    return mask
+
+
+def _outside(column, low, high):
+    return Q(**{f'{column}__lt': low}) | Q(**{f'{column}__gt': high})
+
+
+def flag_outliers(dataset_id):
+    """Recompute ``outlier_flags`` for every row of a dataset.
+
+    Returns the number of rows with at least one flag.
+    """
+    queryset = Equipment.objects.filter(dataset_id=dataset_id)
+
+    aggregates = {}
+    for column in STAT_COLUMNS:
+        aggregates[f'{column}_mean'] = Avg(column)
+        aggregates[f'{column}_stddev'] = StdDev(column)
+    moments = queryset.values('equipment_type').annotate(**aggregates).order_by()
+    quartiles = {
+        column: group_percentiles(queryset, column, [25, 75])
+        for column in STAT_COLUMNS
+    }
+
+    # Clear the old flags through the partial index, then only write the rows
+    # that fail a test (a small fraction), not every row
+    queryset.filter(outlier_flags__gt=0).update(outlier_flags=0)
+
+    for row in moments:
+        eq_type = row['equipment_type']
+        tests = []
+        for column in STAT_COLUMNS:
+            mean, stddev = row[f'{column}_mean'], row[f'{column}_stddev']
+            if stddev:
+                spread = settings.OUTLIER_ZSCORE * stddev
+                tests.append((
+                    _outside(column, mean - spread, mean + spread), flag_bit('zscore', column)
+                ))
+
+            q = quartiles[column].get(eq_type)
+            if q:
+                spread = settings.OUTLIER_IQR_FACTOR * (q['p75'] - q['p25'])
+                tests.append((
+                    _outside(column, q['p25'] - spread, q['p75'] + spread), flag_bit('iqr', column)
+                ))
+
+        if not tests:
+            continue
+        flags = reduce(add, (
+            Case(When(test, then=Value(bit)), default=Value(0), output_field=IntegerField())
+            for test, bit in tests
+        ))
+        queryset.filter(
+            reduce(or_, (test for test, _ in tests)), equipment_type=eq_type
+        ).update(outlier_flags=flags)
+
+    return queryset.filter(outlier_flags__gt=0).count()
+
+
+def outlier_rows(dataset_id, mask):
+    """Queryset of a dataset's rows with any of the ``mask`` flags set"""
+    queryset = Equipment.objects.filter(dataset_id=dataset_id, outlier_flags__gt=0)
+    if mask != parse_flag_mask():
+        queryset = queryset.annotate(
+            matched_flags=F('outlier_flags').bitand(mask)
+        ).filter(matched_flags__gt=0)
+    return queryset
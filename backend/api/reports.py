@@ -0,0 +1,410 @@
+"""
+PDF report rendering and the on-disk report cache.
+
+Rendered reports are stored under ``REPORT_CACHE_DIR`` with a name built
+from the dataset id, its ``updated_at`` and ``REPORT_VERSION``; bumping
+the version invalidates every cached report after a layout change. The
+cache is capped at ``REPORT_CACHE_MAX_BYTES`` and evicts the least
+recently served reports first (a cache hit refreshes the file's mtime).
+"""
+import glob
+import logging
+import os
+import tempfile
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Dataset
+
+logger = logging.getLogger(__name__)
+
+_render_locks = {}
+_render_locks_guard = threading.Lock()
+
+
+# Page geometry (US letter, points)
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 50
+ROW_HEIGHT = 12
+
+CHART_COLORS = ['#54a0ff', '#ee5a6f', '#feca57']
+PIE_COLORS = ['#667eea', '#54a0ff', '#ee5a6f', '#feca57', '#1dd1a1', '#ff9f43', '#5f27cd', '#c8d6e5']
+MAX_PIE_SLICES = 8
+
+# (header, x position, right aligned) for the equipment table
+EQUIPMENT_TABLE = [
+    ('Equipment Name', MARGIN, False),
+    ('Type', 230, False),
+    ('Flowrate', 420, True),
+    ('Pressure', 490, True),
+    ('Temperature', PAGE_WIDTH - MARGIN, True),
+]
+
+# (header, x position, right aligned) for the per-type statistics table
+TYPE_STATS_TABLE = [
+    ('Type', MARGIN, False),
+    ('Count', 250, True),
+    ('Flowrate avg', 340, True),
+    ('Pressure avg', 430, True),
+    ('Temperature avg', PAGE_WIDTH - MARGIN, True),
+]
+
+
+class ReportWriter:
+    """Lay out a report page by page on a reportlab canvas.
+
+    Rows are drawn as they arrive and every full page is emitted straight
+    away, so the only per-row state is the current line. The canvas still
+    keeps every finished page (compressed) until the document is saved,
+    so memory grows with the page count; ``REPORT_MAX_TABLE_ROWS`` can
+    cap the equipment table for that reason.
+    """
+
+    def __init__(self, fileobj, title):
+        from reportlab.pdfgen import canvas
+
+        self.canvas = canvas.Canvas(
+            fileobj, pagesize=(PAGE_WIDTH, PAGE_HEIGHT), pageCompression=1
+        )
+        self.canvas.setTitle(title)
+        self.pages = 1
+        self.y = PAGE_HEIGHT - MARGIN
+        self.table = None
+
+    def new_page(self):
+        self._footer()
+        self.canvas.showPage()
+        self.pages += 1
+        self.y = PAGE_HEIGHT - MARGIN
+        if self.table:
+            self._table_header()
+
+    def ensure_space(self, height):
+        if self.y - height < MARGIN + 20:
+            self.new_page()
+
+    def heading(self, text, size=14):
+        self.ensure_space(size + 20)
+        self.canvas.setFont('Helvetica-Bold', size)
+        self.canvas.drawString(MARGIN, self.y - size, text)
+        self.y -= size + 12
+
+    def line(self, text, size=10):
+        self.ensure_space(size + 5)
+        self.canvas.setFont('Helvetica', size)
+        self.canvas.drawString(MARGIN, self.y - size, text)
+        self.y -= size + 5
+
+    def drawing(self, drawing, x=MARGIN):
+        from reportlab.graphics import renderPDF
+
+        self.ensure_space(drawing.height)
+        renderPDF.draw(drawing, self.canvas, x, self.y - drawing.height)
+        return drawing.height
+
+    def start_table(self, columns):
+        self.table = columns
+        self.ensure_space(ROW_HEIGHT * 3)
+        self._table_header()
+
+    def end_table(self):
+        self.table = None
+        self.y -= ROW_HEIGHT
+
+    def row(self, values):
+        if self.y - ROW_HEIGHT < MARGIN + 20:
+            self.new_page()
+        c = self.canvas
+        c.setFont('Helvetica', 8)
+        baseline = self.y - 9
+        for (_, x, right), value in zip(self.table, values):
+            if right:
+                c.drawRightString(x, baseline, value)
+            else:
+                c.drawString(x, baseline, value)
+        self.y -= ROW_HEIGHT
+
+    def _table_header(self):
+        c = self.canvas
+        c.setFont('Helvetica-Bold', 9)
+        baseline = self.y - 10
+        for header, x, right in self.table:
+            if right:
+                c.drawRightString(x, baseline, header)
+            else:
+                c.drawString(x, baseline, header)
+        c.line(MARGIN, self.y - 14, PAGE_WIDTH - MARGIN, self.y - 14)
+        self.y -= ROW_HEIGHT + 6
+
+    def _footer(self):
+        self.canvas.setFont('Helvetica', 8)
+        self.canvas.drawRightString(
+            PAGE_WIDTH - MARGIN, MARGIN - 20, f'Page {self.pages}'
+        )
+
+    def save(self):
+        self._footer()
+        self.canvas.save()
+
+
+def averages_chart(summary):
+    """Bar chart of the three averages, as drawn by the desktop app"""
+    from reportlab.graphics.charts.barcharts import VerticalBarChart
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.lib import colors
+
+    drawing = Drawing(240, 200)
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 40, 30, 180, 140
+    chart.data = [(
+        summary.get('avg_flowrate') or 0,
+        summary.get('avg_pressure') or 0,
+        summary.get('avg_temperature') or 0,
+    )]
+    chart.categoryAxis.categoryNames = ['Flowrate', 'Pressure', 'Temperature']
+    chart.valueAxis.valueMin = 0
+    chart.bars.strokeColor = None
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = chart.valueAxis.labels.fontSize = 8
+    for i, color in enumerate(CHART_COLORS):
+        chart.bars[(0, i)].fillColor = colors.HexColor(color)
+    drawing.add(chart)
+    drawing.add(String(120, 185, 'Average Parameter Values', textAnchor='middle',
+                       fontName='Helvetica-Bold', fontSize=10))
+    return drawing
+
+
+def type_distribution_chart(type_counts):
+    """Pie chart of equipment types; the smallest are folded into Other"""
+    from reportlab.graphics.charts.piecharts import Pie
+    from reportlab.graphics.shapes import Drawing, String
+    from reportlab.lib import colors
+
+    items = sorted(type_counts.items(), key=lambda item: -item[1])
+    if len(items) > MAX_PIE_SLICES:
+        other = sum(count for _, count in items[MAX_PIE_SLICES - 1:])
+        items = items[:MAX_PIE_SLICES - 1] + [('Other', other)]
+
+    drawing = Drawing(260, 200)
+    drawing.add(String(130, 185, 'Equipment Type Distribution', textAnchor='middle',
+                       fontName='Helvetica-Bold', fontSize=10))
+    if not items:
+        return drawing
+
+    pie = Pie()
+    pie.x, pie.y, pie.width, pie.height = 70, 30, 130, 130
+    pie.data = [count for _, count in items]
+    pie.labels = [str(name)[:18] for name, _ in items]
+    pie.slices.fontName = 'Helvetica'
+    pie.slices.fontSize = 6
+    pie.slices.strokeWidth = 0.5
+    for i in range(len(items)):
+        pie.slices[i].fillColor = colors.HexColor(PIE_COLORS[i % len(PIE_COLORS)])
+    drawing.add(pie)
+    return drawing
+
+
+def _number(value):
+    return '' if value is None else f'{value:.2f}'
+
+
+def render_report(dataset, fileobj):
+    """Draw the full PDF report for ``dataset`` into a binary file object.
+
+    Returns the number of pages written.
+    """
+    from .models import Equipment
+    from .stats import grouped_stats
+
+    writer = ReportWriter(fileobj, f'Equipment Report: {dataset.filename}')
+    summary = dataset.get_summary()
+    limit = settings.REPORT_MAX_TABLE_ROWS
+    truncated = 0 < limit < dataset.total_rows
+    truncation_note = [
+        f'The equipment table lists only the first {limit} of {dataset.total_rows} rows '
+        '(REPORT_MAX_TABLE_ROWS).',
+        'Use the rows or export download for all of them.',
+    ]
+
+    # Title and meta
+    writer.heading(f'Equipment Report: {dataset.filename}', size=16)
+    writer.line(f'Total Rows: {dataset.total_rows}', size=12)
+    writer.line(f"Uploaded: {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M')}", size=12)
+    if truncated:
+        for text in truncation_note:
+            writer.line(text, size=9)
+    writer.y -= 10
+
+    # Summary
+    writer.heading('Summary Statistics')
+    writer.line(f"Average Flowrate: {summary.get('avg_flowrate', 0):.2f}")
+    writer.line(f"Average Pressure: {summary.get('avg_pressure', 0):.2f}")
+    writer.line(f"Average Temperature: {summary.get('avg_temperature', 0):.2f}")
+    writer.y -= 10
+
+    # Charts side by side
+    height = writer.drawing(averages_chart(summary))
+    writer.drawing(type_distribution_chart(summary.get('equipment_types', {})), x=MARGIN + 250)
+    writer.y -= height + 10
+
+    # Per-type statistics, aggregated in the database
+    writer.heading('Statistics by Equipment Type')
+    writer.start_table(TYPE_STATS_TABLE)
+    for group in grouped_stats(dataset.id):
+        writer.row([
+            str(group['equipment_type'])[:40],
+            str(group['count']),
+            _number(group['flowrate']['mean']),
+            _number(group['pressure']['mean']),
+            _number(group['temperature']['mean']),
+        ])
+    writer.end_table()
+
+    # Equipment table, streamed from a server-side cursor
+    writer.heading('Equipment')
+    if truncated:
+        for text in truncation_note:
+            writer.line(text, size=9)
+    writer.start_table(EQUIPMENT_TABLE)
+    rows = Equipment.objects.filter(dataset_id=dataset.id).order_by('id').values_list(
+        'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature'
+    )
+    if limit:
+        rows = rows[:limit]
+    for name, eq_type, flowrate, pressure, temperature in rows.iterator(
+        chunk_size=settings.REPORT_ROW_CHUNK_SIZE
+    ):
+        writer.row([
+            str(name)[:36],
+            str(eq_type)[:30],
+            _number(flowrate),
+            _number(pressure),
+            _number(temperature),
+        ])
+    writer.end_table()
+
+    writer.save()
+    return writer.pages
+
+
+def report_path(dataset):
+    """Cache location of the current report for ``dataset``"""
+    revision = int(dataset.updated_at.timestamp() * 1000)
+    name = f'report_{dataset.id}_{revision}_v{settings.REPORT_VERSION}.pdf'
+    return os.path.join(settings.REPORT_CACHE_DIR, name)
+
+
+def _lock_for(path):
+    with _render_locks_guard:
+        return _render_locks.setdefault(path, threading.Lock())
+
+
+def get_report(dataset):
+    """Return the path of an up to date rendered report, rendering on a miss"""
+    path = report_path(dataset)
+    if os.path.exists(path):
+        _touch(path)
+        return path
+
+    # One render per report at a time; concurrent requests wait for it
+    with _lock_for(path):
+        if os.path.exists(path):
+            _touch(path)
+            return path
+
+        os.makedirs(settings.REPORT_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=settings.REPORT_CACHE_DIR, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                render_report(dataset, fh)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            with _render_locks_guard:
+                _render_locks.pop(path, None)
+
+    _remove_stale_reports(dataset, keep=path)
+    enforce_cache_limit(keep=path)
+    return path
+
+
+def open_report(dataset):
+    """Open the cached report for reading"""
+    try:
+        return open(get_report(dataset), 'rb')
+    except FileNotFoundError:
+        # Evicted between lookup and open; render it again
+        return open(get_report(dataset), 'rb')
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _remove_stale_reports(dataset, keep):
+    """Drop reports of older revisions or versions of the same dataset"""
+    pattern = os.path.join(settings.REPORT_CACHE_DIR, f'report_{dataset.id}_*.pdf')
+    for path in glob.glob(pattern):
+        if path != keep:
+            _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def enforce_cache_limit(keep=None):
+    """Evict least recently used reports until the cache fits its size cap.
+
+    ``keep`` (the report about to be served) is never evicted.
+    """
+    entries = []
+    for path in glob.glob(os.path.join(settings.REPORT_CACHE_DIR, 'report_*.pdf')):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= settings.REPORT_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        _remove(path)
+        total -= size
+
+
+def prerender_report(dataset_id):
+    """Background task: render a dataset's report so the first download is instant"""
+    try:
+        dataset = Dataset.objects.get(id=dataset_id)
+        get_report(dataset)
+    except Dataset.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception('Pre-rendering report for dataset %s failed', dataset_id)
+    finally:
+        connection.close()
+
+
+def schedule_prerender(dataset):
+    """Queue a background render of ``dataset``'s report once it is committed"""
+    if not settings.REPORT_PRERENDER:
+        return
+    from .jobs import get_executor
+
+    transaction.on_commit(lambda: get_executor().submit(prerender_report, dataset.id))
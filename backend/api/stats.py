@@ -0,0 +1,168 @@
+"""
+Grouped statistics computed in the database.
+
+Per-type aggregates come from a single ``values().annotate()`` query.
+Percentiles use ``ROW_NUMBER()``/``COUNT()`` window functions so that
+only the rows sitting at the requested ranks are sent back, which works
+the same way on SQLite and PostgreSQL. ``agrouped_stats`` runs the same
+queries through Django's async ORM.
+"""
+import math
+
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Q, StdDev, Value
+from django.db.models.expressions import Window
+from django.db.models.functions import Cast, Ceil, Floor, RowNumber
+
+from .models import Equipment
+
+
+STAT_COLUMNS = ['flowrate', 'pressure', 'temperature']
+
+DEFAULT_PERCENTILES = [25, 50, 75]
+
+MAX_PERCENTILES = 10
+
+
+class StatsError(ValueError):
+    """Raised for malformed statistics parameters"""
+
+
+def parse_percentiles(raw):
+    """Parse a comma separated ``percentiles`` parameter"""
+    if not raw:
+        return list(DEFAULT_PERCENTILES)
+    try:
+        values = sorted({float(part) for part in raw.split(',') if part.strip()})
+    except ValueError:
+        raise StatsError('percentiles must be numbers between 0 and 100')
+    # NaN passes any range comparison, so check finiteness first
+    if not values or any(not math.isfinite(p) or p < 0 or p > 100 for p in values):
+        raise StatsError('percentiles must be numbers between 0 and 100')
+    if len(values) > MAX_PERCENTILES:
+        raise StatsError(f'At most {MAX_PERCENTILES} percentiles can be requested')
+    return [int(p) if p.is_integer() else p for p in values]
+
+
+def percentile_key(p):
+    return f'p{p}'.replace('.', '_')
+
+
+def rank_position(size, p):
+    """0-based position of percentile ``p`` among ``size`` sorted values"""
+    return (size - 1) * (p / 100.0)
+
+
+def rank_position_sql(size, p):
+    """``rank_position`` as a SQL expression over the ``size`` expression.
+
+    Both operands are cast to double precision: PostgreSQL would otherwise
+    multiply exactly in NUMERIC, and land on an integer where the Python
+    float lands just above or below it.
+    """
+    return (Cast(size, FloatField()) - 1) * Cast(Value(p / 100.0), FloatField())
+
+
+def percentile_query(queryset, column, percentiles):
+    """``(equipment_type, row_number, group_size, value)`` of the rows at the
+    ranks that ``percentiles`` interpolate between"""
+    partition = [F('equipment_type')]
+    ranked = queryset.annotate(
+        row_number=Window(RowNumber(), partition_by=partition, order_by=F(column).asc()),
+        group_size=Window(Count('id'), partition_by=partition),
+    )
+
+    wanted = Q()
+    for p in percentiles:
+        position = rank_position_sql(F('group_size'), p)
+        wanted |= Q(row_number=Floor(position) + 1) | Q(row_number=Ceil(position) + 1)
+
+    return ranked.filter(wanted).values_list(
+        'equipment_type', 'row_number', 'group_size', column
+    )
+
+
+def interpolate_percentiles(rows, percentiles):
+    """``{equipment_type: {pXX: value}}`` from the rows of ``percentile_query``"""
+    values = {}
+    sizes = {}
+    for eq_type, row_number, size, value in rows:
+        values.setdefault(eq_type, {})[row_number] = value
+        sizes[eq_type] = size
+
+    result = {}
+    for eq_type, ranks in values.items():
+        result[eq_type] = {}
+        for p in percentiles:
+            position = rank_position(sizes[eq_type], p)
+            low, high = math.floor(position), math.ceil(position)
+            # Should the database still round a position to the other side
+            # of an integer, only one of the two rows comes back; the
+            # interpolation weight is then ~0 or ~1, so either row will do
+            lower = ranks.get(low + 1, ranks.get(high + 1))
+            upper = ranks.get(high + 1, lower)
+            result[eq_type][percentile_key(p)] = lower + (upper - lower) * (position - low)
+    return result
+
+
+def group_percentiles(queryset, column, percentiles):
+    """Return ``{equipment_type: {pXX: value}}`` for one column.
+
+    Uses linear interpolation between the two closest ranks, matching
+    ``numpy.percentile``'s default.
+    """
+    return interpolate_percentiles(percentile_query(queryset, column, percentiles), percentiles)
+
+
+def stats_query(queryset):
+    """Per type count, mean, min, max and stddev of every column"""
+    annotations = {'count': Count('id')}
+    for column in STAT_COLUMNS:
+        annotations[f'{column}_mean'] = Avg(column)
+        annotations[f'{column}_min'] = Min(column)
+        annotations[f'{column}_max'] = Max(column)
+        # Population stddev: the sample variant errors on single-row groups in SQLite
+        annotations[f'{column}_stddev'] = StdDev(column)
+    return queryset.values('equipment_type').annotate(**annotations).order_by('equipment_type')
+
+
+def build_groups(rows, column_percentiles):
+    groups = []
+    for row in rows:
+        eq_type = row['equipment_type']
+        group = {'equipment_type': eq_type, 'count': row['count']}
+        for column in STAT_COLUMNS:
+            group[column] = {
+                'mean': row[f'{column}_mean'],
+                'min': row[f'{column}_min'],
+                'max': row[f'{column}_max'],
+                'stddev': row[f'{column}_stddev'],
+                **column_percentiles[column].get(eq_type, {})
+            }
+        groups.append(group)
+    return groups
+
+
+def grouped_stats(dataset_id, percentiles=None):
+    """Per equipment type count, mean, min, max, stddev and percentiles"""
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    queryset = Equipment.objects.filter(dataset_id=dataset_id)
+
+    rows = stats_query(queryset)
+    column_percentiles = {
+        column: group_percentiles(queryset, column, percentiles)
+        for column in STAT_COLUMNS
+    }
+    return build_groups(rows, column_percentiles)
+
+
+async def agrouped_stats(dataset_id, percentiles=None):
+    """Async ``grouped_stats``"""
+    percentiles = percentiles or DEFAULT_PERCENTILES
+    queryset = Equipment.objects.filter(dataset_id=dataset_id)
+
+    rows = [row async for row in stats_query(queryset)]
+    column_percentiles = {}
+    for column in STAT_COLUMNS:
+        ranked = [row async for row in percentile_query(queryset, column, percentiles)]
+        column_percentiles[column] = interpolate_percentiles(ranked, percentiles)
+    return build_groups(rows, column_percentiles)
@@ -0,0 +1,87 @@
+"""
+Streamed serialization of a dataset's equipment rows.
+
+Rows are read with ``values_list().iterator()`` (a server-side cursor on
+PostgreSQL) and encoded one chunk at a time, so the first bytes go out
+before the last rows are read and memory use does not grow with the
+dataset.
+
+* ``json``   - the detail response shape with every row in ``equipment``
+* ``ndjson`` - one JSON object per row and line
+* ``csv``    - header line plus one line per row
+
+JSON is encoded with orjson when it is installed and the standard
+library otherwise.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Equipment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+STREAM_FORMATS = {
+    'json': ('application/json', 'json'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def dumps(value):
+    """Encode ``value`` as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        # Z for UTC, as DRF writes datetimes in the paginated responses
+        return orjson.dumps(value, option=orjson.OPT_UTC_Z)
+    return json.dumps(value, cls=JSONEncoder, separators=(',', ':')).encode('utf-8')
+
+
+def iter_row_chunks(dataset_id, fields, chunk_size=None):
+    """Yield lists of up to ``chunk_size`` row tuples, in id order"""
+    chunk_size = chunk_size or settings.STREAM_CHUNK_SIZE
+    rows = Equipment.objects.filter(dataset_id=dataset_id).order_by('id').values_list(
+        *fields
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def iter_json(header, dataset_id, fields, chunk_size=None):
+    """``header`` fields followed by an ``equipment`` array of row objects"""
+    # Everything up to the opening bracket of the array
+    yield dumps(header)[:-1] + (b',' if header else b'') + b'"equipment":['
+    first = True
+    for chunk in iter_row_chunks(dataset_id, fields, chunk_size):
+        # Encode the chunk as one array and drop its brackets
+        body = dumps([dict(zip(fields, row)) for row in chunk])[1:-1]
+        yield body if first else b',' + body
+        first = False
+    yield b']}'
+
+
+def iter_ndjson(dataset_id, fields, chunk_size=None):
+    for chunk in iter_row_chunks(dataset_id, fields, chunk_size):
+        yield b''.join(dumps(dict(zip(fields, row))) + b'\n' for row in chunk)
+
+
+def iter_csv(dataset_id, fields, chunk_size=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(fields)
+    yield buffer.getvalue().encode('utf-8')
+    for chunk in iter_row_chunks(dataset_id, fields, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
@@ -0,0 +1,41 @@
+"""
+Deterministic synthetic equipment data for benchmarks.
+
+The same ``rows``, ``types`` and ``seed`` always produce the same rows,
+whatever chunk size the caller consumes them in, so timings taken on
+different machines or commits are comparable.
+"""
+import numpy as np
+import pandas as pd
+
+# Rows drawn from the generator per step; fixed so output never depends
+# on how the caller batches its reads
+GENERATOR_BLOCK = 50000
+
+
+def equipment_types(count):
+    return np.array([f'Type-{i}' for i in range(count)])
+
+
+def synthetic_chunks(rows, types=12, seed=0):
+    """Yield DataFrames with the CSV upload columns, ``GENERATOR_BLOCK`` rows each"""
+    rng = np.random.default_rng(seed)
+    names = equipment_types(types)
+    for start in range(0, rows, GENERATOR_BLOCK):
+        size = min(GENERATOR_BLOCK, rows - start)
+        yield pd.DataFrame({
+            'Equipment Name': [f'EQ-{i}' for i in range(start, start + size)],
+            'Type': rng.choice(names, size),
+            # Clipped so rows always pass upload validation (no negative readings)
+            'Flowrate': rng.normal(200, 50, size).clip(0).round(3),
+            'Pressure': rng.normal(10, 3, size).clip(0).round(3),
+            'Temperature': rng.normal(100, 25, size).round(3),
+        })
+
+
+def write_csv(path, rows, types=12, seed=0):
+    """Write a synthetic CSV upload to ``path``; returns its size in bytes"""
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        for i, chunk in enumerate(synthetic_chunks(rows, types, seed)):
+            chunk.to_csv(fh, index=False, header=(i == 0))
+        return fh.tell()
@@ -0,0 +1,53 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import Dataset, Equipment
+
+
+class AsyncReadViewTests(TestCase):
+    """The /api/async/ variants against their DRF counterparts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(
+            filename='plant.csv', total_rows=3, equipment_types={'Pump': 2, 'Valve': 1}
+        )
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=name, equipment_type=eq_type,
+                      flowrate=flowrate, pressure=5.0, temperature=80.0)
+            for name, eq_type, flowrate in [('P1', 'Pump', 10.0), ('P2', 'Pump', 12.0), ('V1', 'Valve', 3.0)]
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_same_body_and_etag(self):
+        for path in [
+            'datasets/?limit=1',
+            f'datasets/{self.dataset.id}/?ordering=-flowrate&limit=2',
+            f'datasets/{self.dataset.id}/stats/?percentiles=10,90',
+        ]:
+            with self.subTest(path=path):
+                sync = await self.async_client.get(f'/api/{path}')
+                # Twice: the second response comes from the cache
+                for _ in range(2):
+                    response = await self.async_client.get(f'/api/async/{path}')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.content, sync.content)
+                    self.assertEqual(response['ETag'], sync['ETag'])
+                    self.assertEqual(response['Last-Modified'], sync['Last-Modified'])
+
+    async def test_etag_is_interchangeable(self):
+        sync = await self.async_client.get(f'/api/datasets/{self.dataset.id}/')
+        response = await self.async_client.get(
+            f'/api/async/datasets/{self.dataset.id}/', headers={'If-None-Match': sync['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_errors(self):
+        response = await self.async_client.get('/api/async/datasets/999999/')
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get('/api/async/datasets/?limit=x')
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post('/api/async/datasets/')
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,37 @@
+import io
+
+import numpy as np
+from django.test import TestCase
+
+from api.models import Dataset, Equipment
+
+
+class NpzExportTests(TestCase):
+    """The npz export loads without pickle and keeps names of any length"""
+
+    NAMES = ['P1', 'Pompe à chaleur n°2', 'V' * 200, '', '冷却塔']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=len(cls.NAMES))
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=name, equipment_type=eq_type,
+                      flowrate=i, pressure=5.0, temperature=80.0)
+            for i, (name, eq_type) in enumerate(zip(cls.NAMES, ['Pump', 'Pump', 'Valve', 'Pump', 'Tower']))
+        ])
+
+    def test_round_trip(self):
+        with self.settings(EXPORT_CHUNK_SIZE=2):
+            response = self.client.get(f'/api/datasets/{self.dataset.id}/export/')
+        self.assertEqual(response.status_code, 200)
+
+        with np.load(io.BytesIO(response.content)) as data:
+            offsets = data['equipment_name_offsets']
+            name_data = data['equipment_name_data'].tobytes()
+            names = [name_data[a:b].decode('utf-8') for a, b in zip(offsets[:-1], offsets[1:])]
+            self.assertEqual(names, self.NAMES)
+            self.assertEqual(data['equipment_name_data'].dtype, np.uint8)
+            categories = data['equipment_type_categories'].tolist()
+            types = [categories[code] for code in data['equipment_type_codes']]
+            self.assertEqual(types, ['Pump', 'Pump', 'Valve', 'Pump', 'Tower'])
+            self.assertEqual(data['flowrate'].tolist(), [0.0, 1.0, 2.0, 3.0, 4.0])
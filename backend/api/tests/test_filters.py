@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Dataset, Equipment
+
+
+class DatasetListFilterTests(TestCase):
+    """Range filters and ordering of ``GET /api/datasets/``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # (filename, total_rows, avg_flowrate); total_rows ties so the id decides
+        specs = [('a.csv', 10, 1.0), ('b.csv', 20, 2.0), ('c.csv', 10, 3.0),
+                 ('d.csv', 20, 4.0), ('e.csv', 30, 5.0)]
+        cls.datasets = [
+            Dataset.objects.create(filename=name, total_rows=rows, avg_flowrate=flowrate)
+            for name, rows, flowrate in specs
+        ]
+        Dataset.objects.create(filename='pending.csv', total_rows=10, is_ready=False)
+        # One day apart, oldest first
+        start = timezone.now() - timedelta(days=10)
+        for day, dataset in enumerate(cls.datasets):
+            Dataset.objects.filter(id=dataset.id).update(uploaded_at=start + timedelta(days=day))
+
+    def setUp(self):
+        cache.clear()
+
+    def names(self, **params):
+        response = self.client.get('/api/datasets/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['filename'] for row in response.json()]
+
+    def test_range_filters(self):
+        self.assertEqual(self.names(avg_flowrate__gt='2', ordering='filename'),
+                         ['c.csv', 'd.csv', 'e.csv'])
+        self.assertEqual(self.names(avg_flowrate__gte='2', avg_flowrate__lt='4', ordering='filename'),
+                         ['b.csv', 'c.csv'])
+        self.assertEqual(self.names(total_rows__lte='10', ordering='filename'), ['a.csv', 'c.csv'])
+
+    def test_date_filter(self):
+        third = Dataset.objects.get(filename='c.csv').uploaded_at
+        self.assertEqual(self.names(uploaded_at__gte=third.isoformat()), ['e.csv', 'd.csv', 'c.csv'])
+
+    def test_empty_value_is_ignored(self):
+        self.assertEqual(len(self.names(avg_flowrate__gt='')), 5)
+
+    def test_default_ordering(self):
+        self.assertEqual(self.names(), ['e.csv', 'd.csv', 'c.csv', 'b.csv', 'a.csv'])
+
+    def test_ordering_ties_broken_by_id(self):
+        a, b, c, d, e = self.datasets
+        response = self.client.get('/api/datasets/', {'ordering': 'total_rows', 'fields': 'id'})
+        self.assertEqual([row['id'] for row in response.json()], [a.id, c.id, b.id, d.id, e.id])
+        # The tie-breaker follows the direction of the last key
+        response = self.client.get('/api/datasets/', {'ordering': '-total_rows', 'fields': 'id'})
+        self.assertEqual([row['id'] for row in response.json()], [e.id, d.id, b.id, c.id, a.id])
+
+    def test_ordering_on_several_keys(self):
+        self.assertEqual(self.names(ordering='total_rows,-avg_flowrate'),
+                         ['c.csv', 'a.csv', 'd.csv', 'b.csv', 'e.csv'])
+
+    def test_invalid_parameters(self):
+        for params in [
+            {'avg_flowrate__gt': 'fast'},
+            {'total_rows__lt': '1.5'},
+            {'uploaded_at__gte': 'yesterday'},
+            {'ordering': 'content_hash'},
+            {'ordering': 'filename,-filename'},
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get('/api/datasets/', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+
+class EquipmentFilterTests(TestCase):
+    """Row filters of ``GET /api/datasets/<id>/``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=6)
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=name, equipment_type=kind,
+                      flowrate=flowrate, pressure=5.0, temperature=80.0)
+            for name, kind, flowrate in [
+                ('P1', 'Pump', 10.0), ('P2', 'Pump', 20.0), ('V1', 'Valve', 10.0),
+                ('V2', 'Valve', 30.0), ('R1', 'Reactor', 20.0), ('H1', 'Heat Exchanger', 40.0),
+            ]
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(f'/api/datasets/{self.dataset.id}/', params)
+
+    def names(self, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200)
+        return [row['equipment_name'] for row in response.json()['equipment']]
+
+    def test_in_filter(self):
+        self.assertEqual(self.names(equipment_type='Pump,Valve'), ['P1', 'P2', 'V1', 'V2'])
+        self.assertEqual(self.names(equipment_type=' Reactor , Heat Exchanger'), ['R1', 'H1'])
+        data = self.get(equipment_type='Pump,Valve').json()
+        self.assertEqual(data['matching_rows'], 4)
+        self.assertEqual(data['matching_types'], {'Pump': 2, 'Valve': 2})
+
+    def test_in_and_range_filters_combine(self):
+        self.assertEqual(self.names(equipment_type='Pump,Valve', flowrate__gt='15'), ['P2', 'V2'])
+
+    def test_ordering_ties_broken_by_id(self):
+        self.assertEqual(self.names(ordering='flowrate'), ['P1', 'V1', 'P2', 'R1', 'V2', 'H1'])
+        self.assertEqual(self.names(ordering='-flowrate'), ['H1', 'V2', 'R1', 'P2', 'V1', 'P1'])
+
+    def test_invalid_parameters(self):
+        for params in [
+            {'equipment_type': ' , '},
+            {'flowrate__gte': 'abc'},
+            {'ordering': 'outlier_flags'},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params).status_code, 400)
@@ -0,0 +1,112 @@
+import numpy as np
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.histograms import FINE_BINS, allowed_bins, build_histograms
+from api.models import Dataset, Equipment
+
+
+class HistogramTests(TestCase):
+    """Histograms re-binned from the stored FINE_BINS, against NumPy"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = np.random.default_rng(0)
+        cls.types = rng.choice(['Pump', 'Valve', 'Reactor'], size=500)
+        cls.flowrate = rng.lognormal(2.0, 0.8, size=500).round(3)
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=500)
+        # Temperature is the same everywhere: a zero-width range
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=f'E{i}', equipment_type=eq_type,
+                      flowrate=flowrate, pressure=float(i % 7), temperature=80.0)
+            for i, (eq_type, flowrate) in enumerate(zip(cls.types, cls.flowrate))
+        ])
+        # Small chunks, so the sorted stream is binned in many pieces
+        with override_settings(EXPORT_CHUNK_SIZE=64):
+            build_histograms(cls.dataset.id)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, **params):
+        return self.client.get(f'/api/datasets/{self.dataset.id}/histograms/', params)
+
+    def histograms(self, **params):
+        response = self.get(**params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['histograms']
+
+    def assertMatchesNumpy(self, histogram, values, bins):
+        self.assertEqual(histogram['count'], len(values))
+        fixed = histogram['fixed']
+        self.assertEqual(len(fixed['counts']), bins)
+        self.assertEqual(len(fixed['edges']), bins + 1)
+        expected, _ = np.histogram(values, bins=fixed['edges'])
+        self.assertEqual(fixed['counts'], expected.tolist())
+
+        quantile = histogram['quantile']
+        np.testing.assert_allclose(
+            quantile['edges'], np.quantile(values, np.linspace(0, 1, bins + 1))
+        )
+        self.assertEqual(sum(quantile['counts']), len(values))
+
+    def test_rebinned_from_fine_bins(self):
+        for bins in [1, 8, 24, 60, FINE_BINS]:
+            with self.subTest(bins=bins):
+                flowrate = self.histograms(bins=bins, columns='flowrate')['flowrate']
+                self.assertMatchesNumpy(flowrate['all'], self.flowrate, bins)
+                self.assertEqual(flowrate['all']['fixed']['edges'][0], self.flowrate.min())
+                self.assertAlmostEqual(flowrate['all']['fixed']['edges'][-1], self.flowrate.max())
+                for eq_type in ['Pump', 'Valve', 'Reactor']:
+                    values = self.flowrate[self.types == eq_type]
+                    self.assertMatchesNumpy(flowrate['by_type'][eq_type], values, bins)
+                    # Every type shares the overall edges, so the bars stack
+                    self.assertEqual(flowrate['by_type'][eq_type]['fixed']['edges'],
+                                     flowrate['all']['fixed']['edges'])
+
+    def test_default_bins_and_columns(self):
+        response = self.get(by_type='false')
+        self.assertEqual(response.json()['bins'], 24)
+        histograms = response.json()['histograms']
+        self.assertEqual(set(histograms), {'flowrate', 'pressure', 'temperature'})
+        self.assertNotIn('by_type', histograms['pressure'])
+
+    def test_constant_column(self):
+        temperature = self.histograms(bins=24, columns='temperature')['temperature']['all']
+        # Spread over value +- 0.5, as numpy.histogram does
+        edges = temperature['fixed']['edges']
+        self.assertEqual((edges[0], edges[-1]), (79.5, 80.5))
+        self.assertEqual(sum(temperature['fixed']['counts']), 500)
+        self.assertEqual(max(temperature['fixed']['counts']), 500)
+        self.assertEqual(temperature['quantile']['edges'], [80.0] * 25)
+        self.assertEqual(sum(temperature['quantile']['counts']), 500)
+
+    def test_bins_must_divide_fine_bins(self):
+        self.assertEqual(len(allowed_bins()), 20)
+        for bins in ['7', '0', '-24', '480', 'abc', '2.5']:
+            with self.subTest(bins=bins):
+                response = self.get(bins=bins)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(f'divide {FINE_BINS}', response.json()['error'])
+
+    def test_unknown_column(self):
+        response = self.get(columns='flowrate,outlier_flags')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('outlier_flags', response.json()['error'])
+
+
+class SingleRowHistogramTests(TestCase):
+    """A dataset of one row: every quantile is that value"""
+
+    def test_single_row(self):
+        dataset = Dataset.objects.create(filename='one.csv', total_rows=1)
+        Equipment.objects.create(dataset=dataset, equipment_name='P1', equipment_type='Pump',
+                                 flowrate=3.0, pressure=2.0, temperature=1.0)
+        build_histograms(dataset.id)
+        response = self.client.get(f'/api/datasets/{dataset.id}/histograms/', {'bins': 12})
+        flowrate = response.json()['histograms']['flowrate']
+        for histogram in [flowrate['all'], flowrate['by_type']['Pump']]:
+            self.assertEqual(histogram['count'], 1)
+            self.assertEqual(sum(histogram['fixed']['counts']), 1)
+            self.assertEqual(histogram['quantile']['edges'], [3.0] * 13)
+            self.assertEqual(histogram['quantile']['counts'], [0] * 11 + [1])
@@ -0,0 +1,75 @@
+from datetime import timedelta
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Dataset, Equipment
+
+
+class EquipmentHistoryTests(TestCase):
+    """``GET /api/equipment/<name>/history/``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Created newest first, so id order and upload order disagree
+        cls.datasets = []
+        for days_ago, flowrate in [(1, 30.0), (3, 10.0), (2, 20.0)]:
+            dataset = Dataset.objects.create(filename=f'day{days_ago}.csv', total_rows=2)
+            Dataset.objects.filter(id=dataset.id).update(uploaded_at=now - timedelta(days=days_ago))
+            Equipment.objects.create(dataset=dataset, equipment_name='Pump A', equipment_type='Pump',
+                                     flowrate=flowrate, pressure=5.0, temperature=80.0)
+            Equipment.objects.create(dataset=dataset, equipment_name='Valve B', equipment_type='Valve',
+                                     flowrate=1.0, pressure=1.0, temperature=20.0)
+            cls.datasets.append(dataset)
+        pending = Dataset.objects.create(filename='pending.csv', total_rows=0, is_ready=False)
+        Equipment.objects.create(dataset=pending, equipment_name='Pump A', equipment_type='Pump',
+                                 flowrate=99.0, pressure=5.0, temperature=80.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, name, **params):
+        return self.client.get(f'/api/equipment/{quote(name)}/history/', params)
+
+    def test_history_across_datasets(self):
+        response = self.get('Pump A')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['equipment_name'], 'Pump A')
+        self.assertIsNone(data['next_cursor'])
+        history = data['history']
+        # Oldest upload first; the dataset still being ingested is left out
+        self.assertEqual([row['flowrate'] for row in history], [10.0, 20.0, 30.0])
+        self.assertEqual([row['filename'] for row in history], ['day3.csv', 'day2.csv', 'day1.csv'])
+        self.assertEqual(
+            [row['dataset_id'] for row in history],
+            [self.datasets[1].id, self.datasets[2].id, self.datasets[0].id]
+        )
+        self.assertEqual(set(history[0]), {
+            'dataset_id', 'filename', 'uploaded_at', 'equipment_type',
+            'flowrate', 'pressure', 'temperature',
+        })
+
+    def test_pages(self):
+        first = self.get('Pump A', limit=2).json()
+        self.assertEqual([row['flowrate'] for row in first['history']], [10.0, 20.0])
+        second = self.get('Pump A', limit=2, cursor=first['next_cursor']).json()
+        self.assertEqual([row['flowrate'] for row in second['history']], [30.0])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_unknown_name(self):
+        response = self.get('Pump Z')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'Equipment not found'})
+
+    def test_only_in_pending_dataset(self):
+        pending = Dataset.objects.get(is_ready=False)
+        Equipment.objects.create(dataset=pending, equipment_name='Mixer C', equipment_type='Mixer',
+                                 flowrate=1.0, pressure=1.0, temperature=20.0)
+        self.assertEqual(self.get('Mixer C').status_code, 404)
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.get('Pump A', cursor='not-a-cursor').status_code, 400)
@@ -0,0 +1,138 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from api.ingest import IngestError, ingest_csv
+from api.models import Dataset, Equipment
+
+HEADER = 'Equipment Name,Type,Flowrate,Pressure,Temperature'
+
+
+def csv_file(rows):
+    return SimpleUploadedFile('plant.csv', ('\n'.join([HEADER] + rows) + '\n').encode())
+
+
+class InlineExecutor:
+    """Runs submitted tasks at once, in the calling thread"""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append(fn.__name__)
+        fn(*args)
+
+
+@override_settings(REPORT_PRERENDER=False)
+class AppendTests(TransactionTestCase):
+    """Appending rows, and the outlier flags and histograms rebuilt afterwards"""
+
+    def setUp(self):
+        cache.clear()
+        # 20 pumps at 10.0-10.95 m3/h and one at 100
+        rows = [f'P{i},Pump,{10 + i * 0.05:.2f},5.0,80.0' for i in range(20)]
+        response = self.client.post('/api/datasets/upload/', {'file': csv_file(rows)})
+        self.assertEqual(response.status_code, 201)
+        self.dataset_id = response.json()['dataset_id']
+
+    def append(self, rows, executor=None):
+        executor = executor or InlineExecutor()
+        with mock.patch('api.jobs.get_executor', return_value=executor):
+            response = self.client.post(
+                f'/api/datasets/{self.dataset_id}/append/', {'file': csv_file(rows)}
+            )
+        return response, executor
+
+    def flagged(self):
+        return set(Equipment.objects.filter(
+            dataset_id=self.dataset_id, outlier_flags__gt=0
+        ).values_list('equipment_name', flat=True))
+
+    def test_outlier_flags_after_append(self):
+        self.assertEqual(self.flagged(), set())
+
+        response, executor = self.append(['X1,Pump,100.0,5.0,80.0'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(executor.submitted, ['refresh_derived'])
+        self.assertEqual(self.flagged(), {'X1'})
+
+        dataset = Dataset.objects.get(id=self.dataset_id)
+        self.assertFalse(dataset.derived_stale)
+        outliers = self.client.get(f'/api/datasets/{self.dataset_id}/outliers/').json()
+        self.assertFalse(outliers['stale'])
+        self.assertEqual([row['equipment_name'] for row in outliers['outliers']], ['X1'])
+
+        histograms = self.client.get(
+            f'/api/datasets/{self.dataset_id}/histograms/?columns=flowrate&by_type=false'
+        ).json()
+        self.assertEqual(sum(histograms['histograms']['flowrate']['all']['fixed']['counts']), 21)
+
+    def test_stale_until_rebuilt(self):
+        # The rebuild is queued but hasn't run yet
+        response, executor = self.append(['X1,Pump,100.0,5.0,80.0'], executor=mock.Mock())
+        executor.submit.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Dataset.objects.get(id=self.dataset_id).derived_stale)
+        self.assertEqual(self.flagged(), set())
+        self.assertTrue(self.client.get(f'/api/datasets/{self.dataset_id}/outliers/').json()['stale'])
+
+    def test_etag_changes_after_append(self):
+        paths = ['', 'stats/', 'outliers/', 'histograms/', 'export/', 'rows/']
+        etags = {}
+        for path in paths:
+            response = self.client.get(f'/api/datasets/{self.dataset_id}/{path}')
+            self.assertEqual(response.status_code, 200)
+            etags[path] = response['ETag']
+            cached = self.client.get(
+                f'/api/datasets/{self.dataset_id}/{path}', headers={'If-None-Match': etags[path]}
+            )
+            self.assertEqual(cached.status_code, 304)
+
+        self.append(['X1,Pump,100.0,5.0,80.0'])
+
+        for path in paths:
+            with self.subTest(path=path):
+                response = self.client.get(
+                    f'/api/datasets/{self.dataset_id}/{path}', headers={'If-None-Match': etags[path]}
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etags[path])
+        detail = self.client.get(f'/api/datasets/{self.dataset_id}/').json()
+        self.assertEqual(detail['total_rows'], 21)
+
+
+class UnreadableUploadTests(TestCase):
+    """Files without rows or not in UTF-8 are rejected with a 400"""
+
+    LATIN1 = (HEADER + '\nPompe \xe0 eau,Pump,1.0,2.0,3.0\n').encode('latin-1')
+
+    def test_header_only(self):
+        response = self.client.post('/api/datasets/upload/', {'file': csv_file([])})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'CSV file contains no data rows')
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_header_only_background(self):
+        with self.assertRaisesMessage(IngestError, 'no data rows'):
+            ingest_csv(csv_file([]), 'plant.csv', atomic=False)
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_not_utf8(self):
+        response = self.client.post(
+            '/api/datasets/upload/', {'file': SimpleUploadedFile('plant.csv', self.LATIN1)}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Could not parse CSV', response.json()['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_append_not_utf8(self):
+        dataset_id = self.client.post(
+            '/api/datasets/upload/', {'file': csv_file(['P1,Pump,1.0,2.0,3.0'])}
+        ).json()['dataset_id']
+        response = self.client.post(
+            f'/api/datasets/{dataset_id}/append/', {'file': SimpleUploadedFile('more.csv', self.LATIN1)}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Equipment.objects.filter(dataset_id=dataset_id).count(), 1)
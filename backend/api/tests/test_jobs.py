@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.signals import request_started
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from api.jobs import STALE_JOB_ERROR, fail_stale_jobs, recover_jobs, run_job
+from api.models import Dataset, Equipment, IngestJob
+from api.tests.test_ingest import InlineExecutor
+
+HEADER = 'Equipment Name,Type,Flowrate,Pressure,Temperature'
+
+
+class RunIngestJobsCommandTests(SimpleTestCase):
+    """Scheduling of ``manage.py run_ingest_jobs``"""
+
+    def test_next_job_starts_when_a_worker_frees_up(self):
+        durations = {1: 0.5, 2: 0.05, 3: 0.05}
+        queue = list(durations)
+        events = []
+        lock = threading.Lock()
+
+        def pending_job_ids(limit=None):
+            with lock:
+                return queue[:limit]
+
+        def run_job(job_id):
+            with lock:
+                queue.remove(job_id)
+                events.append(('start', job_id))
+            time.sleep(durations[job_id])
+            with lock:
+                events.append(('end', job_id))
+
+        with mock.patch('api.management.commands.run_ingest_jobs.pending_job_ids', pending_job_ids), \
+                mock.patch('api.management.commands.run_ingest_jobs.run_job', run_job), \
+                mock.patch('api.management.commands.run_ingest_jobs.fail_stale_jobs', return_value=0):
+            call_command('run_ingest_jobs', workers=2, once=True, poll_interval=0.01, stdout=StringIO())
+
+        self.assertEqual(len(events), 6)
+        # Job 3 takes job 2's worker while job 1 is still running
+        self.assertLess(events.index(('start', 3)), events.index(('end', 1)))
+
+
+class IngestJobTests(TransactionTestCase):
+    """Background ingestion through ``run_job``"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def create_job(self, content):
+        path = os.path.join(self.tmpdir, 'plant.csv')
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        return IngestJob.objects.create(filename='plant.csv', file_path=path)
+
+    @override_settings(INGEST_CHUNK_SIZE=2, REPORT_PRERENDER=False)
+    def test_chunked_ingest(self):
+        rows = [f'P{i},Pump,{i}.0,5.0,80.0' for i in range(5)]
+        job = self.create_job(('\n'.join([HEADER] + rows) + '\n').encode())
+        run_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.STATUS_COMPLETED)
+        self.assertEqual(job.rows_processed, 5)
+        dataset = Dataset.objects.get(id=job.dataset_id)
+        self.assertTrue(dataset.is_ready)
+        self.assertEqual(dataset.equipment.count(), 5)
+
+    @override_settings(INGEST_CHUNK_SIZE=2)
+    def test_validation_errors_are_kept_on_the_job(self):
+        # Problems in the first and the last chunk
+        rows = [
+            'P1,Pump,10.0,5.0,80.0',
+            'P2,Pump,abc,5.0,80.0',
+            'P3,Pump,12.0,5.0,80.0',
+            'P4,Pump,13.0,5.0,80.0',
+            'P1,Pump,14.0,-1.0,80.0',
+        ]
+        job = self.create_job(('\n'.join([HEADER] + rows) + '\n').encode())
+        run_job(job.id)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, IngestJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'Validation failed for 2 rows')
+        self.assertFalse(Dataset.objects.exists())
+        self.assertFalse(os.path.exists(job.file_path))
+
+        validation = job.error_details['validation']
+        self.assertEqual(validation['rows_checked'], 5)
+        self.assertEqual(validation['invalid_rows'], 2)
+        self.assertEqual(validation['issues'], {
+            'Flowrate: not_numeric': 1,
+            'Pressure: out_of_range': 1,
+            'Equipment Name: duplicate': 1
+        })
+        self.assertEqual([row['row'] for row in validation['rows']], [2, 5, 5])
+
+        response = self.client.get(f'/api/datasets/jobs/{job.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['error_details'], job.error_details)
+
+
+@override_settings(INGEST_JOB_STALE_SECONDS=60, REPORT_PRERENDER=False)
+class JobRecoveryTests(TransactionTestCase):
+    """Jobs left behind by a worker that crashed or was restarted"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        self.content = (HEADER + '\nP1,Pump,10.0,5.0,80.0\n').encode()
+
+    def create_job(self, **fields):
+        path = os.path.join(self.tmpdir, f'plant{IngestJob.objects.count()}.csv')
+        with open(path, 'wb') as fh:
+            fh.write(self.content)
+        return IngestJob.objects.create(filename='plant.csv', file_path=path, **fields)
+
+    def running_job(self, seconds_ago, digest):
+        # What a worker leaves behind after its first chunk
+        dataset = Dataset.objects.create(
+            filename='plant.csv', total_rows=0, is_ready=False, content_hash=digest
+        )
+        Equipment.objects.create(
+            dataset=dataset, equipment_name='P1', equipment_type='Pump',
+            flowrate=10.0, pressure=5.0, temperature=80.0
+        )
+        heartbeat = timezone.now() - timedelta(seconds=seconds_ago)
+        return self.create_job(
+            status=IngestJob.STATUS_RUNNING, content_hash=digest, dataset=dataset,
+            rows_processed=1, started_at=heartbeat, heartbeat_at=heartbeat
+        )
+
+    def test_stale_job_is_failed(self):
+        stale = self.running_job(3600, 'a' * 64)
+        alive = self.running_job(10, 'b' * 64)
+
+        self.assertEqual(fail_stale_jobs(), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, IngestJob.STATUS_FAILED)
+        self.assertEqual(stale.error, STALE_JOB_ERROR)
+        self.assertIsNone(stale.dataset_id)
+        self.assertFalse(os.path.exists(stale.file_path))
+        self.assertFalse(Dataset.objects.filter(content_hash='a' * 64).exists())
+        self.assertEqual(Equipment.objects.count(), 1)
+
+        alive.refresh_from_db()
+        self.assertEqual(alive.status, IngestJob.STATUS_RUNNING)
+        self.assertTrue(Dataset.objects.filter(pk=alive.dataset_id).exists())
+
+    def test_command_fails_stale_jobs(self):
+        stale = self.running_job(3600, 'a' * 64)
+        out = StringIO()
+        call_command('run_ingest_jobs', once=True, stdout=out)
+        self.assertIn('Failed 1 stale job(s)', out.getvalue())
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, IngestJob.STATUS_FAILED)
+
+    def test_first_request_resumes_pending_jobs(self):
+        stale = self.running_job(3600, 'a' * 64)
+        pending = self.create_job()
+        request_started.connect(recover_jobs)
+
+        with mock.patch('api.jobs.get_executor', return_value=InlineExecutor()):
+            self.client.get('/api/datasets/')
+
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, IngestJob.STATUS_COMPLETED)
+        self.assertTrue(Dataset.objects.get(pk=pending.dataset_id).is_ready)
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, IngestJob.STATUS_FAILED)
+        # Only once per process
+        self.assertFalse(request_started.disconnect(recover_jobs))
@@ -0,0 +1,126 @@
+import re
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from api.models import Dataset, Equipment
+
+SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """Prometheus text format -> {(name, frozenset of label pairs): value}"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        samples[(name, frozenset(LABEL.findall(labels or '')))] = float(value)
+    return samples
+
+
+def sample(samples, name, **labels):
+    return samples.get((name, frozenset(labels.items())), 0.0)
+
+
+class MetricsTests(TestCase):
+    """Requests recorded by MetricsMiddleware, as scraped from /api/metrics/.
+
+    Metrics are process wide, so every check compares two scrapes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=2)
+        Equipment.objects.create(dataset=cls.dataset, equipment_name='P1', equipment_type='Pump',
+                                 flowrate=10.0, pressure=5.0, temperature=80.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def scrape(self):
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return parse(response.content.decode())
+
+    async def ascrape(self):
+        response = await self.async_client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        return parse(response.content.decode())
+
+    def assertHistogram(self, before, after, name, view, count):
+        """``count`` new observations, with cumulative buckets ending at +Inf"""
+        self.assertEqual(
+            sample(after, f'{name}_count', view=view) - sample(before, f'{name}_count', view=view),
+            count
+        )
+        buckets = sorted(
+            (float(dict(labels)['le']), value) for (metric, labels), value in after.items()
+            if metric == f'{name}_bucket' and dict(labels)['view'] == view
+        )
+        self.assertEqual(buckets[-1], (float('inf'), sample(after, f'{name}_count', view=view)))
+        values = [value for _, value in buckets]
+        self.assertEqual(values, sorted(values))
+
+    def test_sync_requests(self):
+        before = self.scrape()
+        for _ in range(2):
+            response = self.client.get('/api/datasets/')
+            self.assertIn('app;dur=', response['Server-Timing'])
+        self.client.get('/api/datasets/999999/')
+        self.client.get('/no/such/path/')
+        after = self.scrape()
+
+        def added(view, status):
+            labels = {'view': view, 'method': 'GET', 'status': status}
+            return sample(after, 'api_requests_total', **labels) - sample(
+                before, 'api_requests_total', **labels
+            )
+
+        self.assertEqual(added('get_datasets', '200'), 2)
+        self.assertEqual(added('dataset_detail', '404'), 1)
+        # The first scrape is counted by the second one
+        self.assertEqual(added('metrics', '200'), 1)
+        # Unrouted requests are not recorded
+        total = sum(value for (name, _), value in after.items() if name == 'api_requests_total')
+        total -= sum(value for (name, _), value in before.items() if name == 'api_requests_total')
+        self.assertEqual(total, 4)
+
+        for name in ['api_request_duration_seconds', 'api_request_sql_queries',
+                     'api_request_sql_duration_seconds', 'api_response_size_bytes']:
+            with self.subTest(name=name):
+                self.assertHistogram(before, after, name, 'get_datasets', 2)
+        self.assertGreater(
+            sample(after, 'api_request_sql_queries_sum', view='get_datasets')
+            - sample(before, 'api_request_sql_queries_sum', view='get_datasets'),
+            0
+        )
+
+    async def test_async_requests(self):
+        before = await self.ascrape()
+        response = await self.async_client.get(f'/api/async/datasets/{self.dataset.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        after = await self.ascrape()
+
+        labels = {'view': 'async_dataset_detail', 'method': 'GET', 'status': '200'}
+        self.assertEqual(
+            sample(after, 'api_requests_total', **labels)
+            - sample(before, 'api_requests_total', **labels),
+            1
+        )
+        self.assertHistogram(before, after, 'api_request_duration_seconds', 'async_dataset_detail', 1)
+        self.assertHistogram(before, after, 'api_request_sql_queries', 'async_dataset_detail', 1)
+        # The ORM's queries run on another thread; the timer still sees them
+        self.assertGreater(
+            sample(after, 'api_request_sql_queries_sum', view='async_dataset_detail')
+            - sample(before, 'api_request_sql_queries_sum', view='async_dataset_detail'),
+            0
+        )
+        self.assertEqual(
+            sample(after, 'api_response_size_bytes_sum', view='async_dataset_detail')
+            - sample(before, 'api_response_size_bytes_sum', view='async_dataset_detail'),
+            len(response.content)
+        )
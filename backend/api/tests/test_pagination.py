@@ -0,0 +1,104 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from api.models import Dataset, Equipment
+
+
+class CursorRoundTripTests(TestCase):
+    """Walking every page with the returned cursors yields each row exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=23)
+        # Few distinct values, so most sort keys tie and the id decides
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=f'E{i % 5}',
+                      equipment_type=['Pump', 'Valve'][i % 2], flowrate=[1.5, 2.5, 3.5][i % 3],
+                      pressure=float(i % 4), temperature=80.0)
+            for i in range(23)
+        ])
+        cls.rows = list(Equipment.objects.filter(dataset=cls.dataset).values(
+            'id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure'
+        ))
+
+        # Datasets uploaded at the very same instant
+        now = timezone.now()
+        cls.datasets = [cls.dataset] + [
+            Dataset.objects.create(filename=f'd{i % 2}.csv', total_rows=0) for i in range(6)
+        ]
+        Dataset.objects.update(uploaded_at=now)
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, path, key, params):
+        """Follow the cursors from the first page on; return the ids in order"""
+        ids = []
+        cursor = None
+        for _ in range(100):
+            query = dict(params, **({'cursor': cursor} if cursor else {}))
+            response = self.client.get(path, query)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            if key:
+                ids.extend(row['id'] for row in data[key])
+                cursor = data['next_cursor']
+            else:
+                ids.extend(row['id'] for row in data)
+                cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                return ids
+        self.fail('Pagination did not end')
+
+    @staticmethod
+    def expected(rows, ordering):
+        """``rows`` sorted as the API does, with the id breaking ties"""
+        ordering = ordering + ['-id' if ordering[-1].startswith('-') else 'id']
+        for key in reversed(ordering):
+            name = key.lstrip('-')
+            rows = sorted(rows, key=lambda row: row[name], reverse=key.startswith('-'))
+        return [row['id'] for row in rows]
+
+    def test_equipment_orderings_with_ties(self):
+        for ordering in [
+            ['flowrate'], ['-flowrate'], ['equipment_type', '-pressure'],
+            ['-equipment_name', 'flowrate'], ['-pressure', '-flowrate'],
+        ]:
+            for limit in [1, 4, 7]:
+                with self.subTest(ordering=ordering, limit=limit):
+                    ids = self.walk(
+                        f'/api/datasets/{self.dataset.id}/', 'equipment',
+                        {'ordering': ','.join(ordering), 'limit': limit, 'fields': 'id'}
+                    )
+                    self.assertEqual(ids, self.expected(self.rows, ordering))
+
+    def test_filtered_walk(self):
+        ids = self.walk(
+            f'/api/datasets/{self.dataset.id}/', 'equipment',
+            {'ordering': 'flowrate', 'equipment_type': 'Pump', 'limit': 3, 'fields': 'id'}
+        )
+        pumps = [row for row in self.rows if row['equipment_type'] == 'Pump']
+        self.assertEqual(ids, self.expected(pumps, ['flowrate']))
+
+    def test_dataset_list_with_equal_upload_times(self):
+        rows = list(Dataset.objects.values('id', 'filename', 'uploaded_at'))
+        for ordering in [['-uploaded_at'], ['filename'], ['-filename', 'uploaded_at']]:
+            for limit in [1, 2, 5]:
+                with self.subTest(ordering=ordering, limit=limit):
+                    ids = self.walk(
+                        '/api/datasets/', None,
+                        {'ordering': ','.join(ordering), 'limit': limit, 'fields': 'id'}
+                    )
+                    self.assertEqual(ids, self.expected(rows, ordering))
+
+        # Default order, newest first
+        self.assertEqual(
+            self.walk('/api/datasets/', None, {'limit': 2}), self.expected(rows, ['-uploaded_at'])
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in ['not-base64!', 'WzEsMl0=', 'eyJhIjoxfQ==']:
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f'/api/datasets/{self.dataset.id}/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,173 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api import reports
+from api.models import Dataset, Equipment
+
+
+class ReportCacheTests(TestCase):
+    """The on-disk PDF cache behind ``generate_pdf``"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.datasets = []
+        for i in range(3):
+            dataset = Dataset.objects.create(
+                filename=f'plant{i}.csv', total_rows=2, equipment_types={'Pump': 1, 'Valve': 1}
+            )
+            Equipment.objects.create(dataset=dataset, equipment_name='P1', equipment_type='Pump',
+                                     flowrate=10.0, pressure=5.0, temperature=80.0)
+            Equipment.objects.create(dataset=dataset, equipment_name='V1', equipment_type='Valve',
+                                     flowrate=3.0, pressure=2.0, temperature=60.0)
+            cls.datasets.append(dataset)
+
+    def setUp(self):
+        cache.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        overrides = override_settings(REPORT_CACHE_DIR=self.cache_dir, REPORT_PRERENDER=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def cached_files(self):
+        return sorted(os.listdir(self.cache_dir))
+
+    def fake_report(self, dataset, age):
+        """A 100 byte cached report last served ``age`` seconds ago"""
+        path = reports.report_path(dataset)
+        with open(path, 'wb') as fh:
+            fh.write(b'%PDF' + b'0' * 96)
+        then = time.time() - age
+        os.utime(path, (then, then))
+        return path
+
+    def test_hit_does_not_render(self):
+        dataset = self.datasets[0]
+        with mock.patch('api.reports.render_report', wraps=reports.render_report) as render:
+            first = reports.get_report(dataset)
+            second = reports.get_report(dataset)
+        self.assertEqual(first, second)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(self.cached_files(), [os.path.basename(first)])
+
+    def test_hit_refreshes_mtime(self):
+        path = self.fake_report(self.datasets[0], age=3600)
+        before = os.path.getmtime(path)
+        self.assertEqual(reports.get_report(self.datasets[0]), path)
+        self.assertGreater(os.path.getmtime(path), before + 3000)
+
+    def test_update_invalidates(self):
+        dataset = self.datasets[0]
+        old_path = reports.get_report(dataset)
+
+        dataset.filename = 'renamed.csv'
+        dataset.save()
+        self.assertNotEqual(reports.report_path(dataset), old_path)
+        with mock.patch('api.reports.render_report', wraps=reports.render_report) as render:
+            new_path = reports.get_report(dataset)
+        self.assertEqual(render.call_count, 1)
+        # The report of the old revision is dropped
+        self.assertEqual(self.cached_files(), [os.path.basename(new_path)])
+
+    def test_version_bump_invalidates(self):
+        old_path = reports.get_report(self.datasets[0])
+        with override_settings(REPORT_VERSION=settings.REPORT_VERSION + 1):
+            new_path = reports.get_report(self.datasets[0])
+        self.assertNotEqual(new_path, old_path)
+        self.assertFalse(os.path.exists(old_path))
+
+    @override_settings(REPORT_CACHE_MAX_BYTES=250)
+    def test_least_recently_served_evicted(self):
+        first = self.fake_report(self.datasets[0], age=300)
+        second = self.fake_report(self.datasets[1], age=200)
+        third = self.fake_report(self.datasets[2], age=100)
+
+        # Serving the oldest makes it the most recently used
+        reports.get_report(self.datasets[0])
+        reports.enforce_cache_limit()
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertTrue(os.path.exists(third))
+
+    @override_settings(REPORT_CACHE_MAX_BYTES=50)
+    def test_report_being_served_is_kept(self):
+        for age, dataset in zip([300, 200, 100], self.datasets):
+            self.fake_report(dataset, age)
+        keep = reports.report_path(self.datasets[0])
+        reports.enforce_cache_limit(keep=keep)
+        self.assertEqual(self.cached_files(), [os.path.basename(keep)])
+
+    def test_generate_pdf(self):
+        dataset = self.datasets[0]
+        with mock.patch('api.reports.render_report', wraps=reports.render_report) as render:
+            for _ in range(2):
+                response = self.client.get(f'/api/datasets/{dataset.id}/generate_pdf/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/pdf')
+                self.assertIn(f'attachment; filename="report_{dataset.id}.pdf"',
+                              response['Content-Disposition'])
+                body = b''.join(response.streaming_content)
+                response.close()
+                self.assertTrue(body.startswith(b'%PDF'))
+        self.assertEqual(render.call_count, 1)
+        with open(reports.report_path(dataset), 'rb') as fh:
+            self.assertEqual(fh.read(), body)
+
+    def test_generate_pdf_unknown_dataset(self):
+        response = self.client.get('/api/datasets/999999/generate_pdf/')
+        self.assertEqual(response.status_code, 404)
+
+
+class ReportTableTests(TestCase):
+    """The equipment table is complete unless REPORT_MAX_TABLE_ROWS caps it"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=300)
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=f'P{i}', equipment_type='Pump',
+                      flowrate=10.0, pressure=5.0, temperature=80.0)
+            for i in range(300)
+        ])
+
+    def render(self):
+        """Pages written, and the table rows and text lines drawn"""
+        drawn = {'rows': [], 'lines': []}
+        row, line = reports.ReportWriter.row, reports.ReportWriter.line
+
+        def record_row(writer, values):
+            drawn['rows'].append(values)
+            row(writer, values)
+
+        def record_line(writer, text, size=10):
+            drawn['lines'].append(text)
+            line(writer, text, size)
+
+        with mock.patch.object(reports.ReportWriter, 'row', record_row), \
+                mock.patch.object(reports.ReportWriter, 'line', record_line):
+            pages = reports.render_report(self.dataset, io.BytesIO())
+        # Skip the 'Pump' row of the per-type statistics table
+        names = [values[0] for values in drawn['rows'] if values[0] != 'Pump']
+        return pages, names, drawn['lines']
+
+    def test_complete_by_default(self):
+        pages, names, lines = self.render()
+        self.assertEqual(names, [f'P{i}' for i in range(300)])
+        self.assertGreater(pages, 5)
+        self.assertFalse(any('REPORT_MAX_TABLE_ROWS' in text for text in lines))
+
+    @override_settings(REPORT_MAX_TABLE_ROWS=100)
+    def test_cap_is_stated(self):
+        pages, names, lines = self.render()
+        self.assertEqual(names, [f'P{i}' for i in range(100)])
+        notes = [text for text in lines if 'first 100 of 300 rows' in text]
+        # On the first page and above the table
+        self.assertEqual(len(notes), 2)
@@ -0,0 +1,84 @@
+import numpy as np
+from django.test import TestCase
+
+from api.models import Dataset, Equipment
+from api.stats import interpolate_percentiles, percentile_key
+
+
+class GroupedStatsTests(TestCase):
+    """Percentiles from the stats endpoints against numpy.percentile"""
+
+    # Group sizes and percentiles whose rank positions fall on or next to an
+    # integer, where SQL and Python rounding must agree
+    SIZES = [1, 2, 3, 7, 10, 101, 251]
+    PERCENTILES = [0, 0.1, 7, 12.5, 33.3, 50, 64.4, 99.9, 100]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='stats.csv', total_rows=sum(cls.SIZES))
+        rng = np.random.default_rng(0)
+        cls.values = {}
+        rows = []
+        for size in cls.SIZES:
+            eq_type = f'Type-{size}'
+            values = rng.normal(100, 20, size).round(3)
+            cls.values[eq_type] = values
+            rows += [
+                Equipment(
+                    dataset=cls.dataset,
+                    equipment_name=f'{eq_type}-{i}',
+                    equipment_type=eq_type,
+                    flowrate=value,
+                    pressure=value / 10,
+                    temperature=value * 2
+                )
+                for i, value in enumerate(values)
+            ]
+        Equipment.objects.bulk_create(rows)
+
+    def check_groups(self, body):
+        for group in body['groups']:
+            expected = self.values[group['equipment_type']]
+            self.assertEqual(group['count'], len(expected))
+            for p in self.PERCENTILES:
+                self.assertAlmostEqual(
+                    group['flowrate'][percentile_key(p)], np.percentile(expected, p), places=9
+                )
+
+    def test_fractional_percentiles(self):
+        percentiles = ','.join(map(str, self.PERCENTILES))
+        response = self.client.get(f'/api/datasets/{self.dataset.id}/stats/?percentiles={percentiles}')
+        self.assertEqual(response.status_code, 200)
+        self.check_groups(response.json())
+
+    async def test_fractional_percentiles_async(self):
+        percentiles = ','.join(map(str, self.PERCENTILES))
+        response = await self.async_client.get(
+            f'/api/async/datasets/{self.dataset.id}/stats/?percentiles={percentiles}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.check_groups(response.json())
+
+    def test_rank_on_float_boundary(self):
+        # 250 * 0.644 is exactly 161 in floating point, 250 * 64.4 / 100 is not
+        response = self.client.get(f'/api/datasets/{self.dataset.id}/stats/?percentiles=64.4')
+        self.assertEqual(response.status_code, 200)
+        group = next(g for g in response.json()['groups'] if g['equipment_type'] == 'Type-251')
+        self.assertAlmostEqual(
+            group['flowrate']['p64_4'], np.percentile(self.values['Type-251'], 64.4), places=9
+        )
+
+    def test_rank_rounded_the_other_way(self):
+        # 100 * 0.07 is 7.000000000000001 in Python but exactly 7 in
+        # PostgreSQL NUMERIC arithmetic, which then returns row 8 alone
+        values = self.values['Type-101']
+        ordered = sorted(values)
+        rows = [('Type-101', 8, 101, ordered[7])]
+        result = interpolate_percentiles(rows, [7])
+        self.assertAlmostEqual(result['Type-101']['p7'], np.percentile(values, 7), places=9)
+
+    def test_invalid_percentiles(self):
+        for raw in ['nan', '50,nan', 'inf', '-1', '101', 'abc']:
+            with self.subTest(raw=raw):
+                response = self.client.get(f'/api/datasets/{self.dataset.id}/stats/?percentiles={raw}')
+                self.assertEqual(response.status_code, 400)
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+from contextlib import nullcontext
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from api.models import Dataset, Equipment
+
+FIELDS = ['id', 'equipment_name', 'equipment_type', 'flowrate', 'pressure', 'temperature']
+CSV_TYPES = {'id': int, 'flowrate': float, 'pressure': float, 'temperature': float}
+
+
+@override_settings(STREAM_CHUNK_SIZE=2)
+class RowStreamTests(TestCase):
+    """``GET /api/datasets/<id>/rows/`` parsed back and compared with the database"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(filename='plant.csv', total_rows=5)
+        # Names that need quoting in CSV and escaping in JSON
+        Equipment.objects.bulk_create([
+            Equipment(dataset=cls.dataset, equipment_name=name, equipment_type=eq_type,
+                      flowrate=flowrate, pressure=5.5, temperature=-12.25)
+            for name, eq_type, flowrate in [
+                ('P1', 'Pump', 10.0), ('Pump, "north"', 'Pump', 0.1),
+                ('Wärmetauscher', 'Heat Exchanger', 1e-7), ('V1\\2', 'Valve', 123456.789),
+                ('R1', 'Reactor', 0.0),
+            ]
+        ])
+        cls.empty = Dataset.objects.create(filename='empty.csv', total_rows=0)
+        other = Dataset.objects.create(filename='other.csv', total_rows=1)
+        Equipment.objects.create(dataset=other, equipment_name='X1', equipment_type='Pump',
+                                 flowrate=1.0, pressure=1.0, temperature=1.0)
+
+    def setUp(self):
+        cache.clear()
+
+    def db_rows(self, dataset, fields=FIELDS):
+        return [
+            dict(zip(fields, row)) for row in
+            Equipment.objects.filter(dataset=dataset).order_by('id').values_list(*fields)
+        ]
+
+    def stream(self, dataset, stream_format, **params):
+        response = self.client.get(
+            f'/api/datasets/{dataset.id}/rows/', {'format': stream_format, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode('utf-8')
+
+    def parse_csv(self, body):
+        reader = csv.DictReader(io.StringIO(body))
+        rows = [
+            {field: CSV_TYPES.get(field, str)(value) for field, value in row.items()}
+            for row in reader
+        ]
+        return reader.fieldnames, rows
+
+    def test_json(self):
+        # With orjson (when installed) and with the standard library encoder
+        for encoder in [nullcontext(), mock.patch('api.streaming.orjson', None)]:
+            with self.subTest(encoder=encoder), encoder:
+                response, body = self.stream(self.dataset, 'json')
+                self.assertEqual(response['Content-Type'], 'application/json')
+                data = json.loads(body)
+                self.assertEqual(data['id'], self.dataset.id)
+                self.assertEqual(data['filename'], 'plant.csv')
+                self.assertEqual(data['total_rows'], 5)
+                self.assertEqual(data['equipment'], self.db_rows(self.dataset))
+
+    def test_ndjson(self):
+        response, body = self.stream(self.dataset, 'ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertTrue(body.endswith('\n'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(rows, self.db_rows(self.dataset))
+
+    def test_csv(self):
+        response, body = self.stream(self.dataset, 'csv')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn(f'dataset_{self.dataset.id}.csv', response['Content-Disposition'])
+        header, rows = self.parse_csv(body)
+        self.assertEqual(header, FIELDS)
+        self.assertEqual(rows, self.db_rows(self.dataset))
+
+    def test_fields(self):
+        fields = ['equipment_name', 'flowrate']
+        _, body = self.stream(self.dataset, 'ndjson', fields=','.join(fields))
+        self.assertEqual([json.loads(line) for line in body.splitlines()],
+                         self.db_rows(self.dataset, fields))
+        _, body = self.stream(self.dataset, 'csv', fields=','.join(fields))
+        header, rows = self.parse_csv(body)
+        self.assertEqual(header, fields)
+        self.assertEqual(rows, self.db_rows(self.dataset, fields))
+
+    def test_empty_dataset(self):
+        _, body = self.stream(self.empty, 'json')
+        data = json.loads(body)
+        self.assertEqual(data['equipment'], [])
+        self.assertEqual(data['total_rows'], 0)
+
+        _, body = self.stream(self.empty, 'ndjson')
+        self.assertEqual(body, '')
+
+        _, body = self.stream(self.empty, 'csv')
+        self.assertEqual(body, ','.join(FIELDS) + '\n')
+
+    def test_errors(self):
+        response = self.client.get(f'/api/datasets/{self.dataset.id}/rows/', {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['supported'], ['json', 'ndjson', 'csv'])
+        response = self.client.get(f'/api/datasets/{self.dataset.id}/rows/', {'fields': 'content_hash'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/datasets/999999/rows/').status_code, 404)
@@ -0,0 +1,97 @@
+import io
+
+import pandas as pd
+from django.test import SimpleTestCase
+
+from api.ingest import read_chunks
+from api.validation import ChunkValidator
+
+HEADER = 'Equipment Name,Type,Flowrate,Pressure,Temperature'
+
+
+def chunks(rows, chunksize=2):
+    data = ('\n'.join([HEADER] + rows) + '\n').encode()
+    return read_chunks(io.BytesIO(data), chunksize)
+
+
+def validate(rows, chunksize=2):
+    validator = ChunkValidator(max_reported=100)
+    for chunk in chunks(rows, chunksize):
+        validator.check(chunk)
+    return validator
+
+
+class ChunkValidatorTests(SimpleTestCase):
+    """Each check on its own, with rows spread over several chunks"""
+
+    def issues(self, validator):
+        return [(row['row'], row['column'], row['issue']) for row in validator.report()['rows']]
+
+    def test_valid_rows(self):
+        validator = validate(['P1,Pump,1.5,2,80', 'P2,Pump,0,0,-273.15', 'V1,Valve,3,4,5'])
+        self.assertFalse(validator.failed)
+        self.assertEqual(validator.rows_seen, 3)
+        self.assertEqual(validator.issue_counts, {})
+
+    def test_missing(self):
+        validator = validate(['P1,Pump,1,2,3', ',Pump,1,2,3', 'P3, ,1,2,3', 'P4,Pump,,2,3'])
+        self.assertTrue(validator.failed)
+        self.assertEqual(validator.invalid_rows, 3)
+        self.assertEqual(self.issues(validator), [
+            (2, 'Equipment Name', 'missing'),
+            (3, 'Type', 'missing'),
+            (4, 'Flowrate', 'missing'),
+        ])
+
+    def test_not_numeric(self):
+        validator = validate(['P1,Pump,fast,2,3', 'P2,Pump,1,2,3', 'P3,Pump,1,2,inf'])
+        self.assertEqual(validator.issue_counts, {
+            'Flowrate: not_numeric': 1, 'Temperature: not_numeric': 1,
+        })
+        self.assertEqual(validator.report()['rows'][0]['value'], 'fast')
+        self.assertEqual([row['row'] for row in validator.report()['rows']], [1, 3])
+
+    def test_out_of_range(self):
+        validator = validate(['P1,Pump,-1,2,3', 'P2,Pump,1,-0.5,3', 'P3,Pump,1,2,-300'])
+        self.assertEqual(self.issues(validator), [
+            (1, 'Flowrate', 'out_of_range'),
+            (2, 'Pressure', 'out_of_range'),
+            (3, 'Temperature', 'out_of_range'),
+        ])
+
+    def test_duplicates_across_chunks(self):
+        rows = ['P1,Pump,1,2,3', 'P2,Pump,1,2,3', 'P3,Pump,1,2,3',
+                'P1,Pump,1,2,3', 'P2,Pump,1,2,3', 'P2,Pump,1,2,3']
+        validator = validate(rows, chunksize=2)
+        # The first sighting is fine; every later one is reported, whichever chunk it is in
+        self.assertEqual(self.issues(validator), [
+            (4, 'Equipment Name', 'duplicate'),
+            (5, 'Equipment Name', 'duplicate'),
+            (6, 'Equipment Name', 'duplicate'),
+        ])
+
+    def test_short_row(self):
+        validator = validate(['P1,Pump,1,2,3', 'P2,Pump,1', 'P3,Pump,1,2,3'])
+        self.assertEqual(self.issues(validator), [
+            (2, 'Pressure', 'missing'),
+            (2, 'Temperature', 'missing'),
+        ])
+        self.assertEqual(validator.invalid_rows, 1)
+
+    def test_long_first_row(self):
+        # Without index_col=False pandas would make Equipment Name the index
+        with self.assertRaisesRegex(pd.errors.ParserError, 'more fields than the header'):
+            validate(['P1,Pump,1,2,3,extra', 'P2,Pump,1,2,3'])
+
+    def test_long_later_row(self):
+        with self.assertRaisesRegex(pd.errors.ParserError, 'line 3'):
+            validate(['P1,Pump,1,2,3', 'P2,Pump,1,2,3,extra'], chunksize=10)
+
+    def test_report_truncated(self):
+        validator = ChunkValidator(max_reported=1)
+        for chunk in chunks(['P1,Pump,-1,2,3', 'P2,Pump,-1,2,3']):
+            validator.check(chunk)
+        report = validator.report()
+        self.assertEqual(report['invalid_rows'], 2)
+        self.assertEqual(len(report['rows']), 1)
+        self.assertTrue(report['rows_truncated'])
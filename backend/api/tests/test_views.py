@@ -0,0 +1,129 @@
+from datetime import timedelta
+from hashlib import sha256
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.models import Dataset, Equipment, IngestJob
+
+
+class PendingDatasetTests(TestCase):
+    """Datasets still being ingested are not served, or cached, by any read view"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(
+            filename='plant.csv', total_rows=0, is_ready=False
+        )
+        Equipment.objects.create(
+            dataset=cls.dataset, equipment_name='P1', equipment_type='Pump',
+            flowrate=10.0, pressure=5.0, temperature=80.0
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_read_views_return_404(self):
+        for path in [
+            '', 'stats/', 'outliers/', 'histograms/', 'export/',
+            'rows/', 'generate_pdf/',
+        ]:
+            with self.subTest(path=path):
+                response = self.client.get(f'/api/datasets/{self.dataset.id}/{path}')
+                self.assertEqual(response.status_code, 404)
+                self.assertFalse(response.has_header('ETag'))
+
+    async def test_async_read_views_return_404(self):
+        for path in ['', 'stats/']:
+            with self.subTest(path=path):
+                response = await self.async_client.get(f'/api/async/datasets/{self.dataset.id}/{path}')
+                self.assertEqual(response.status_code, 404)
+
+    def test_served_once_ready(self):
+        self.assertEqual(self.client.get(f'/api/datasets/{self.dataset.id}/').status_code, 404)
+        Dataset.objects.filter(id=self.dataset.id).update(is_ready=True, total_rows=1)
+        self.assertEqual(self.client.get(f'/api/datasets/{self.dataset.id}/').status_code, 200)
+
+
+CSV = (
+    b'Equipment Name,Type,Flowrate,Pressure,Temperature\n'
+    b'P1,Pump,10.0,5.0,80.0\n'
+    b'V1,Valve,3.0,2.0,60.0\n'
+)
+
+
+@override_settings(INGEST_JOB_STALE_SECONDS=60, REPORT_PRERENDER=False)
+class UploadDedupTests(TestCase):
+    """Re-uploads of a file that is already stored, or still being ingested"""
+
+    def upload(self, **params):
+        return self.client.post(
+            '/api/datasets/upload/', {'file': SimpleUploadedFile('plant.csv', CSV), **params}
+        )
+
+    def test_reupload_answers_with_dataset(self):
+        first = self.upload()
+        self.assertEqual(first.status_code, 201)
+        second = self.upload()
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.json()['duplicate'])
+        self.assertEqual(second.json()['dataset_id'], first.json()['dataset_id'])
+
+    def test_reupload_of_pending_job_answers_with_job(self):
+        job = IngestJob.objects.create(
+            filename='plant.csv', file_path='/nonexistent', content_hash=sha256(CSV).hexdigest()
+        )
+        for params in [{}, {'mode': 'job'}]:
+            with self.subTest(params=params):
+                response = self.upload(**params)
+                self.assertEqual(response.status_code, 202)
+                self.assertTrue(response.json()['duplicate'])
+                self.assertEqual(response.json()['job_id'], job.id)
+        self.assertEqual(IngestJob.objects.count(), 1)
+        self.assertEqual(Dataset.objects.count(), 0)
+
+    def test_reupload_of_dataset_being_ingested_answers_with_job(self):
+        digest = sha256(CSV).hexdigest()
+        job = IngestJob.objects.create(
+            filename='plant.csv', file_path='/nonexistent', content_hash=digest,
+            status=IngestJob.STATUS_RUNNING, heartbeat_at=timezone.now()
+        )
+        Dataset.objects.create(filename='plant.csv', total_rows=0, is_ready=False, content_hash=digest)
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['job_id'], job.id)
+
+    def test_partial_dataset_of_dead_job_is_reclaimed(self):
+        digest = sha256(CSV).hexdigest()
+        long_ago = timezone.now() - timedelta(hours=1)
+        cases = {
+            'failed': {'status': IngestJob.STATUS_FAILED},
+            'stale': {'status': IngestJob.STATUS_RUNNING, 'heartbeat_at': long_ago},
+            'gone': None,
+        }
+        for case, job_fields in cases.items():
+            with self.subTest(case=case):
+                Dataset.objects.all().delete()
+                IngestJob.objects.all().delete()
+                partial = Dataset.objects.create(
+                    filename='plant.csv', total_rows=0, is_ready=False, content_hash=digest
+                )
+                if job_fields:
+                    IngestJob.objects.create(
+                        filename='plant.csv', file_path='/nonexistent', content_hash=digest,
+                        **job_fields
+                    )
+                response = self.upload()
+                self.assertEqual(response.status_code, 201)
+                self.assertNotEqual(response.json()['dataset_id'], partial.id)
+                self.assertFalse(Dataset.objects.filter(id=partial.id).exists())
+                self.assertFalse(IngestJob.objects.filter(status=IngestJob.STATUS_RUNNING).exists())
+
+    def test_forced_copy(self):
+        IngestJob.objects.create(
+            filename='plant.csv', file_path='/nonexistent', content_hash=sha256(CSV).hexdigest()
+        )
+        response = self.upload(force='true')
+        self.assertEqual(response.status_code, 201)
@@ -4,11 +4,21 @@ from .views import (
     login, 
     get_datasets, 
     upload_dataset,
+    append_dataset,
     get_dataset_detail,
     auth_status,
     logout_view,
-    generate_pdf
+    generate_pdf,
+    ingest_job_status,
+    get_dataset_stats,
+    get_dataset_outliers,
+    get_dataset_histograms,
+    export_dataset,
+    stream_dataset_rows,
+    equipment_history,
+    metrics_view
 )
+from .async_views import aget_datasets, aget_dataset_detail, aget_dataset_stats
 
 urlpatterns = [
     # Auth endpoints (matching frontend expectations)
@@ -21,5 +31,23 @@ urlpatterns = [
     path('datasets/', get_datasets, name='get_datasets'),
     path('datasets/<int:dataset_id>/', get_dataset_detail, name='dataset_detail'),
     path('datasets/upload/', upload_dataset, name='upload_dataset'),
+    path('datasets/<int:dataset_id>/append/', append_dataset, name='append_dataset'),
+    path('datasets/jobs/<int:job_id>/', ingest_job_status, name='ingest_job_status'),
+    path('datasets/<int:dataset_id>/stats/', get_dataset_stats, name='dataset_stats'),
+    path('datasets/<int:dataset_id>/outliers/', get_dataset_outliers, name='dataset_outliers'),
+    path('datasets/<int:dataset_id>/histograms/', get_dataset_histograms, name='dataset_histograms'),
+    path('datasets/<int:dataset_id>/export/', export_dataset, name='export_dataset'),
+    path('datasets/<int:dataset_id>/rows/', stream_dataset_rows, name='dataset_rows'),
     path('datasets/<int:dataset_id>/generate_pdf/', generate_pdf, name='generate_pdf'),
+    
+    # Async variants of the read endpoints, for ASGI deployments
+    path('async/datasets/', aget_datasets, name='async_get_datasets'),
+    path('async/datasets/<int:dataset_id>/', aget_dataset_detail, name='async_dataset_detail'),
+    path('async/datasets/<int:dataset_id>/stats/', aget_dataset_stats, name='async_dataset_stats'),
+
+    # Equipment across datasets
+    path('equipment/<str:equipment_name>/history/', equipment_history, name='equipment_history'),
+    
+    # Prometheus scrape target
+    path('metrics/', metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+Column-wise validation of uploaded CSV rows.
+
+Every check runs on whole chunk columns (pandas/NumPy masks), never row
+by row. ``ChunkValidator`` is fed the chunks of one file in order and
+keeps what it needs to check across chunks (row numbers and the hashes
+of equipment names already seen), so problems are found wherever they
+are in the file.
+
+Checks, with the issue name used in reports:
+
+* ``missing``      - empty cell in a required column
+* ``not_numeric``  - Flowrate/Pressure/Temperature that isn't a finite number
+* ``out_of_range`` - number outside ``NUMERIC_RANGES``
+* ``too_long``     - text longer than the database column allows
+* ``duplicate``    - Equipment Name that already appeared earlier in the file
+
+Rows are numbered from 1 for the first data row after the header.
+"""
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .models import Equipment
+
+
+# Physically possible values; anything outside is a typo or a unit mix-up
+# (Temperature is in °C, so below absolute zero means Kelvin or a bad sign)
+NUMERIC_RANGES = {
+    'Flowrate': (0.0, None),
+    'Pressure': (0.0, None),
+    'Temperature': (-273.15, None),
+}
+
+# Offending values are cut to this many characters in reports
+REPORTED_VALUE_LENGTH = 50
+
+# Text column -> database field it is stored in (for the length limit)
+TEXT_COLUMNS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'equipment_type',
+}
+
+
+class ChunkValidator:
+    """Validate and coerce the chunks of one uploaded file.
+
+    ``check`` returns the chunk with its numeric columns converted to
+    floats. Once any chunk has had problems ``failed`` is True and the
+    caller should stop storing rows, but keep feeding chunks so the
+    report covers the whole file.
+    """
+
+    def __init__(self, max_reported=None):
+        self.max_reported = (
+            settings.VALIDATION_MAX_REPORTED_ROWS if max_reported is None else max_reported
+        )
+        self.rows_seen = 0
+        self.invalid_rows = 0
+        self.issue_counts = {}
+        self.examples = []
+        self._seen_names = np.empty(0, dtype=np.uint64)
+
+    @property
+    def failed(self):
+        return self.invalid_rows > 0
+
+    def check(self, chunk):
+        row_numbers = np.arange(self.rows_seen + 1, self.rows_seen + len(chunk) + 1)
+        self.rows_seen += len(chunk)
+        invalid = np.zeros(len(chunk), dtype=bool)
+
+        for column, field in TEXT_COLUMNS.items():
+            values = chunk[column]
+            text = values.astype(str)
+            missing = values.isna().to_numpy() | (text.str.strip() == '').to_numpy()
+            max_length = Equipment._meta.get_field(field).max_length
+            too_long = (text.str.len() > max_length).to_numpy() & ~missing
+            invalid |= self._record(column, 'missing', missing, values, row_numbers)
+            invalid |= self._record(column, 'too_long', too_long, values, row_numbers)
+
+        names = chunk['Equipment Name']
+        duplicate = self._duplicates(names) & ~names.isna().to_numpy()
+        invalid |= self._record('Equipment Name', 'duplicate', duplicate, names, row_numbers)
+
+        for column, (low, high) in NUMERIC_RANGES.items():
+            raw = chunk[column]
+            numbers = pd.to_numeric(raw, errors='coerce').astype(float)
+            missing = raw.isna().to_numpy()
+            values = numbers.to_numpy()
+            not_numeric = ~np.isfinite(values) & ~missing
+            out_of_range = np.zeros(len(chunk), dtype=bool)
+            if low is not None:
+                out_of_range |= values < low
+            if high is not None:
+                out_of_range |= values > high
+            invalid |= self._record(column, 'missing', missing, raw, row_numbers)
+            invalid |= self._record(column, 'not_numeric', not_numeric, raw, row_numbers)
+            invalid |= self._record(column, 'out_of_range', out_of_range, raw, row_numbers)
+            chunk[column] = numbers
+
+        self.invalid_rows += int(invalid.sum())
+        return chunk
+
+    def _duplicates(self, names):
+        """Mask of names seen earlier in this chunk or in an earlier one.
+
+        Names are compared by 64-bit hash; the hashes seen so far are kept
+        as one sorted array, 8 bytes per distinct name.
+        """
+        hashes = pd.util.hash_pandas_object(
+            names.astype(str), index=False, categorize=False
+        ).to_numpy()
+        if not len(hashes):
+            return np.zeros(0, dtype=bool)
+        order = np.argsort(hashes)
+        ordered = hashes[order]
+
+        # Group equal hashes; only the earliest row of a group is a first sighting
+        starts = np.flatnonzero(np.concatenate([[True], ordered[1:] != ordered[:-1]]))
+        first = np.minimum.reduceat(order, starts)
+        distinct = ordered[starts]
+        # Drop the groups already seen in earlier chunks (sorted needles keep
+        # the lookups cache friendly)
+        positions = np.searchsorted(self._seen_names, distinct)
+        found = positions < len(self._seen_names)
+        found[found] = self._seen_names[positions[found]] == distinct[found]
+
+        duplicate = np.ones(len(hashes), dtype=bool)
+        duplicate[first[~found]] = False
+        # Both parts are sorted runs, which the stable sort merges in linear time
+        self._seen_names = np.sort(
+            np.concatenate([self._seen_names, distinct[~found]]), kind='stable'
+        )
+        return duplicate
+
+    def _record(self, column, issue, mask, values, row_numbers):
+        count = int(mask.sum())
+        if not count:
+            return mask
+        key = f'{column}: {issue}'
+        self.issue_counts[key] = self.issue_counts.get(key, 0) + count
+
+        room = self.max_reported - len(self.examples)
+        if room > 0:
+            positions = np.flatnonzero(mask)[:room]
+            for position in positions:
+                value = values.iloc[position]
+                self.examples.append({
+                    'row': int(row_numbers[position]),
+                    'column': column,
+                    'issue': issue,
+                    'value': None if pd.isna(value) else str(value)[:REPORTED_VALUE_LENGTH],
+                })
+        return mask
+
+    def report(self):
+        """Compact description of the problems found, for a 400 response"""
+        rows = sorted(self.examples, key=lambda example: example['row'])
+        return {
+            'rows_checked': self.rows_seen,
+            'invalid_rows': self.invalid_rows,
+            'issues': self.issue_counts,
+            'rows': rows,
+            'rows_truncated': sum(self.issue_counts.values()) > len(rows),
+        }
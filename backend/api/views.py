@@ -3,14 +3,42 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework import status
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate, logout
-from django.http import HttpResponse
-
-from .models import Dataset, Equipment
-
-import pandas as pd
-import io
+from django.db.models import Count
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+from django.urls import reverse
+
+from .models import Dataset, Equipment, IngestJob
+from .caching import conditional_cached, dataset_state, list_state, make_etag
+from .ingest import (
+    DuplicateUpload,
+    IngestError,
+    append_csv,
+    content_hash,
+    find_duplicate,
+    ingest_csv
+)
+from .jobs import create_job, find_pending_job, release_hash
+from . import metrics
+from .exports import (
+    EXPORT_FORMATS,
+    EXPORT_VERSION,
+    ExportUnavailable,
+    ensure_available,
+    export_npz,
+    export_parquet,
+    iter_arrow_stream
+)
+from .filters import FilterError, parse_in_filter, parse_ordering, parse_range_filters
+from .stats import StatsError, grouped_stats, parse_percentiles
+from .outliers import OutlierError, describe_flags, outlier_rows, parse_flag_mask
+from .histograms import HistogramError, dataset_histograms, parse_bins, parse_columns
+from .pagination import PaginationError, keyset_page, parse_fields, parse_limit, query_params
+from .streaming import STREAM_FORMATS, iter_csv, iter_json, iter_ndjson
+from .reports import open_report, schedule_prerender
 
 
 # =========================
@@ -77,22 +105,145 @@ def auth_status(request):
 # DATASET VIEWS
 # =========================
 
-@api_view(['GET'])
-def get_datasets(request):
-    datasets = Dataset.objects.all()
+# Public field name -> (values_list columns, converter) for dataset listings
+DATASET_FIELDS = {
+    'id': (['id'], None),
+    'filename': (['filename'], None),
+    'uploaded_at': (['uploaded_at'], None),
+    'total_rows': (['total_rows'], None),
+    'summary': (Dataset.SUMMARY_FIELDS, Dataset.build_summary),
+    'uploaded_by': (['uploaded_by__username'], lambda username: username or 'Anonymous'),
+}
+
+# Columns the dataset list can be filtered (<field>__gt etc.) and sorted on
+DATASET_FILTER_FIELDS = ['avg_flowrate', 'avg_pressure', 'avg_temperature', 'total_rows', 'uploaded_at']
+DATASET_ORDERING_FIELDS = DATASET_FILTER_FIELDS + ['filename', 'id']
+
+EQUIPMENT_FIELDS = [
+    'id',
+    'equipment_name',
+    'equipment_type',
+    'flowrate',
+    'pressure',
+    'temperature'
+]
+
+
+# Equipment row filters and sort keys of the dataset detail endpoint
+EQUIPMENT_FILTER_FIELDS = ['flowrate', 'pressure', 'temperature']
+EQUIPMENT_ORDERING_FIELDS = EQUIPMENT_FIELDS
+
+
+# Output name -> column for the equipment history endpoint
+HISTORY_COLUMNS = {
+    'dataset_id': 'dataset_id',
+    'filename': 'dataset__filename',
+    'uploaded_at': 'dataset__uploaded_at',
+    'equipment_type': 'equipment_type',
+    'flowrate': 'flowrate',
+    'pressure': 'pressure',
+    'temperature': 'temperature',
+}
+
+
+def project_rows(rows, fields, field_map):
+    """Turn values_list tuples into dicts, applying per-field converters.
+
+    ``rows`` hold the columns of every field in ``fields``, in order.
+    """
+    layout = []
+    start = 0
+    for name in fields:
+        columns, convert = field_map[name]
+        layout.append((name, start, start + len(columns), convert))
+        start += len(columns)
+
     data = []
+    for row in rows:
+        item = {}
+        for name, begin, end, convert in layout:
+            if convert:
+                item[name] = convert(*row[begin:end])
+            else:
+                item[name] = row[begin]
+        data.append(item)
+    return data
+
+
+def dataset_list_query(request):
+    """Parse the dataset list parameters into ``(fields, keyset_page kwargs)``"""
+    fields = parse_fields(request, list(DATASET_FIELDS))
+    limit = parse_limit(
+        request, settings.DATASET_PAGE_SIZE, settings.DATASET_PAGE_SIZE_MAX
+    )
+    filters = parse_range_filters(request, Dataset, DATASET_FILTER_FIELDS)
+    ordering = parse_ordering(
+        request, DATASET_ORDERING_FIELDS, default=['-uploaded_at', '-id']
+    )
+    return fields, {
+        'queryset': Dataset.objects.filter(is_ready=True, **filters),
+        'ordering': ordering,
+        'columns': [column for name in fields for column in DATASET_FIELDS[name][0]],
+        'cursor': query_params(request).get('cursor'),
+        'limit': limit,
+    }
 
-    for dataset in datasets:
-        data.append({
-            'id': dataset.id,
-            'filename': dataset.filename,
-            'uploaded_at': dataset.uploaded_at,
-            'total_rows': dataset.total_rows,
-            'summary': dataset.get_summary(),
-            'uploaded_by': dataset.uploaded_by.username if dataset.uploaded_by else 'Anonymous'
-        })
 
-    return Response(data)
+def next_page_headers(request, next_cursor):
+    """``X-Next-Cursor`` and ``Link`` headers pointing at the next page"""
+    query = query_params(request).copy()
+    query['cursor'] = next_cursor
+    return {
+        'X-Next-Cursor': next_cursor,
+        'Link': f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"',
+    }
+
+
+@api_view(['GET'])
+@conditional_cached('dataset_list', list_state)
+def get_datasets(request):
+    try:
+        fields, page = dataset_list_query(request)
+        rows, next_cursor = keyset_page(**page)
+    except (PaginationError, FilterError) as e:
+        return Response({'error': str(e)}, status=400)
+
+    response = Response(project_rows(rows, fields, DATASET_FIELDS))
+    if next_cursor:
+        for header, value in next_page_headers(request, next_cursor).items():
+            response[header] = value
+    return response
+
+
+def job_response(job, message, **extra):
+    return Response({
+        'message': message,
+        **extra,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('ingest_job_status', args=[job.id])
+    }, status=202)
+
+
+def duplicate_response(dataset):
+    if not dataset.is_ready:
+        # Still being ingested by a background job: answer with that job
+        job = find_pending_job(dataset.content_hash)
+        if job is None:
+            return Response({
+                'error': 'This file is still being ingested',
+                'dataset_id': dataset.id
+            }, status=409)
+        return job_response(job, 'This file is already being processed', duplicate=True)
+
+    return Response({
+        'message': 'This file was already uploaded',
+        'duplicate': True,
+        'dataset_id': dataset.id,
+        'filename': dataset.filename,
+        'total_rows': dataset.total_rows,
+        'summary': dataset.get_summary()
+    }, status=200)
 
 
 @api_view(['POST'])
@@ -104,57 +255,41 @@ def upload_dataset(request):
         if not file:
             return Response({'error': 'No file provided'}, status=400)
 
-        # Read CSV
-        df = pd.read_csv(io.StringIO(file.read().decode('utf-8')))
-
-        # Required columns
-        required_columns = [
-            'Equipment Name',
-            'Type',
-            'Flowrate',
-            'Pressure',
-            'Temperature'
-        ]
-
-        if not all(col in df.columns for col in required_columns):
-            return Response({
-                'error': 'Missing required columns',
-                'required': required_columns,
-                'found': list(df.columns)
-            }, status=400)
-
-        # Summary stats
-        summary = {
-            'avg_flowrate': float(df['Flowrate'].mean()),
-            'avg_pressure': float(df['Pressure'].mean()),
-            'avg_temperature': float(df['Temperature'].mean()),
-            'equipment_types': df['Type'].value_counts().to_dict()
-        }
-
-        # Create Dataset
-        dataset = Dataset.objects.create(
-            filename=file.name,
-            total_rows=len(df),
-            uploaded_by=request.user if request.user.is_authenticated else None
-        )
-        dataset.set_summary(summary)
-        dataset.save()
-
-        # Create Equipment records
-        equipment_objects = []
-        for _, row in df.iterrows():
-            equipment_objects.append(
-                Equipment(
-                    dataset=dataset,
-                    equipment_name=row['Equipment Name'],
-                    equipment_type=row['Type'],
-                    flowrate=row['Flowrate'],
-                    pressure=row['Pressure'],
-                    temperature=row['Temperature']
-                )
+        uploaded_by = request.user if request.user.is_authenticated else None
+
+        # The same file again: answer with the dataset it produced, or the
+        # job still ingesting it, unless the client forces a new copy
+        force = str(request.query_params.get('force', request.data.get('force', ''))).lower()
+        digest = None
+        if force not in ('1', 'true', 'yes'):
+            digest = content_hash(file)
+            # Drop the partial dataset of a job that failed or died, if any
+            release_hash(digest)
+            existing = find_duplicate(digest)
+            if existing is not None:
+                return duplicate_response(existing)
+            pending = find_pending_job(digest)
+            if pending is not None:
+                return job_response(pending, 'This file is already being processed', duplicate=True)
+
+        # Job mode: hand the file to a background worker and return at once
+        if request.query_params.get('mode', request.data.get('mode')) == 'job':
+            job = create_job(file, uploaded_by=uploaded_by, digest=digest)
+            return job_response(job, 'Upload accepted for processing')
+
+        try:
+            dataset, summary = ingest_csv(
+                file,
+                file.name,
+                uploaded_by=uploaded_by,
+                digest=digest
             )
+        except DuplicateUpload as e:
+            return duplicate_response(e.dataset)
+        except IngestError as e:
+            return Response(e.payload, status=400)
 
-        Equipment.objects.bulk_create(equipment_objects)
+        schedule_prerender(dataset)
 
         return Response({
             'message': 'Dataset uploaded successfully',
@@ -168,35 +303,363 @@ def upload_dataset(request):
         return Response({'error': str(e)}, status=500)
 
 
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def append_dataset(request, dataset_id):
+    """Append the rows of a CSV file to an existing dataset"""
+    try:
+        file = request.FILES.get('file')
+        if not file:
+            return Response({'error': 'No file provided'}, status=400)
+
+        try:
+            dataset = Dataset.objects.get(id=dataset_id, is_ready=True)
+        except Dataset.DoesNotExist:
+            return Response({'error': 'Dataset not found'}, status=404)
+
+        try:
+            dataset, rows_appended = append_csv(dataset, file)
+        except IngestError as e:
+            return Response(e.payload, status=400)
+
+        return Response({
+            'message': 'Rows appended successfully',
+            'dataset_id': dataset.id,
+            'filename': dataset.filename,
+            'rows_appended': rows_appended,
+            'total_rows': dataset.total_rows,
+            'summary': dataset.get_summary()
+        })
+
+    except Exception as e:
+        return Response({'error': str(e)}, status=500)
+
+
+@api_view(['GET'])
+def ingest_job_status(request, job_id):
+    try:
+        job = IngestJob.objects.get(id=job_id)
+    except IngestJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=404)
+
+    return Response({
+        'id': job.id,
+        'filename': job.filename,
+        'status': job.status,
+        'rows_processed': job.rows_processed,
+        'rows_per_second': round(job.rows_per_second(), 1),
+        'dataset_id': job.dataset_id,
+        'error': job.error,
+        'error_details': job.error_details,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at
+    })
+
+
+def equipment_query(request, dataset_id):
+    """Parse the dataset detail parameters into ``(fields, filters, keyset_page kwargs)``"""
+    fields = parse_fields(request, EQUIPMENT_FIELDS)
+    limit = parse_limit(
+        request, settings.EQUIPMENT_PAGE_SIZE, settings.EQUIPMENT_PAGE_SIZE_MAX
+    )
+    filters = parse_range_filters(request, Equipment, EQUIPMENT_FILTER_FIELDS)
+    types = parse_in_filter(request, 'equipment_type')
+    if types:
+        filters['equipment_type__in'] = types
+    name_prefix = query_params(request).get('name_prefix')
+    if name_prefix:
+        filters['equipment_name__startswith'] = name_prefix
+    ordering = parse_ordering(request, EQUIPMENT_ORDERING_FIELDS, default=['id'])
+
+    return fields, filters, {
+        'queryset': Equipment.objects.filter(dataset_id=dataset_id, **filters),
+        'ordering': ordering,
+        'columns': fields,
+        'cursor': query_params(request).get('cursor'),
+        'limit': limit,
+    }
+
+
+def type_counts_query(queryset):
+    """``(equipment_type, count)`` rows of a filtered equipment queryset"""
+    return queryset.values_list('equipment_type').annotate(count=Count('id')).order_by()
+
+
+def dataset_detail_payload(dataset, fields, rows, next_cursor, matching_types):
+    return {
+        'id': dataset.id,
+        'filename': dataset.filename,
+        'uploaded_at': dataset.uploaded_at,
+        'total_rows': dataset.total_rows,
+        'summary': dataset.get_summary(),
+        'matching_rows': sum(matching_types.values()) if matching_types is not None else None,
+        'matching_types': matching_types,
+        'equipment': [dict(zip(fields, row)) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+
 @api_view(['GET'])
+@conditional_cached('dataset_detail', dataset_state)
 def get_dataset_detail(request, dataset_id):
     try:
-        dataset = Dataset.objects.get(id=dataset_id)
-        equipment = dataset.equipment.all()
-
-        equipment_data = [
-            {
-                'id': eq.id,
-                'equipment_name': eq.equipment_name,
-                'equipment_type': eq.equipment_type,
-                'flowrate': eq.flowrate,
-                'pressure': eq.pressure,
-                'temperature': eq.temperature
-            }
-            for eq in equipment
-        ]
+        dataset = Dataset.objects.get(id=dataset_id, is_ready=True)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=404)
 
-        return Response({
+    try:
+        fields, filters, page = equipment_query(request, dataset.id)
+        rows, next_cursor = keyset_page(**page)
+    except (PaginationError, FilterError) as e:
+        return Response({'error': str(e)}, status=400)
+
+    # Match counts come with the first page only; unfiltered they are the
+    # stored per-type counts, filtered one grouped query
+    matching_types = None
+    if not page['cursor']:
+        if filters:
+            matching_types = dict(type_counts_query(page['queryset']))
+        else:
+            matching_types = dataset.equipment_types or {}
+
+    return Response(dataset_detail_payload(dataset, fields, rows, next_cursor, matching_types))
+
+
+@api_view(['GET'])
+@conditional_cached('dataset_stats', dataset_state)
+def get_dataset_stats(request, dataset_id):
+    """Per equipment type statistics, aggregated in the database"""
+    if not Dataset.objects.filter(id=dataset_id, is_ready=True).exists():
+        return Response({'error': 'Dataset not found'}, status=404)
+
+    try:
+        percentiles = parse_percentiles(request.query_params.get('percentiles'))
+    except StatsError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response({
+        'dataset_id': dataset_id,
+        'percentiles': percentiles,
+        'groups': grouped_stats(dataset_id, percentiles)
+    })
+
+
+@api_view(['GET'])
+@conditional_cached('dataset_outliers', dataset_state)
+def get_dataset_outliers(request, dataset_id):
+    """Rows flagged as outliers within their equipment type"""
+    # Stale between an append and the background rebuild
+    stale = Dataset.objects.filter(id=dataset_id, is_ready=True).values_list(
+        'derived_stale', flat=True
+    ).first()
+    if stale is None:
+        return Response({'error': 'Dataset not found'}, status=404)
+
+    try:
+        mask = parse_flag_mask(
+            request.query_params.get('methods'), request.query_params.get('columns')
+        )
+        fields = parse_fields(request, EQUIPMENT_FIELDS)
+        limit = parse_limit(
+            request, settings.EQUIPMENT_PAGE_SIZE, settings.EQUIPMENT_PAGE_SIZE_MAX
+        )
+        queryset = outlier_rows(dataset_id, mask)
+        rows, next_cursor = keyset_page(
+            queryset,
+            ordering=['id'],
+            columns=fields + ['outlier_flags'],
+            cursor=request.query_params.get('cursor'),
+            limit=limit
+        )
+    except (OutlierError, PaginationError) as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response({
+        'dataset_id': dataset_id,
+        'stale': stale,
+        'thresholds': {
+            'zscore': settings.OUTLIER_ZSCORE,
+            'iqr_factor': settings.OUTLIER_IQR_FACTOR
+        },
+        'total_outliers': queryset.count(),
+        'outliers': [
+            {**dict(zip(fields, row[:-1])), 'flags': describe_flags(row[-1] & mask)}
+            for row in rows
+        ],
+        'next_cursor': next_cursor
+    })
+
+
+@api_view(['GET'])
+@conditional_cached('dataset_histograms', dataset_state)
+def get_dataset_histograms(request, dataset_id):
+    """Fixed-width and equal-frequency histograms, overall and per type"""
+    # Stale between an append and the background rebuild
+    stale = Dataset.objects.filter(id=dataset_id, is_ready=True).values_list(
+        'derived_stale', flat=True
+    ).first()
+    if stale is None:
+        return Response({'error': 'Dataset not found'}, status=404)
+
+    try:
+        bins = parse_bins(request.query_params.get('bins'))
+        columns = parse_columns(request.query_params.get('columns'))
+    except HistogramError as e:
+        return Response({'error': str(e)}, status=400)
+    by_type = request.query_params.get('by_type', 'true').lower() not in ('0', 'false', 'no')
+
+    return Response({
+        'dataset_id': dataset_id,
+        'stale': stale,
+        'bins': bins,
+        'histograms': dataset_histograms(dataset_id, bins, columns, by_type)
+    })
+
+
+@api_view(['GET'])
+@conditional_cached('equipment_history', list_state)
+def equipment_history(request, equipment_name):
+    """Readings of one piece of equipment across all datasets, oldest upload first"""
+    try:
+        limit = parse_limit(
+            request, settings.DATASET_PAGE_SIZE, settings.DATASET_PAGE_SIZE_MAX
+        )
+        cursor = request.query_params.get('cursor')
+        rows, next_cursor = keyset_page(
+            Equipment.objects.filter(equipment_name=equipment_name, dataset__is_ready=True),
+            ordering=['dataset__uploaded_at', 'dataset_id', 'id'],
+            columns=list(HISTORY_COLUMNS.values()),
+            cursor=cursor,
+            limit=limit
+        )
+    except PaginationError as e:
+        return Response({'error': str(e)}, status=400)
+
+    if not rows and not cursor:
+        return Response({'error': 'Equipment not found'}, status=404)
+
+    return Response({
+        'equipment_name': equipment_name,
+        'history': [dict(zip(HISTORY_COLUMNS, row)) for row in rows],
+        'next_cursor': next_cursor
+    })
+
+
+# =========================
+# COLUMNAR EXPORT
+# =========================
+
+def export_etag(request, dataset_id):
+    state = dataset_state(dataset_id)
+    return make_etag(f'dataset_export:v{EXPORT_VERSION}', state[1], request) if state else None
+
+
+def rows_etag(request, dataset_id):
+    state = dataset_state(dataset_id)
+    return make_etag('dataset_rows', state[1], request) if state else None
+
+
+def dataset_last_modified(request, dataset_id):
+    state = dataset_state(dataset_id)
+    return state[2] if state else None
+
+
+# Plain Django view: DRF reserves the ``format`` query parameter for
+# renderer selection
+@require_GET
+@condition(etag_func=export_etag, last_modified_func=dataset_last_modified)
+def export_dataset(request, dataset_id):
+    export_format = request.GET.get('format', 'npz')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({
+            'error': 'Unsupported export format',
+            'supported': list(EXPORT_FORMATS)
+        }, status=400)
+
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, is_ready=True)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    try:
+        ensure_available(export_format)
+    except ExportUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=501)
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    if export_format == 'arrow':
+        response = StreamingHttpResponse(iter_arrow_stream(dataset.id), content_type=content_type)
+    elif export_format == 'parquet':
+        response = HttpResponse(export_parquet(dataset.id), content_type=content_type)
+    else:
+        response = HttpResponse(export_npz(dataset.id), content_type=content_type)
+
+    response['Content-Disposition'] = (
+        f'attachment; filename="dataset_{dataset.id}.{extension}"'
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+# =========================
+# STREAMED ROWS
+# =========================
+
+# Plain Django view, like the export: the body is a generator, so it can't
+# go through a DRF renderer or the response cache
+@require_GET
+@condition(etag_func=rows_etag, last_modified_func=dataset_last_modified)
+def stream_dataset_rows(request, dataset_id):
+    """Every equipment row of a dataset, streamed as JSON, NDJSON or CSV"""
+    stream_format = request.GET.get('format', 'json')
+    if stream_format not in STREAM_FORMATS:
+        return JsonResponse({
+            'error': 'Unsupported stream format',
+            'supported': list(STREAM_FORMATS)
+        }, status=400)
+
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, is_ready=True)
+    except Dataset.DoesNotExist:
+        return JsonResponse({'error': 'Dataset not found'}, status=404)
+
+    try:
+        fields = parse_fields(request, EQUIPMENT_FIELDS)
+    except PaginationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    if stream_format == 'json':
+        content = iter_json({
             'id': dataset.id,
             'filename': dataset.filename,
             'uploaded_at': dataset.uploaded_at,
             'total_rows': dataset.total_rows,
             'summary': dataset.get_summary(),
-            'equipment': equipment_data
-        })
+        }, dataset.id, fields)
+    elif stream_format == 'ndjson':
+        content = iter_ndjson(dataset.id, fields)
+    else:
+        content = iter_csv(dataset.id, fields)
+
+    content_type, extension = STREAM_FORMATS[stream_format]
+    response = StreamingHttpResponse(content, content_type=content_type)
+    if stream_format == 'csv':
+        response['Content-Disposition'] = (
+            f'attachment; filename="dataset_{dataset.id}.{extension}"'
+        )
+    response['Cache-Control'] = 'no-cache'
+    return response
 
-    except Dataset.DoesNotExist:
-        return Response({'error': 'Dataset not found'}, status=404)
+
+# =========================
+# METRICS
+# =========================
+
+@require_GET
+def metrics_view(request):
+    """Request metrics of this process in Prometheus text format"""
+    return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)
 
 
 # =========================
@@ -206,51 +669,13 @@ def get_dataset_detail(request, dataset_id):
 @api_view(['GET'])
 def generate_pdf(request, dataset_id):
     try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.pdfgen import canvas
-
-        dataset = Dataset.objects.get(id=dataset_id)
-
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-
-        # Title
-        p.setFont("Helvetica-Bold", 16)
-        p.drawString(100, 750, f"Equipment Report: {dataset.filename}")
-
-        # Meta
-        p.setFont("Helvetica", 12)
-        y = 700
-        p.drawString(100, y, f"Total Rows: {dataset.total_rows}")
-        y -= 20
-        p.drawString(
-            100, y,
-            f"Uploaded: {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M')}"
-        )
-
-        # Summary
-        summary = dataset.get_summary()
-        y -= 40
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(100, y, "Summary Statistics")
-
-        p.setFont("Helvetica", 10)
-        y -= 20
-        p.drawString(100, y, f"Average Flowrate: {summary.get('avg_flowrate', 0):.2f}")
-        y -= 15
-        p.drawString(100, y, f"Average Pressure: {summary.get('avg_pressure', 0):.2f}")
-        y -= 15
-        p.drawString(100, y, f"Average Temperature: {summary.get('avg_temperature', 0):.2f}")
-
-        p.showPage()
-        p.save()
-
-        buffer.seek(0)
-        response = HttpResponse(buffer, content_type='application/pdf')
-        response['Content-Disposition'] = (
-            f'attachment; filename="report_{dataset_id}.pdf"'
+        dataset = Dataset.objects.get(id=dataset_id, is_ready=True)
+        return FileResponse(
+            open_report(dataset),
+            as_attachment=True,
+            filename=f'report_{dataset_id}.pdf',
+            content_type='application/pdf'
         )
-        return response
 
     except Dataset.DoesNotExist:
         return Response({'error': 'Dataset not found'}, status=404)
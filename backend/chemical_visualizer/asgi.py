@@ -7,5 +7,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_visualizer.settings')
+# Async views run their queries on a new thread per request, and a
+# connection belongs to its thread: persistent connections would leak.
+# Forced rather than defaulted, in case the WSGI value is set globally.
+os.environ['DB_CONN_MAX_AGE'] = '0'
 
 application = get_asgi_application()
@@ -27,8 +27,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',  # First, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware', 
+    'api.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise, without forcing ASGI requests onto threads
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Must be above CommonMiddleware
     'django.middleware.common.CommonMiddleware',
@@ -63,7 +64,13 @@ db_env = os.getenv('DATABASE_URL', '').strip()
 
 if db_env:
     DATABASES = {
-        'default': dj_database_url.config(default=db_env, conn_max_age=600)
+        # Closed after every request unless the server opts in: wsgi.py
+        # keeps connections for 600 s, asgi.py always forces 0 because
+        # connections belong to the per-request ORM thread there, so
+        # persistent ones would never be reused or closed
+        'default': dj_database_url.config(
+            default=db_env, conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '0'))
+        )
     }
 else:
     DATABASES = {
@@ -100,6 +107,84 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Let browser clients read the pagination headers
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor', 'Link', 'ETag', 'Last-Modified', 'Server-Timing']
+
+# --- INGESTION SETTINGS ---
+# Number of CSV rows parsed, validated and inserted at a time during upload
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', '50000'))
+# Rows per INSERT statement when bulk_create is used (SQLite and friends)
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '2000'))
+# Use COPY FROM STDIN on PostgreSQL instead of batched INSERTs
+INGEST_USE_COPY = os.getenv('INGEST_USE_COPY', 'True') == 'True'
+# Background ingest jobs: 'inprocess' runs them on a thread pool inside the
+# web process, 'command' leaves them for `manage.py run_ingest_jobs`
+INGEST_JOB_RUNNER = os.getenv('INGEST_JOB_RUNNER', 'inprocess')
+INGEST_JOB_WORKERS = int(os.getenv('INGEST_JOB_WORKERS', '2'))
+INGEST_JOB_DIR = os.getenv('INGEST_JOB_DIR', os.path.join(BASE_DIR, 'ingest_jobs'))
+# A running job that has not reported progress for this long is taken to
+# have lost its worker (crash, restart) and is failed
+INGEST_JOB_STALE_SECONDS = int(os.getenv('INGEST_JOB_STALE_SECONDS', '900'))
+
+# --- CACHING ---
+# Datasets only change on upload or delete, so read responses are
+# cached and revalidated with ETags
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'chemical-visualizer',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('API_CACHE_MAX_ENTRIES', '500'))},
+    }
+}
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '3600'))
+
+# --- PDF REPORTS ---
+# Rendered reports are cached on disk; bump REPORT_VERSION when the layout changes
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', os.path.join(BASE_DIR, 'report_cache'))
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+REPORT_VERSION = 4
+# Equipment rows fetched per database round trip while drawing the report table
+REPORT_ROW_CHUNK_SIZE = int(os.getenv('REPORT_ROW_CHUNK_SIZE', '2000'))
+# Optional cap on the rows drawn in the report table; 0 draws every row.
+# reportlab keeps every page in memory until the PDF is saved, about 0.4 KB
+# per row (100k rows peak near 42 MB), so very large deployments may set one.
+# A capped report says so on its first page and above the table
+REPORT_MAX_TABLE_ROWS = int(os.getenv('REPORT_MAX_TABLE_ROWS', '0'))
+# Render reports in the background right after a dataset is ingested
+REPORT_PRERENDER = os.getenv('REPORT_PRERENDER', 'True') == 'True'
+
+# --- VALIDATION ---
+# Bad rows listed individually in an upload's error report (all are counted)
+VALIDATION_MAX_REPORTED_ROWS = int(os.getenv('VALIDATION_MAX_REPORTED_ROWS', '100'))
+
+# --- OUTLIERS ---
+# A row is flagged when it is more than OUTLIER_ZSCORE standard deviations from
+# its equipment type's mean, or more than OUTLIER_IQR_FACTOR interquartile
+# ranges outside the type's quartiles
+OUTLIER_ZSCORE = float(os.getenv('OUTLIER_ZSCORE', '3.0'))
+OUTLIER_IQR_FACTOR = float(os.getenv('OUTLIER_IQR_FACTOR', '1.5'))
+
+# --- EXPORTS ---
+# Rows packed per columnar chunk (Arrow record batch / Parquet row group)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '50000'))
+
+# --- STREAMING ---
+# Rows read from the database cursor and encoded per chunk of a streamed response
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '5000'))
+
+# --- PAGINATION ---
+# Default and maximum page sizes for the keyset-paginated list endpoints
+DATASET_PAGE_SIZE = int(os.getenv('DATASET_PAGE_SIZE', '100'))
+DATASET_PAGE_SIZE_MAX = int(os.getenv('DATASET_PAGE_SIZE_MAX', '1000'))
+EQUIPMENT_PAGE_SIZE = int(os.getenv('EQUIPMENT_PAGE_SIZE', '5000'))
+EQUIPMENT_PAGE_SIZE_MAX = int(os.getenv('EQUIPMENT_PAGE_SIZE_MAX', '50000'))
+
+# --- METRICS ---
+# Per-request timings served at /api/metrics/ (Prometheus) and in Server-Timing
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+# Also record peak Python allocations per request (slow; for profiling)
+METRICS_TRACE_MEMORY = os.getenv('METRICS_TRACE_MEMORY', 'False') == 'True'
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
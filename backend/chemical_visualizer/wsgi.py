@@ -7,5 +7,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'chemical_visualizer.settings')
+# Each sync worker thread reuses its database connection between requests
+os.environ.setdefault('DB_CONN_MAX_AGE', '600')
 
 application = get_wsgi_application()
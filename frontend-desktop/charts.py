@@ -0,0 +1,92 @@
+import numpy as np
+from matplotlib.artist import Artist
+
+HISTOGRAM_BINS = 60
+
+
+def grid_thin(x, y, xlim, ylim, width, height):
+    """Indices of the points inside the view, at most one per grid cell.
+
+    The view is split into ``width`` x ``height`` cells (roughly one per
+    few screen pixels), so the number of points kept is bounded by the
+    size of the plot rather than the number of rows, while outliers and
+    the overall shape of the cloud are preserved.
+    """
+    x0, x1 = sorted(xlim)
+    y0, y1 = sorted(ylim)
+    inside = np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))
+    if not len(inside) or x1 == x0 or y1 == y0:
+        return inside
+    cx = ((x[inside] - x0) * ((width - 1) / (x1 - x0))).astype(np.int64)
+    cy = ((y[inside] - y0) * ((height - 1) / (y1 - y0))).astype(np.int64)
+    _, first = np.unique(cy * width + cx, return_index=True)
+    return inside[first]
+
+
+class DecimatedScatter:
+    """Scatter plot of any number of rows that stays interactive.
+
+    Only a thinned subset of the points in view is drawn (see
+    ``grid_thin``), so zooming in reveals more detail. Every pan/zoom step
+    redraws the axes anyway (ticks and grid move with the limits), so the
+    markers are re-thinned as part of that draw, just before they are
+    drawn, rather than blitted separately.
+    """
+
+    def __init__(self, ax, x, y, cell_px=3, **kwargs):
+        self.ax = ax
+        self.x = np.asarray(x, dtype=float)
+        self.y = np.asarray(y, dtype=float)
+        self.cell_px = cell_px
+        self.collection = ax.scatter([], [], **kwargs)
+
+        if len(self.x):
+            ax.set_xlim(*_padded(np.nanmin(self.x), np.nanmax(self.x)))
+            ax.set_ylim(*_padded(np.nanmin(self.y), np.nanmax(self.y)))
+        # Drawn right before the markers, with the final limits and size
+        self._thinner = _BeforeDraw(self._rethin)
+        self._thinner.set_zorder(self.collection.get_zorder() - 0.5)
+        ax.add_artist(self._thinner)
+
+    def visible_points(self):
+        bbox = self.ax.bbox
+        width = max(int(bbox.width / self.cell_px), 1)
+        height = max(int(bbox.height / self.cell_px), 1)
+        rows = grid_thin(self.x, self.y, self.ax.get_xlim(), self.ax.get_ylim(), width, height)
+        return np.column_stack([self.x[rows], self.y[rows]])
+
+    def _rethin(self):
+        self.collection.set_offsets(self.visible_points())
+
+    def disconnect(self):
+        if self._thinner.axes is not None:
+            self._thinner.remove()
+
+
+class _BeforeDraw(Artist):
+    """Invisible artist that calls ``callback`` when the axes draw it"""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+        self.set_in_layout(False)
+
+    def draw(self, renderer):
+        self.callback()
+        # Updating other artists mid-draw must not schedule another draw
+        self.stale = False
+
+
+def draw_histogram(ax, values, bins=HISTOGRAM_BINS, **kwargs):
+    """Histogram drawn from bin counts as a single artist, not one bar per bin"""
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    counts, edges = np.histogram(values, bins=bins)
+    return ax.stairs(counts, edges, fill=True, **kwargs)
+
+
+def _padded(low, high, fraction=0.05):
+    span = (high - low) or abs(high) or 1.0
+    return low - span * fraction, high + span * fraction
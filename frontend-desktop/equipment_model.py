@@ -0,0 +1,190 @@
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class EquipmentTableModel(QAbstractTableModel):
+    """Table model over columnar equipment arrays.
+
+    Rows are pulled from the backend a page at a time as the view scrolls
+    (Qt calls canFetchMore/fetchMore). Sorting and filtering work on an
+    index array over the columns, so no per-cell objects are ever built.
+
+    Both fetchers are asynchronous: ``fetch_page(cursor, callback)`` later
+    calls ``callback(columns, next_cursor)`` where ``columns`` maps each
+    column name to a list of values, and ``fetch_all(callback)`` later
+    calls ``callback(columns)`` with every row, which is needed when
+    sorting or filtering. Results from a previous source are ignored.
+    """
+
+    COLUMNS = [
+        ('equipment_name', 'Equipment Name'),
+        ('equipment_type', 'Type'),
+        ('flowrate', 'Flowrate'),
+        ('pressure', 'Pressure'),
+        ('temperature', 'Temperature'),
+    ]
+    NUMERIC = {'flowrate', 'pressure', 'temperature'}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fetch_page = None
+        self.fetch_all = None
+        self._generation = 0
+        self._clear()
+
+    def _clear(self):
+        self._columns = {
+            name: np.empty(0, dtype=float if name in self.NUMERIC else object)
+            for name, _ in self.COLUMNS
+        }
+        self._order = np.empty(0, dtype=np.int64)  # view row -> storage row
+        self._next_cursor = None
+        self._exhausted = True
+        self._loading = False
+        self._filter_text = ''
+        self._sort = None
+
+    def set_source(self, fetch_page, fetch_all):
+        """Start browsing a new dataset"""
+        self.beginResetModel()
+        self._clear()
+        self._generation += 1
+        self.fetch_page = fetch_page
+        self.fetch_all = fetch_all
+        self._exhausted = False
+        self.endResetModel()
+
+    # -- Qt model interface ---------------------------------------------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.COLUMNS[index.column()][0]
+        if role == Qt.DisplayRole:
+            return str(self._columns[name][self._order[index.row()]])
+        if role == Qt.TextAlignmentRole and name in self.NUMERIC:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return str(section + 1)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self._loading:
+            return
+        self._loading = True
+        generation = self._generation
+        self.fetch_page(
+            self._next_cursor,
+            lambda columns, cursor: self._append_page(generation, columns, cursor)
+        )
+
+    def _append_page(self, generation, columns, next_cursor):
+        if generation != self._generation or self._exhausted:
+            return
+        self._loading = False
+        self._next_cursor = next_cursor
+        self._exhausted = not next_cursor
+
+        start = len(self._columns['equipment_name'])
+        count = len(columns['equipment_name'])
+        if not count:
+            return
+
+        for name, _ in self.COLUMNS:
+            values = np.asarray(columns[name], dtype=self._columns[name].dtype)
+            self._columns[name] = np.concatenate([self._columns[name], values])
+        new_rows = self._sorted(self._filtered_rows(start))
+        self.beginInsertRows(QModelIndex(), len(self._order), len(self._order) + len(new_rows) - 1)
+        self._order = np.concatenate([self._order, new_rows])
+        self.endInsertRows()
+
+    def fetch_failed(self):
+        """Let the view retry after a page request failed"""
+        self._loading = False
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0:
+            # Sort indicator cleared: back to server order, no fetch needed
+            self._sort = None
+            self._refresh()
+            return
+        self._sort = (column, order)
+        if self._ensure_all_rows():
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._order = self._sorted(self._order)
+        self.layoutChanged.emit()
+
+    # -- Filtering ------------------------------------------------------
+
+    def set_filter(self, text):
+        """Show only rows whose name or type contains ``text``"""
+        self._filter_text = text.strip().lower()
+        if self._filter_text and self._ensure_all_rows():
+            return
+        self._refresh()
+
+    def _refresh(self):
+        self.beginResetModel()
+        self._order = self._sorted(self._filtered_rows())
+        self.endResetModel()
+
+    def _filtered_rows(self, start=0):
+        total = len(self._columns['equipment_name'])
+        if not self._filter_text:
+            return np.arange(start, total)
+        needle = self._filter_text
+        names = self._columns['equipment_name'][start:]
+        types = self._columns['equipment_type'][start:]
+        mask = np.fromiter(
+            (needle in str(n).lower() or needle in str(t).lower() for n, t in zip(names, types)),
+            dtype=bool, count=total - start
+        )
+        return np.flatnonzero(mask) + start
+
+    def _sorted(self, rows):
+        if self._sort is None or not len(rows):
+            return rows
+        column, order = self._sort
+        keys = self._columns[self.COLUMNS[column][0]][rows]
+        if keys.dtype == object:
+            keys = keys.astype(str)
+        ranked = rows[np.argsort(keys, kind='stable')]
+        return ranked[::-1] if order == Qt.DescendingOrder else ranked
+
+    def _ensure_all_rows(self):
+        """Request the full dataset if only some pages are loaded.
+
+        Returns True when a request was started; the current sort and
+        filter are applied once the rows arrive.
+        """
+        if self._exhausted:
+            return False
+        self._loading = True
+        generation = self._generation
+        self.fetch_all(lambda columns: self._replace_all(generation, columns))
+        return True
+
+    def _replace_all(self, generation, columns):
+        if generation != self._generation:
+            return
+        for name, _ in self.COLUMNS:
+            self._columns[name] = np.asarray(columns[name], dtype=self._columns[name].dtype)
+        self._exhausted = True
+        self._loading = False
+        self._next_cursor = None
+        self._refresh()
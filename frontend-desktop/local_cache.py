@@ -0,0 +1,85 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class LocalCache:
+    """Persistent on-disk cache of API responses, backed by SQLite.
+
+    Each entry keeps the body together with the ETag the server sent, so
+    it can be revalidated with ``If-None-Match`` while online and served
+    as-is while the backend is unreachable. The total size is capped at
+    ``max_bytes``; least recently used entries are evicted first.
+
+    Safe to use from the network worker threads.
+    """
+
+    def __init__(self, path, max_bytes):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' etag TEXT,'
+            ' body BLOB NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' accessed REAL NOT NULL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def get(self, key):
+        """Return ``(etag, body)`` for ``key``, or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT etag, body FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                'UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key)
+            )
+        return row[0], bytes(row[1])
+
+    def put(self, key, etag, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries (key, etag, body, size, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, etag, sqlite3.Binary(body), len(body), time.time())
+            )
+            self._evict()
+
+    def total_size(self):
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute('DELETE FROM entries')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its cap"""
+        excess = self._db.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        stale = []
+        for key, size in self._db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            stale.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany('DELETE FROM entries WHERE key = ?', stale)
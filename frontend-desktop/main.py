@@ -1,24 +1,57 @@
+import io
+import json
+import os
 import sys
 import requests
+import numpy as np
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                               QHBoxLayout, QPushButton, QLabel, QFileDialog, 
-                              QTableWidget, QTableWidgetItem, QMessageBox, 
-                              QComboBox, QGroupBox, QLineEdit, QTabWidget)
-from PyQt5.QtCore import Qt
+                              QTableView, QMessageBox, 
+                              QComboBox, QGroupBox, QLineEdit, QTabWidget,
+                              QProgressBar)
+from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtGui import QFont
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 
+from charts import DecimatedScatter, draw_histogram
+from equipment_model import EquipmentTableModel
+from local_cache import LocalCache
+from network import CHUNK_SIZE, NetworkManager, stream_download, stream_upload
+
 API_BASE_URL = 'http://localhost:8000/api'
+EQUIPMENT_PAGE_SIZE = 2000  # Rows fetched per page as the table scrolls
+DATASET_PAGE_SIZE = 1000  # Datasets per request while loading the whole list
+CONNECT_TIMEOUT = 5  # Seconds before falling back to the cached copy
+
+# Responses are kept on disk so viewed datasets reopen instantly and
+# remain browsable while the backend is unreachable
+CACHE_PATH = os.getenv(
+    'CHEMVIS_CACHE_PATH',
+    os.path.join(os.path.expanduser('~'), '.chemical_visualizer', 'cache.sqlite3')
+)
+CACHE_MAX_BYTES = int(os.getenv('CHEMVIS_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+CACHE_PREFETCH_ROWS = 200000  # Datasets up to this size are cached whole on first view
 
 
 class ChemicalVisualizerApp(QMainWindow):
+    # Emitted by network tasks; queued to the GUI thread, which owns ``offline``
+    offline_changed = pyqtSignal(bool)
+    
     def __init__(self):
         super().__init__()
         self.session = requests.Session()
+        self.cache = LocalCache(CACHE_PATH, CACHE_MAX_BYTES)
+        self.offline = False  # Set when the last request was served from the cache
+        self.offline_changed.connect(self.set_offline)
+        # All HTTP calls run on worker threads so the window never freezes
+        self.network = NetworkManager(self)
         self.current_dataset = None
+        self.chart_rows_dataset = None  # Dataset whose rows the charts show
+        self.row_scatter = None
         self.init_ui()
     
     def init_ui(self):
@@ -126,27 +159,47 @@ class ChemicalVisualizerApp(QMainWindow):
         # Data table tab
         table_tab = QWidget()
         table_layout = QVBoxLayout()
-        self.data_table = QTableWidget()
+        self.table_filter_input = QLineEdit()
+        self.table_filter_input.setPlaceholderText('Filter by name or type...')
+        self.table_filter_input.textChanged.connect(self.filter_table)
+        table_layout.addWidget(self.table_filter_input)
+        
+        self.equipment_model = EquipmentTableModel(self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.equipment_model)
+        self.data_table.setSortingEnabled(True)
+        self.data_table.horizontalHeader().setStretchLastSection(True)
+        self.data_table.verticalHeader().setDefaultSectionSize(22)
         table_layout.addWidget(self.data_table)
         table_tab.setLayout(table_layout)
         
         # Charts tab
-        charts_tab = QWidget()
+        self.charts_tab = QWidget()
         charts_layout = QVBoxLayout()
         
-        self.figure = Figure(figsize=(10, 6))
+        self.figure = Figure(figsize=(10, 8))
         self.canvas = FigureCanvas(self.figure)
+        charts_layout.addWidget(NavigationToolbar(self.canvas, self.charts_tab))
         charts_layout.addWidget(self.canvas)
         
-        charts_tab.setLayout(charts_layout)
+        self.charts_tab.setLayout(charts_layout)
         
         self.tabs.addTab(summary_tab, 'Summary')
         self.tabs.addTab(table_tab, 'Data Table')
-        self.tabs.addTab(charts_tab, 'Charts')
+        self.tabs.addTab(self.charts_tab, 'Charts')
+        self.tabs.currentChanged.connect(self.on_tab_changed)
         
         main_layout.addWidget(self.tabs)
         
-        # Status bar
+        # Status bar, with progress for uploads and downloads
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.hide()
+        self.cancel_transfer_btn = QPushButton('Cancel')
+        self.cancel_transfer_btn.clicked.connect(self.cancel_transfer)
+        self.cancel_transfer_btn.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+        self.statusBar().addPermanentWidget(self.cancel_transfer_btn)
         self.statusBar().showMessage('Ready')
         
         # Load initial data
@@ -192,7 +245,7 @@ class ChemicalVisualizerApp(QMainWindow):
                 border: 2px solid #ddd;
                 border-radius: 5px;
             }
-            QTableWidget {
+            QTableView {
                 background: white;
                 border-radius: 5px;
             }
@@ -206,31 +259,46 @@ class ChemicalVisualizerApp(QMainWindow):
             QMessageBox.warning(self, 'Error', 'Please enter username and password')
             return
         
-        try:
-            response = self.session.post(f'{API_BASE_URL}/auth/login/', 
-                                        json={'username': username, 'password': password})
-            if response.status_code == 200:
-                data = response.json()
-                self.auth_status_label.setText(f"Logged in as: {data['user']['username']}")
-                self.login_btn.setEnabled(False)
-                self.logout_btn.setEnabled(True)
-                QMessageBox.information(self, 'Success', 'Login successful!')
-            else:
-                QMessageBox.warning(self, 'Error', response.json().get('error', 'Login failed'))
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Login error: {str(e)}')
+        self.login_btn.setEnabled(False)
+        self.network.submit(
+            lambda task: self.session.post(f'{API_BASE_URL}/auth/login/',
+                                           json={'username': username, 'password': password}),
+            on_done=self.login_finished,
+            on_error=self.login_failed
+        )
     
-    def handle_logout(self):
-        try:
-            self.session.post(f'{API_BASE_URL}/auth/logout/')
-            self.auth_status_label.setText('Not logged in')
+    def login_finished(self, response):
+        if response.status_code == 200:
+            data = response.json()
+            self.auth_status_label.setText(f"Logged in as: {data['user']['username']}")
+            self.logout_btn.setEnabled(True)
+            QMessageBox.information(self, 'Success', 'Login successful!')
+        else:
             self.login_btn.setEnabled(True)
-            self.logout_btn.setEnabled(False)
-            self.username_input.clear()
-            self.password_input.clear()
-            QMessageBox.information(self, 'Success', 'Logged out successfully')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Logout error: {str(e)}')
+            QMessageBox.warning(self, 'Error', response.json().get('error', 'Login failed'))
+    
+    def login_failed(self, error):
+        self.login_btn.setEnabled(True)
+        QMessageBox.critical(self, 'Error', f'Login error: {error}')
+    
+    def handle_logout(self):
+        self.logout_btn.setEnabled(False)
+        self.network.submit(
+            lambda task: self.session.post(f'{API_BASE_URL}/auth/logout/'),
+            on_done=self.logout_finished,
+            on_error=self.logout_failed
+        )
+    
+    def logout_finished(self, response):
+        self.auth_status_label.setText('Not logged in')
+        self.login_btn.setEnabled(True)
+        self.username_input.clear()
+        self.password_input.clear()
+        QMessageBox.information(self, 'Success', 'Logged out successfully')
+    
+    def logout_failed(self, error):
+        self.logout_btn.setEnabled(True)
+        QMessageBox.critical(self, 'Error', f'Logout error: {error}')
     
     def select_file(self):
         filename, _ = QFileDialog.getOpenFileName(self, 'Select CSV File', '', 'CSV Files (*.csv)')
@@ -244,54 +312,312 @@ class ChemicalVisualizerApp(QMainWindow):
             QMessageBox.warning(self, 'Error', 'No file selected')
             return
         
+        # Streamed from disk in chunks rather than read into memory
+        self.upload_btn.setEnabled(False)
+        self.start_transfer('Uploading...')
+        self.network.submit(
+            stream_upload, self.session, f'{API_BASE_URL}/datasets/upload/', self.selected_file,
+            group='transfer',
+            on_done=self.upload_finished,
+            on_error=self.upload_failed,
+            on_progress=self.show_transfer_progress
+        )
+    
+    def upload_finished(self, result):
+        self.end_transfer()
+        status, payload = result
+        if status in (200, 201):
+            if payload.get('duplicate'):
+                QMessageBox.information(self, 'Success', 'This file was already uploaded; '
+                                        'using the existing dataset.')
+            else:
+                QMessageBox.information(self, 'Success', 'File uploaded successfully!')
+            self.load_datasets()
+            self.file_label.setText('No file selected')
+            del self.selected_file
+        else:
+            self.upload_btn.setEnabled(True)
+            QMessageBox.warning(self, 'Error', payload.get('error', 'Upload failed'))
+    
+    def upload_failed(self, error):
+        self.end_transfer()
+        self.upload_btn.setEnabled(True)
+        QMessageBox.critical(self, 'Error', f'Upload error: {error}')
+    
+    def start_transfer(self, message):
+        self.statusBar().showMessage(message)
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.show()
+        self.cancel_transfer_btn.show()
+    
+    def show_transfer_progress(self, done, total):
+        if total:
+            # Percent rather than bytes, which overflow the int range past 2 GB
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(done * 100 / total))
+        else:
+            self.progress_bar.setRange(0, 0)
+    
+    def end_transfer(self):
+        self.progress_bar.hide()
+        self.cancel_transfer_btn.hide()
+    
+    def cancel_transfer(self):
+        self.network.cancel_group('transfer')
+        self.end_transfer()
+        self.upload_btn.setEnabled(hasattr(self, 'selected_file'))
+        self.download_pdf_btn.setEnabled(self.current_dataset is not None)
+        self.statusBar().showMessage('Transfer cancelled')
+    
+    def conditional_get(self, task, key, url, params=None):
+        """GET ``url``, revalidating the copy cached under ``key``.
+        
+        Returns ``(etag, body)``. If the server cannot be reached the cached
+        copy is returned instead and the client is marked offline. Blocking;
+        call it from a network task, not the GUI thread. The body is read in
+        chunks and the download stops at the next one once ``task`` is
+        cancelled.
+        """
+        cached = self.cache.get(key)
+        headers = {'If-None-Match': cached[0]} if cached and cached[0] else {}
+        
         try:
-            with open(self.selected_file, 'rb') as f:
-                files = {'file': f}
-                response = self.session.post(f'{API_BASE_URL}/datasets/upload/', files=files)
+            response = self.session.get(url, params=params, headers=headers, stream=True,
+                                        timeout=(CONNECT_TIMEOUT, None))
+        except (requests.ConnectionError, requests.Timeout):
+            if cached is None:
+                raise
+            self.offline_changed.emit(True)
+            return cached
+        self.offline_changed.emit(False)
+        
+        with response:
+            if response.status_code == 304 and cached:
+                return cached
+            response.raise_for_status()
+            body = self.read_body(task, response)
+        
+        etag = response.headers.get('ETag')
+        if etag:
+            self.cache.put(key, etag, body)
+        return etag, body
+    
+    @staticmethod
+    def read_body(task, response):
+        """Body of a streamed response, stopping early if ``task`` is cancelled"""
+        body = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            task.check()
+            body += chunk
+        return bytes(body)
+    
+    def get_json(self, task, url, params=None):
+        """GET a JSON resource through the local cache"""
+        key = 'json:' + requests.Request('GET', url, params=params).prepare().url
+        _, body = self.conditional_get(task, key, url, params)
+        return json.loads(body)
+    
+    def set_offline(self, offline):
+        self.offline = offline
+    
+    def status_message(self, message):
+        if self.offline:
+            message += ' (offline, showing cached data)'
+        self.statusBar().showMessage(message)
+    
+    def fetch_datasets(self, task):
+        """Every dataset, following the list's ``X-Next-Cursor`` pages.
+        
+        The first page's ETag covers the whole list (it changes whenever
+        any dataset does), so the assembled list is cached under it and a
+        304 for the first page means nothing needs fetching.
+        """
+        url = f'{API_BASE_URL}/datasets/'
+        params = {'limit': DATASET_PAGE_SIZE}
+        cached = self.cache.get('datasets')
+        headers = {'If-None-Match': cached[0]} if cached and cached[0] else {}
+        
+        datasets = []
+        etag = None
+        while True:
+            try:
+                response = self.session.get(url, params=params, headers=headers, stream=True,
+                                            timeout=(CONNECT_TIMEOUT, None))
+            except (requests.ConnectionError, requests.Timeout):
+                if cached is None:
+                    raise
+                self.offline_changed.emit(True)
+                return json.loads(cached[1])
+            self.offline_changed.emit(False)
             
-            if response.status_code == 201:
-                QMessageBox.information(self, 'Success', 'File uploaded successfully!')
-                self.load_datasets()
-                self.file_label.setText('No file selected')
-                self.upload_btn.setEnabled(False)
-            else:
-                QMessageBox.warning(self, 'Error', response.json().get('error', 'Upload failed'))
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Upload error: {str(e)}')
+            with response:
+                if response.status_code == 304 and cached:
+                    return json.loads(cached[1])
+                response.raise_for_status()
+                datasets.extend(json.loads(self.read_body(task, response)))
+            
+            etag = etag or response.headers.get('ETag')
+            cursor = response.headers.get('X-Next-Cursor')
+            if not cursor:
+                break
+            params = {'limit': DATASET_PAGE_SIZE, 'cursor': cursor}
+            headers = {}
+        
+        if etag:
+            self.cache.put('datasets', etag, json.dumps(datasets).encode('utf-8'))
+        return datasets
     
     def load_datasets(self):
-        try:
-            response = self.session.get(f'{API_BASE_URL}/datasets/')
-            if response.status_code == 200:
-                datasets = response.json()
-                self.dataset_combo.clear()
-                for dataset in datasets:
-                    self.dataset_combo.addItem(
-                        f"{dataset['filename']} - {dataset['uploaded_at'][:10]}",
-                        dataset['id']
-                    )
-                self.statusBar().showMessage(f'Loaded {len(datasets)} datasets')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to load datasets: {str(e)}')
+        self.statusBar().showMessage('Loading datasets...')
+        self.network.cancel_group('datasets')
+        self.network.submit(
+            self.fetch_datasets,
+            group='datasets',
+            on_done=self.show_datasets,
+            on_error=lambda error: QMessageBox.critical(
+                self, 'Error', f'Failed to load datasets: {error}'
+            )
+        )
+    
+    def show_datasets(self, datasets):
+        self.dataset_combo.clear()
+        for dataset in datasets:
+            self.dataset_combo.addItem(
+                f"{dataset['filename']} - {dataset['uploaded_at'][:10]}",
+                dataset['id']
+            )
+        self.status_message(f'Loaded {len(datasets)} datasets')
     
     def on_dataset_selected(self, index):
         if index >= 0:
             dataset_id = self.dataset_combo.currentData()
             if dataset_id:
                 self.load_dataset_details(dataset_id)
-                self.download_pdf_btn.setEnabled(True)
     
-    def load_dataset_details(self, dataset_id):
+    def load_equipment_columns(self, task, dataset_id):
+        """Fetch a dataset's equipment rows through the columnar npz export.
+        
+        Returns ``(etag, frame)``; the npz body is kept in the local cache.
+        """
+        etag, body = self.conditional_get(
+            task,
+            f'columns:{dataset_id}',
+            f'{API_BASE_URL}/datasets/{dataset_id}/export/',
+            params={'format': 'npz'}
+        )
+        return etag, self.equipment_frame(body)
+    
+    def cached_equipment_columns(self, dataset_id):
+        """``(etag, frame)`` from the local cache without any request, or None"""
+        cached = self.cache.get(f'columns:{dataset_id}')
+        if cached is None:
+            return None
+        etag, body = cached
+        return etag, self.equipment_frame(body)
+    
+    @staticmethod
+    def equipment_frame(body):
+        with np.load(io.BytesIO(body)) as data:
+            # Names come as UTF-8 bytes plus offsets into them
+            offsets = data['equipment_name_offsets']
+            name_data = data['equipment_name_data'].tobytes()
+            return pd.DataFrame({
+                'id': data['id'],
+                'equipment_name': [
+                    name_data[start:end].decode('utf-8')
+                    for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+                ],
+                'equipment_type': pd.Categorical.from_codes(
+                    data['equipment_type_codes'],
+                    data['equipment_type_categories']
+                ),
+                'flowrate': data['flowrate'],
+                'pressure': data['pressure'],
+                'temperature': data['temperature'],
+            })
+    
+    @staticmethod
+    def table_columns(frame):
+        return {name: frame[name].to_numpy() for name, _ in EquipmentTableModel.COLUMNS}
+    
+    def fetch_equipment_page(self, task, dataset_id, cursor):
+        """One page of equipment rows as columns, for the table model"""
+        params = {
+            'limit': EQUIPMENT_PAGE_SIZE,
+            'fields': ','.join(name for name, _ in EquipmentTableModel.COLUMNS)
+        }
+        if cursor:
+            params['cursor'] = cursor
+        page = self.get_json(task, f'{API_BASE_URL}/datasets/{dataset_id}/', params=params)
+        rows = page['equipment']
+        columns = {
+            name: [row[name] for row in rows]
+            for name, _ in EquipmentTableModel.COLUMNS
+        }
+        return columns, page.get('next_cursor')
+    
+    def fetch_all_equipment(self, task, dataset_id):
+        """Every equipment row as columns, preferring the binary export"""
         try:
-            response = self.session.get(f'{API_BASE_URL}/datasets/{dataset_id}/')
-            if response.status_code == 200:
-                self.current_dataset = response.json()
-                self.display_summary()
-                self.display_table()
-                self.display_charts()
-                self.statusBar().showMessage('Dataset loaded successfully')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'Failed to load dataset: {str(e)}')
+            _, frame = self.load_equipment_columns(task, dataset_id)
+            return self.table_columns(frame)
+        except (requests.RequestException, ValueError, KeyError):
+            columns = {name: [] for name, _ in EquipmentTableModel.COLUMNS}
+            cursor = None
+            while True:
+                task.check()
+                page, cursor = self.fetch_equipment_page(task, dataset_id, cursor)
+                for name in columns:
+                    columns[name].extend(page[name])
+                if not cursor:
+                    return columns
+    
+    def load_dataset_details(self, dataset_id):
+        # Anything still loading for the previous dataset is no longer wanted
+        self.network.cancel_group('dataset')
+        self.statusBar().showMessage('Loading dataset...')
+        # Summary only; the table model pages in the rows as it scrolls
+        self.network.submit(
+            lambda task: self.get_json(
+                task,
+                f'{API_BASE_URL}/datasets/{dataset_id}/',
+                params={'limit': 1, 'fields': 'id'}
+            ),
+            group='dataset',
+            on_done=self.show_dataset,
+            on_error=lambda error: QMessageBox.critical(
+                self, 'Error', f'Failed to load dataset: {error}'
+            )
+        )
+    
+    def show_dataset(self, dataset):
+        self.current_dataset = dataset
+        self.download_pdf_btn.setEnabled(True)
+        self.display_summary()
+        self.display_table()
+        self.display_charts()
+        self.status_message('Dataset loaded successfully')
+    
+    def request_equipment_page(self, dataset_id, cursor, callback):
+        self.network.submit(
+            self.fetch_equipment_page, dataset_id, cursor,
+            group='dataset',
+            on_done=lambda result: callback(*result),
+            on_error=self.equipment_fetch_failed
+        )
+    
+    def request_all_equipment(self, dataset_id, callback):
+        self.statusBar().showMessage('Loading all rows...')
+        self.network.submit(
+            self.fetch_all_equipment, dataset_id,
+            group='dataset',
+            on_done=lambda columns: (callback(columns), self.statusBar().showMessage('All rows loaded')),
+            on_error=self.equipment_fetch_failed
+        )
+    
+    def equipment_fetch_failed(self, error):
+        self.equipment_model.fetch_failed()
+        self.statusBar().showMessage(f'Failed to load rows: {error}')
     
     def display_summary(self):
         if not self.current_dataset:
@@ -317,35 +643,77 @@ class ChemicalVisualizerApp(QMainWindow):
         self.summary_label.setText(summary_text)
     
     def display_table(self):
-        if not self.current_dataset or 'equipment' not in self.current_dataset:
+        if not self.current_dataset:
             return
         
-        equipment = self.current_dataset['equipment']
-        
-        self.data_table.setRowCount(len(equipment))
-        self.data_table.setColumnCount(5)
-        self.data_table.setHorizontalHeaderLabels(['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
-        
-        for i, eq in enumerate(equipment):
-            self.data_table.setItem(i, 0, QTableWidgetItem(eq['equipment_name']))
-            self.data_table.setItem(i, 1, QTableWidgetItem(eq['equipment_type']))
-            self.data_table.setItem(i, 2, QTableWidgetItem(str(eq['flowrate'])))
-            self.data_table.setItem(i, 3, QTableWidgetItem(str(eq['pressure'])))
-            self.data_table.setItem(i, 4, QTableWidgetItem(str(eq['temperature'])))
-        
+        dataset_id = self.current_dataset['id']
+        self.table_filter_input.blockSignals(True)
+        self.table_filter_input.clear()
+        self.table_filter_input.blockSignals(False)
+        self.data_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        
+        cached = self.cached_equipment_columns(dataset_id)
+        if cached:
+            # Seen before: show the local copy now, then check it is current
+            etag, frame = cached
+            self.show_columns(self.table_columns(frame))
+            self.network.submit(
+                self.load_equipment_columns, dataset_id,
+                group='dataset',
+                on_done=lambda result: self.refresh_columns(etag, result)
+            )
+        else:
+            self.equipment_model.set_source(
+                lambda cursor, callback: self.request_equipment_page(dataset_id, cursor, callback),
+                lambda callback: self.request_all_equipment(dataset_id, callback)
+            )
+            if self.equipment_model.canFetchMore():
+                self.equipment_model.fetchMore()
+            total = self.current_dataset.get('total_rows', 0)
+            if total <= CACHE_PREFETCH_ROWS:
+                # Store the whole dataset for next time and for offline use
+                self.network.submit(
+                    self.load_equipment_columns, dataset_id,
+                    group='dataset'
+                )
         self.data_table.resizeColumnsToContents()
     
+    def show_columns(self, columns):
+        """Browse complete, already loaded columns"""
+        self.equipment_model.set_source(
+            lambda cursor, callback: callback(columns, None),
+            lambda callback: callback(columns)
+        )
+        self.equipment_model.fetchMore()
+    
+    def refresh_columns(self, etag, result):
+        new_etag, frame = result
+        if new_etag != etag:
+            self.show_columns(self.table_columns(frame))
+            self.status_message('Dataset updated')
+    
+    def filter_table(self, text):
+        try:
+            self.equipment_model.set_filter(text)
+        except Exception as e:
+            QMessageBox.critical(self, 'Error', f'Failed to filter table: {str(e)}')
+    
     def display_charts(self):
         if not self.current_dataset:
             return
         
         summary = self.current_dataset['summary']
         
+        if self.row_scatter:
+            self.row_scatter.disconnect()
+            self.row_scatter = None
         self.figure.clear()
         
-        # Create 2 subplots
-        ax1 = self.figure.add_subplot(121)
-        ax2 = self.figure.add_subplot(122)
+        # Create 2x2 subplots: summary charts on top, per-row charts below
+        ax1 = self.figure.add_subplot(221)
+        ax2 = self.figure.add_subplot(222)
+        self.scatter_ax = self.figure.add_subplot(223)
+        self.histogram_ax = self.figure.add_subplot(224)
         
         # Bar chart for averages
         labels = ['Flowrate', 'Pressure', 'Temperature']
@@ -368,8 +736,74 @@ class ChemicalVisualizerApp(QMainWindow):
         ax2.pie(counts, labels=types, autopct='%1.1f%%', startangle=90)
         ax2.set_title('Equipment Type Distribution', fontweight='bold')
         
+        # Per-row charts need every row, so they load only once shown
+        for ax in (self.scatter_ax, self.histogram_ax):
+            ax.text(0.5, 0.5, 'Loading rows...', ha='center', va='center',
+                    transform=ax.transAxes, color='#888888')
+            ax.set_xticks([])
+            ax.set_yticks([])
+        self.chart_rows_dataset = None
+        
         self.figure.tight_layout()
         self.canvas.draw()
+        
+        if self.tabs.currentWidget() is self.charts_tab:
+            self.load_chart_rows()
+    
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.charts_tab:
+            self.load_chart_rows()
+    
+    def load_chart_rows(self):
+        if not self.current_dataset:
+            return
+        dataset_id = self.current_dataset['id']
+        if self.chart_rows_dataset == dataset_id:
+            return
+        self.chart_rows_dataset = dataset_id
+        
+        cached = self.cached_equipment_columns(dataset_id)
+        if cached:
+            self.display_row_charts(dataset_id, cached[1])
+            return
+        self.network.submit(
+            self.load_equipment_columns, dataset_id,
+            group='dataset',
+            on_done=lambda result: self.display_row_charts(dataset_id, result[1]),
+            on_error=self.chart_rows_failed
+        )
+    
+    def chart_rows_failed(self, error):
+        self.chart_rows_dataset = None
+        self.statusBar().showMessage(f'Failed to load chart rows: {error}')
+    
+    def display_row_charts(self, dataset_id, frame):
+        if not self.current_dataset or self.current_dataset['id'] != dataset_id:
+            return
+        
+        # Scatter of flowrate against pressure, thinned to what is visible
+        ax = self.scatter_ax
+        ax.clear()
+        self.row_scatter = DecimatedScatter(
+            ax, frame['flowrate'].to_numpy(), frame['pressure'].to_numpy(),
+            s=6, color='#667eea', alpha=0.6, linewidths=0
+        )
+        ax.set_title(f'Flowrate vs Pressure ({len(frame)} rows)', fontweight='bold')
+        ax.set_xlabel('Flowrate')
+        ax.set_ylabel('Pressure')
+        ax.grid(alpha=0.3)
+        
+        # Temperature distribution, binned before drawing
+        ax = self.histogram_ax
+        ax.clear()
+        draw_histogram(ax, frame['temperature'].to_numpy(), color='#feca57', alpha=0.8)
+        ax.set_title('Temperature Distribution', fontweight='bold')
+        ax.set_xlabel('Temperature')
+        ax.set_ylabel('Count')
+        ax.grid(axis='y', alpha=0.3)
+        
+        self.figure.tight_layout()
+        self.canvas.draw_idle()
     
     def download_pdf(self):
         if not self.current_dataset:
@@ -377,22 +811,38 @@ class ChemicalVisualizerApp(QMainWindow):
             return
         
         dataset_id = self.current_dataset['id']
+        filename, _ = QFileDialog.getSaveFileName(self, 'Save PDF Report', 
+                                                 f'report_{dataset_id}.pdf', 
+                                                 'PDF Files (*.pdf)')
+        if not filename:
+            return
         
-        try:
-            response = self.session.get(f'{API_BASE_URL}/datasets/{dataset_id}/generate_pdf/', stream=True)
-            
-            if response.status_code == 200:
-                filename, _ = QFileDialog.getSaveFileName(self, 'Save PDF Report', 
-                                                         f'report_{dataset_id}.pdf', 
-                                                         'PDF Files (*.pdf)')
-                if filename:
-                    with open(filename, 'wb') as f:
-                        f.write(response.content)
-                    QMessageBox.information(self, 'Success', f'PDF saved to {filename}')
-            else:
-                QMessageBox.warning(self, 'Error', 'Failed to generate PDF')
-        except Exception as e:
-            QMessageBox.critical(self, 'Error', f'PDF download error: {str(e)}')
+        # Written to disk chunk by chunk as it arrives
+        self.download_pdf_btn.setEnabled(False)
+        self.start_transfer('Downloading report...')
+        self.network.submit(
+            stream_download, self.session,
+            f'{API_BASE_URL}/datasets/{dataset_id}/generate_pdf/', filename,
+            group='transfer',
+            on_done=self.download_finished,
+            on_error=self.download_failed,
+            on_progress=self.show_transfer_progress
+        )
+    
+    def download_finished(self, filename):
+        self.end_transfer()
+        self.download_pdf_btn.setEnabled(self.current_dataset is not None)
+        QMessageBox.information(self, 'Success', f'PDF saved to {filename}')
+    
+    def download_failed(self, error):
+        self.end_transfer()
+        self.download_pdf_btn.setEnabled(self.current_dataset is not None)
+        QMessageBox.critical(self, 'Error', f'PDF download error: {error}')
+    
+    def closeEvent(self, event):
+        self.network.shutdown()
+        self.cache.close()
+        super().closeEvent(event)
 
 
 def main():
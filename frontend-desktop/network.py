@@ -0,0 +1,193 @@
+import os
+import threading
+import uuid
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CancelledError(Exception):
+    """Raised inside a task once it has been cancelled"""
+
+
+class TaskSignals(QObject):
+    progress = pyqtSignal(int, int)  # bytes done, bytes total (0 if unknown)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class NetworkTask(QRunnable):
+    """Run ``fn(task, *args)`` on a pool thread and report back through signals.
+
+    Signals are delivered on the GUI thread. A cancelled task never emits
+    ``finished`` or ``failed``; long transfers notice the cancellation at
+    their next chunk via ``task.report`` or ``task.check``.
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise CancelledError()
+
+    def report(self, done, total=0):
+        self.check()
+        self.signals.progress.emit(done, total)
+
+    def run(self):
+        try:
+            result = self.fn(self, *self.args)
+        except CancelledError:
+            return
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
+
+
+class NetworkManager(QObject):
+    """Thread pool for HTTP calls, with cancellable task groups.
+
+    Tasks submitted under a group name (e.g. ``'dataset'`` for everything
+    belonging to the selected dataset) can be abandoned together with
+    ``cancel_group`` when the user moves on.
+    """
+
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._groups = {}
+
+    def submit(self, fn, *args, group=None, on_done=None, on_error=None, on_progress=None):
+        task = NetworkTask(fn, *args)
+        if on_done:
+            task.signals.finished.connect(on_done)
+        if on_error:
+            task.signals.failed.connect(on_error)
+        if on_progress:
+            task.signals.progress.connect(on_progress)
+
+        if group:
+            self._groups.setdefault(group, set()).add(task)
+            task.signals.finished.connect(lambda _: self._forget(group, task))
+            task.signals.failed.connect(lambda _: self._forget(group, task))
+
+        self.pool.start(task)
+        return task
+
+    def cancel_group(self, group):
+        for task in self._groups.pop(group, ()):
+            task.cancel()
+
+    def shutdown(self):
+        """Cancel everything and wait for running requests to return"""
+        self.pool.clear()
+        for group in list(self._groups):
+            self.cancel_group(group)
+        self.pool.waitForDone()
+
+    def _forget(self, group, task):
+        self._groups.get(group, set()).discard(task)
+
+
+class MultipartFileBody:
+    """File-like multipart/form-data body that streams a file from disk.
+
+    requests sends objects with ``read`` and ``__len__`` in blocks with a
+    Content-Length header, so the file is never loaded whole and upload
+    progress can be reported as each block is read.
+    """
+
+    def __init__(self, path, field='file', content_type='text/csv', task=None):
+        self.boundary = uuid.uuid4().hex
+        filename = os.path.basename(path)
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+        self._file = open(path, 'rb')
+        self._file_size = os.path.getsize(path)
+        self._sent = 0
+        self._stage = 0  # 0 head, 1 file, 2 tail, 3 done
+        self.task = task
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self):
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def read(self, size=-1):
+        if self._stage == 0:
+            self._stage = 1
+            return self._head
+        if self._stage == 1:
+            chunk = self._file.read(CHUNK_SIZE if size is None or size < 0 else size)
+            if chunk:
+                self._sent += len(chunk)
+                if self.task:
+                    self.task.report(self._sent, self._file_size)
+                return chunk
+            self._file.close()
+            self._stage = 2
+        if self._stage == 2:
+            self._stage = 3
+            return self._tail
+        return b''
+
+    def close(self):
+        self._file.close()
+
+
+def stream_upload(task, session, url, path):
+    """Stream ``path`` to ``url`` as a multipart upload"""
+    body = MultipartFileBody(path, task=task)
+    try:
+        response = session.post(url, data=body, headers={'Content-Type': body.content_type})
+    finally:
+        body.close()
+    try:
+        payload = response.json()
+    except ValueError:
+        payload = {}
+    return response.status_code, payload
+
+
+def stream_download(task, session, url, path):
+    """Stream ``url`` into ``path`` in chunks, reporting progress"""
+    partial = f'{path}.part'
+    with session.get(url, stream=True) as response:
+        response.raise_for_status()
+        total = int(response.headers.get('Content-Length') or 0)
+        done = 0
+        try:
+            with open(partial, 'wb') as fh:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    fh.write(chunk)
+                    done += len(chunk)
+                    task.report(done, total)
+            os.replace(partial, path)
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+    return path
@@ -13,6 +13,7 @@ function App() {
   const [selectedDataset, setSelectedDataset] = useState(null);
   const [uploadFile, setUploadFile] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
   const [user, setUser] = useState(null);
   const [authMode, setAuthMode] = useState('login'); // 'login' or 'register'
@@ -72,8 +73,17 @@ function App() {
 
   const fetchDatasets = async () => {
     try {
-      const response = await axios.get(`${API_BASE_URL}/datasets/`);
-      setDatasets(response.data);
+      // The list is paginated; follow X-Next-Cursor until the last page
+      const all = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API_BASE_URL}/datasets/`, {
+          params: cursor ? { cursor } : {}
+        });
+        all.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+      setDatasets(all);
     } catch (err) {
       setError('Failed to fetch datasets');
     }
@@ -121,6 +131,26 @@ function App() {
     }
   };
 
+  const handleLoadMore = async () => {
+    const { id, next_cursor } = selectedDataset;
+    setLoadingMore(true);
+    try {
+      const response = await axios.get(`${API_BASE_URL}/datasets/${id}/`, {
+        params: { cursor: next_cursor }
+      });
+      // Ignore the page if another dataset was selected meanwhile
+      setSelectedDataset(current => current?.id !== id ? current : {
+        ...current,
+        equipment: [...current.equipment, ...response.data.equipment],
+        next_cursor: response.data.next_cursor
+      });
+    } catch (err) {
+      setError('Failed to load more rows');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDownloadPDF = async (datasetId) => {
     try {
       const response = await axios.get(`${API_BASE_URL}/datasets/${datasetId}/generate_pdf/`, {
@@ -319,6 +349,11 @@ function App() {
 
             <div className="data-table">
               <h3>Equipment Details</h3>
+              {selectedDataset.next_cursor && (
+                <p>
+                  Showing {selectedDataset.equipment?.length} of {selectedDataset.total_rows} rows
+                </p>
+              )}
               <table>
                 <thead>
                   <tr>
@@ -341,6 +376,15 @@ function App() {
                   ))}
                 </tbody>
               </table>
+              {selectedDataset.next_cursor && (
+                <button
+                  className="btn btn-secondary load-more"
+                  onClick={handleLoadMore}
+                  disabled={loadingMore}
+                >
+                  {loadingMore ? 'Loading...' : 'Load more rows'}
+                </button>
+              )}
             </div>
           </section>
         )}